@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de generación de páginas, tarjetas y catálogo.
+
+Genera inventarios sintéticos con las columnas de Datos_2.csv (1k, 10k y 100k
+filas por defecto), mide las operaciones principales de programa_2 y guarda
+los tiempos en JSON para comparar entre commits:
+
+    python benchmark.py -o bench_antes.json
+    python benchmark.py -o bench_despues.json --comparar bench_antes.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import programa_2 as p2
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+DATOS_BASE = os.path.join(DIRECTORIO, 'Datos_2.csv')
+PLANTILLA_PAGINA = os.path.join(DIRECTORIO, 'pagina_producto_RB2398.html')
+PLANTILLA_TARJETA = os.path.join(DIRECTORIO, 'plantilla_tarjeta.html')
+CATALOGO = os.path.join(DIRECTORIO, 'Armazones.html')
+LOGOS = os.path.join(DIRECTORIO, 'links_logos.txt')
+LINKS = os.path.join(DIRECTORIO, 'ligas-wp.txt')
+
+# ---------------- INVENTARIO SINTÉTICO ----------------
+def inventario_sintetico(filas, semilla=0):
+    """DataFrame de `filas` productos con la forma de Datos_2.csv (SKU únicos, precios y descuentos variados)."""
+    base = pd.read_csv(DATOS_BASE, dtype=str).fillna('')
+    rnd = random.Random(semilla)
+    registros = []
+    for i in range(filas):
+        registro = dict(base.iloc[i % len(base)])
+        sku = f"{registro['SKU']}-{i:06d}"
+        precio = rnd.randrange(900, 9000, 50)
+        registro['SKU'] = sku
+        registro['Valor(es) del atributo 1'] = sku
+        registro['Precio normal'] = f"${precio:,.2f}"
+        if rnd.random() < 0.6:
+            porcentaje = rnd.choice((10, 15, 20, 30, 40))
+            registro['Porcentajede descuento'] = f"{porcentaje}%"
+            registro['precio con descuento'] = f"${precio * (100 - porcentaje) / 100:,.2f}"
+        else:
+            registro['Porcentajede descuento'] = ''
+            registro['precio con descuento'] = ''
+        # Una de cada tres filas trae la imagen "main" fuera del primer lugar
+        url = f"https://opticaskairoz.com.mx/wp-content/uploads/{sku}"
+        imagenes = [f"{url}-1.webp", f"{url}-2.webp", f"{url}-3.webp"]
+        if i % 3 == 0:
+            imagenes[2] = f"{url}-main.webp"
+        registro['IMAGEN 1'], registro['IMAGEN 2'], registro['IMAGEN 3'] = imagenes
+        registros.append(registro)
+    return pd.DataFrame(registros, columns=base.columns)
+
+# ---------------- MEDICIÓN ----------------
+def medir(funcion, repeticiones, preparar=None):
+    """Mejor tiempo (s) de `repeticiones` ejecuciones; `preparar` corre antes de cada una, fuera del tiempo."""
+    mejor = None
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+def _leer_texto(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def benchmarks_inventario(filas, directorio, repeticiones):
+    """Yield de (operación, elementos, segundos) para un inventario sintético de `filas` filas."""
+    df = inventario_sintetico(filas)
+    csv_path = os.path.join(directorio, f'inventario_{filas}.csv')
+    df.to_csv(csv_path, index=False)
+    registros = df.to_dict('records')
+    imagenes = [[r['IMAGEN 1'], r['IMAGEN 2'], r['IMAGEN 3']] for r in registros]
+    plantilla_pagina = _leer_texto(PLANTILLA_PAGINA)
+    plantilla_tarjeta = _leer_texto(PLANTILLA_TARJETA)
+    productos = [p2.producto_data_desde_registro(r) for r in registros]
+    # Un solo resolutor para todo el benchmark: buscar_logo_marca no acepta un dict
+    logos = p2.ResolutorMarcas(p2.leer_archivo_logos(LOGOS))
+    links = p2.leer_archivo_links(LINKS)
+
+    # --- Carga del CSV ---
+    cache = os.path.join(directorio, p2.DIRECTORIO_CACHE_INVENTARIO)
+    sin_cache = lambda: shutil.rmtree(cache, ignore_errors=True)
+    yield 'leer_inventario', filas, medir(lambda: p2.leer_inventario(csv_path), repeticiones, sin_cache)
+    yield 'leer_inventario_por_bloques', filas, medir(
+        lambda: [None for _ in p2.leer_inventario_por_bloques(csv_path)], repeticiones, sin_cache)
+    if p2.feather is not None:
+        p2.leer_inventario(csv_path)
+        yield 'leer_inventario (cache)', filas, medir(lambda: p2.leer_inventario(csv_path), repeticiones)
+
+    # --- Imágenes, páginas y tarjetas ---
+    yield 'reordenar_imagenes_para_tarjeta', filas, medir(
+        lambda: [p2.reordenar_imagenes_para_tarjeta(i) for i in imagenes], repeticiones)
+    yield 'generar_pagina_individual_desde_plantilla', filas, medir(
+        lambda: [p2.generar_pagina_individual_desde_plantilla(r, i, PLANTILLA_PAGINA)
+                 for r, i in zip(registros, imagenes)], repeticiones)
+    yield '_procesar_plantilla_masiva', filas, medir(
+        lambda: [p2.GeneradorCatalogoApp._procesar_plantilla_masiva(plantilla_pagina, d) for d in productos],
+        repeticiones)
+
+    def tarjetas_una_a_una():
+        for r in registros:
+            marca = r['Valor(es) del atributo 2']
+            p2.generar_tarjeta_catalogo(
+                r, p2.reordenar_imagenes_para_tarjeta([r['IMAGEN 1'], r['IMAGEN 2'], r['IMAGEN 3']]),
+                p2.buscar_logo_marca(marca, logos), links.get(r['SKU'], '#producto-' + r['SKU']),
+                r['Precio normal'], r['precio con descuento'], r['Porcentajede descuento'], plantilla_tarjeta)
+    yield 'generar_tarjeta_catalogo', filas, medir(tarjetas_una_a_una, repeticiones)
+    yield 'generar_tarjetas_lote', filas, medir(
+        lambda: p2.generar_tarjetas_lote(df, plantilla_tarjeta, logos, links), repeticiones)
+
+    # --- Catálogo: insertar, reemplazar en su lugar y eliminar todas las tarjetas ---
+    tarjetas = dict(p2.generar_tarjetas_lote(df, plantilla_tarjeta, logos, links))
+    # Mismas tarjetas con otro precio, para que el reemplazo reescriba el archivo
+    cambiado = df.assign(**{'Precio normal': df['Precio normal'].str.replace('.00', '.50', regex=False)})
+    tarjetas_cambiadas = dict(p2.generar_tarjetas_lote(cambiado, plantilla_tarjeta, logos, links))
+    catalogo = os.path.join(directorio, 'catalogo.html')
+    copiar_catalogo = lambda: shutil.copyfile(CATALOGO, catalogo)
+    yield 'insertar_tarjetas_en_archivo', filas, medir(
+        lambda: p2.insertar_tarjetas_en_archivo(catalogo, list(tarjetas.values()), respaldo=False),
+        repeticiones, copiar_catalogo)
+    conservar = os.path.join(directorio, 'catalogo_lleno.html')
+    shutil.copyfile(catalogo, conservar)
+
+    def restaurar_catalogo():
+        """Catálogo con las tarjetas insertadas y sin índice en memoria: se mide lectura, índice y escritura."""
+        shutil.copyfile(conservar, catalogo)
+        p2._INDICES_CATALOGO.clear()
+    yield 'actualizar_tarjetas_en_archivo (reemplazo)', filas, medir(
+        lambda: p2.actualizar_tarjetas_en_archivo(catalogo, tarjetas_cambiadas, respaldo=False),
+        repeticiones, restaurar_catalogo)
+    eliminar = {sku: None for sku in tarjetas}
+    yield 'actualizar_tarjetas_en_archivo (eliminar)', filas, medir(
+        lambda: p2.actualizar_tarjetas_en_archivo(catalogo, eliminar, respaldo=False),
+        repeticiones, restaurar_catalogo)
+
+# ---------------- RESULTADOS ----------------
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ''
+
+def comparar(resultados, base_path, tolerancia):
+    """Imprime la variación contra otro archivo de resultados; devuelve cuántas operaciones empeoraron."""
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    anteriores = {(r['operacion'], r['filas']): r['segundos'] for r in base['resultados']}
+    print(f"\nComparación con {base_path} (commit {base.get('commit') or '?'}):")
+    regresiones = 0
+    for r in resultados:
+        anterior = anteriores.get((r['operacion'], r['filas']))
+        if not anterior:
+            continue
+        cambio = r['segundos'] / anterior - 1
+        marca = ''
+        if cambio > tolerancia:
+            marca = '  <-- más lento'
+            regresiones += 1
+        print(f"  {r['operacion']:<45} {r['filas']:>7}  {anterior:9.3f} s -> {r['segundos']:9.3f} s  {cambio:+7.1%}{marca}")
+    return regresiones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mide páginas, tarjetas, catálogo y carga del CSV con inventarios sintéticos.')
+    parser.add_argument('--filas', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='tamaños de inventario a medir (por defecto 1000 10000 100000)')
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help='ejecuciones por operación; se guarda la mejor (por defecto 3)')
+    parser.add_argument('-o', '--salida', default='benchmark_resultados.json',
+                        help='archivo JSON de resultados (por defecto benchmark_resultados.json)')
+    parser.add_argument('--comparar', help='resultados de otro commit para comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='aumento relativo de tiempo considerado regresión (por defecto 0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    resultados = []
+    directorio = tempfile.mkdtemp(prefix='bench_catalogo_')
+    # Las caches (inventario) se crean en el temporal, no en las del usuario
+    cache_anterior = os.environ.get('GENERADOR_CACHE_DIR')
+    os.environ['GENERADOR_CACHE_DIR'] = directorio
+    try:
+        for filas in args.filas:
+            print(f"Inventario de {filas} filas")
+            for operacion, elementos, segundos in benchmarks_inventario(filas, directorio, args.repeticiones):
+                por_segundo = elementos / segundos if segundos else 0.0
+                resultados.append({'operacion': operacion, 'filas': filas,
+                                   'segundos': round(segundos, 6), 'por_segundo': round(por_segundo, 1)})
+                print(f"  {operacion:<45} {segundos:9.3f} s  {por_segundo:12.1f} /s")
+    finally:
+        if cache_anterior is None:
+            os.environ.pop('GENERADOR_CACHE_DIR', None)
+        else:
+            os.environ['GENERADOR_CACHE_DIR'] = cache_anterior
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    informe = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'repeticiones': args.repeticiones,
+        'resultados': resultados,
+    }
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        return 1 if comparar(resultados, args.comparar, args.tolerancia) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
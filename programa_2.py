@@ -5,37 +5,331 @@ import os
 import pyperclip
 import re
 import json
+import hashlib
+import sqlite3
 import threading
+import queue
+import argparse
+import sys
+import shutil
+import time
+import difflib
+import unicodedata
+import logging
+from logging.handlers import RotatingFileHandler
+import bisect
+from contextlib import contextmanager
+from datetime import datetime
+from collections import OrderedDict
+from html.parser import HTMLParser
 from urllib.parse import urlparse
 import requests
-from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from openpyxl import load_workbook
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow es opcional: sin él no hay cache de inventario
+    feather = None
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+# ---------------- REGISTRO (LOGGING) ----------------
+# Los mensajes llevan sus datos como argumentos (%s): con el nivel apagado no se
+# formatea nada, así que la depuración en rutas calientes no cuesta. Sin configurar
+# solo se muestran avisos y errores en la consola.
+log = logging.getLogger('generador_paginas')
+FORMATO_LOG = '%(asctime)s %(levelname)-7s [%(threadName)s] %(message)s'
+
+def configurar_registro(nivel=None, archivo=None, max_bytes=5 * 1024 * 1024, copias=5):
+    """Configura el nivel del registro y, opcionalmente, un archivo rotativo.
+
+    Sin argumentos usa GENERADOR_LOG_NIVEL (por defecto WARNING) y
+    GENERADOR_LOG_ARCHIVO del entorno. El archivo rota al llegar a `max_bytes`
+    y conserva `copias` archivos anteriores.
+    """
+    nivel = nivel or os.environ.get('GENERADOR_LOG_NIVEL') or 'WARNING'
+    archivo = archivo or os.environ.get('GENERADOR_LOG_ARCHIVO')
+    if isinstance(nivel, str):
+        valor = logging.getLevelName(nivel.upper())
+        if not isinstance(valor, int):
+            raise ValueError(f"Nivel de registro desconocido: {nivel}")
+        nivel = valor
+    
+    for manejador in list(log.handlers):
+        log.removeHandler(manejador)
+        manejador.close()
+    formato = logging.Formatter(FORMATO_LOG)
+    consola = logging.StreamHandler()
+    consola.setFormatter(formato)
+    log.addHandler(consola)
+    if archivo:
+        rotativo = RotatingFileHandler(archivo, maxBytes=max_bytes, backupCount=copias,
+                                       encoding='utf-8', delay=True)
+        rotativo.setFormatter(formato)
+        log.addHandler(rotativo)
+    log.setLevel(nivel)
+    log.propagate = False
+    return log
+
+# Directorio del programa: aquí viven el almacén y la plantilla predeterminada,
+# no en el directorio desde el que se lanza (cron, accesos directos...)
+DIRECTORIO_PROGRAMA = os.path.dirname(os.path.abspath(__file__))
+
+def directorio_cache(*partes):
+    """Directorio de caches del usuario: GENERADOR_CACHE_DIR, o LOCALAPPDATA / XDG_CACHE_HOME / ~/.cache."""
+    base = os.environ.get('GENERADOR_CACHE_DIR')
+    if not base:
+        sistema = os.environ.get('LOCALAPPDATA') if os.name == 'nt' else os.environ.get('XDG_CACHE_HOME')
+        base = os.path.join(sistema or os.path.join(os.path.expanduser('~'), '.cache'), 'generador_paginas')
+    return os.path.join(base, *partes)
 
 # Cache global para plantillas HTML
 _PLANTILLA_CACHE = {}
 
-# Cache para validación de URLs
-_URL_VALIDATION_CACHE = {}
+class CacheValidacionURL:
+    """Cache persistente (SQLite) de la validación de URLs de imágenes.
+
+    Cada entrada guarda si la URL es válida, el código HTTP, el content-type,
+    ETag/Last-Modified y cuándo se revisó. Caduca por TTL (más corto para las
+    URLs no válidas); al caducar se revalida con una petición condicional. En
+    memoria se mantienen como máximo `max_memoria` entradas (LRU) y en disco
+    `max_disco`; los cambios se escriben por lotes con volcar().
+    """
+
+    def __init__(self, path, ttl_valida=24 * 3600, ttl_invalida=3600, max_memoria=5000, max_disco=200000):
+        self.path = path
+        self.ttl_valida = ttl_valida
+        self.ttl_invalida = ttl_invalida
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self._memoria = OrderedDict()
+        self._sucias = {}
+        self._leidas = set()  # URLs leídas de disco cuyo uso hay que actualizar
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _conexion(self):
+        # Se abre al primer uso para que importar el módulo no cree archivos
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, valido INTEGER, status INTEGER, "
+                "content_type TEXT, etag TEXT, last_modified TEXT, revisado REAL, usado REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_usado ON urls(usado)")
+        return self._conn
+
+    def _recordar(self, url, entrada):
+        self._memoria[url] = entrada
+        self._memoria.move_to_end(url)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def obtener(self, url):
+        """Entrada de la URL (dict) o None; la busca en memoria y después en disco."""
+        with self._lock:
+            entrada = self._memoria.get(url)
+            if entrada is None:
+                try:
+                    fila = self._conexion().execute(
+                        "SELECT valido, status, content_type, etag, last_modified, revisado "
+                        "FROM urls WHERE url = ?", (url,)).fetchone()
+                except sqlite3.Error:
+                    fila = None
+                if fila is None:
+                    return None
+                entrada = dict(zip(('valido', 'status', 'content_type', 'etag', 'last_modified', 'revisado'), fila))
+                entrada['valido'] = bool(entrada['valido'])
+                self._leidas.add(url)
+            self._recordar(url, entrada)
+            return entrada
+
+    def vigente(self, entrada):
+        ttl = self.ttl_valida if entrada['valido'] else self.ttl_invalida
+        return time.time() - entrada['revisado'] < ttl
+
+    @staticmethod
+    def cabeceras_condicionales(entrada):
+        cabeceras = {}
+        if entrada and entrada.get('etag'):
+            cabeceras['If-None-Match'] = entrada['etag']
+        if entrada and entrada.get('last_modified'):
+            cabeceras['If-Modified-Since'] = entrada['last_modified']
+        return cabeceras
+
+    def guardar(self, url, entrada):
+        with self._lock:
+            self._recordar(url, entrada)
+            self._sucias[url] = entrada
+            if len(self._sucias) >= 500:
+                self.volcar()
+
+    def volcar(self):
+        """Escribe en disco las entradas nuevas o revalidadas y recorta el archivo por LRU."""
+        with self._lock:
+            if not self._sucias and not self._leidas:
+                return
+            ahora = time.time()
+            filas = [(url, int(e['valido']), e['status'], e['content_type'], e['etag'],
+                      e['last_modified'], e['revisado'], ahora) for url, e in self._sucias.items()]
+            leidas = [(ahora, url) for url in self._leidas]
+            self._sucias = {}
+            self._leidas = set()
+            try:
+                conn = self._conexion()
+                with conn:
+                    conn.executemany("UPDATE urls SET usado = ? WHERE url = ?", leidas)
+                    conn.executemany("INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+                    conn.execute(
+                        "DELETE FROM urls WHERE url IN (SELECT url FROM urls ORDER BY usado DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disco,))
+            except sqlite3.Error as e:
+                log.error("Error guardando cache de URLs: %s", e)
+
+    def clear(self):
+        """Vacía la cache en memoria (lo guardado en disco se conserva)."""
+        with self._lock:
+            self._memoria.clear()
+
+# Cache persistente para validación de URLs, en el directorio de caches del usuario
+_URL_VALIDATION_CACHE = CacheValidacionURL(directorio_cache('cache_validacion_urls.db'))
+
+
+# Sesión HTTP compartida (keep-alive y pool de conexiones)
+_SESION_HTTP = None
+_SESION_HTTP_LOCK = threading.Lock()
+
+def _sesion_http(conexiones=32):
+    """Devuelve la sesión HTTP compartida, creándola la primera vez."""
+    global _SESION_HTTP
+    with _SESION_HTTP_LOCK:
+        if _SESION_HTTP is None:
+            sesion = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones)
+            sesion.mount('http://', adaptador)
+            sesion.mount('https://', adaptador)
+            _SESION_HTTP = sesion
+        return _SESION_HTTP
+
+def _respuesta_es_imagen(response):
+    return response.status_code == 200 and 'image' in response.headers.get('content-type', '')
 
 # Función para validar URLs de imágenes en background
 def validar_url_imagen(url, timeout=5):
-    """Valida si una URL de imagen es accesible."""
-    if not url or url in _URL_VALIDATION_CACHE:
-        return _URL_VALIDATION_CACHE.get(url, False)
-    
-    try:
+    """Valida si una URL de imagen es accesible (consultando la cache persistente)."""
+    if not url:
+        return False
+    return ValidadorImagenes(concurrencia=1, reintentos=0, timeout=timeout).validar_url(url)
+
+class ValidadorImagenes:
+    """Valida en bloque URLs de imágenes con conexiones reutilizadas.
+
+    Limita las peticiones simultáneas en total (`concurrencia`) y por servidor
+    (`por_host`), y reintenta con espera exponencial los errores de conexión,
+    los timeouts y las respuestas 429/5xx. Los resultados se guardan en
+    _URL_VALIDATION_CACHE; las entradas vigentes no generan petición y las
+    caducadas se revalidan con If-None-Match/If-Modified-Since.
+    """
+
+    CODIGOS_REINTENTO = (429, 500, 502, 503, 504)
+
+    def __init__(self, concurrencia=16, por_host=4, reintentos=2, espera=0.5, timeout=5, sesion=None, cache=None):
+        self.concurrencia = concurrencia
+        self.por_host = por_host
+        self.reintentos = reintentos
+        self.espera = espera
+        self.timeout = timeout
+        self.sesion = sesion or _sesion_http(max(concurrencia, 10))
+        self.cache = cache if cache is not None else _URL_VALIDATION_CACHE
+        self._semaforos = {}
+        self._lock = threading.Lock()
+        self.cancelado = threading.Event()
+
+    def _semaforo(self, host):
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.por_host)
+            return self._semaforos[host]
+
+    def _peticion(self, url, cabeceras):
+        """HEAD y, si el servidor no lo admite, GET sin descargar el cuerpo."""
+        response = self.sesion.head(url, headers=cabeceras, timeout=self.timeout, allow_redirects=True)
+        if response.status_code in (405, 501):
+            response = self.sesion.get(url, headers=cabeceras, timeout=self.timeout,
+                                       allow_redirects=True, stream=True)
+            response.close()
+        return response
+
+    def validar_url(self, url):
+        """True si la URL responde 200 con content-type de imagen."""
         parsed = urlparse(url)
         if not parsed.scheme or not parsed.netloc:
-            _URL_VALIDATION_CACHE[url] = False
             return False
-            
-        response = requests.head(url, timeout=timeout, allow_redirects=True)
-        is_valid = response.status_code == 200 and 'image' in response.headers.get('content-type', '')
-        _URL_VALIDATION_CACHE[url] = is_valid
-        return is_valid
-    except:
-        _URL_VALIDATION_CACHE[url] = False
+        entrada = self.cache.obtener(url)
+        if entrada is not None and self.cache.vigente(entrada):
+            return entrada['valido']
+        cabeceras = self.cache.cabeceras_condicionales(entrada)
+        semaforo = self._semaforo(parsed.netloc)
+        for intento in range(self.reintentos + 1):
+            if self.cancelado.is_set():
+                return False
+            # El cupo del servidor se ocupa solo durante la petición, no durante la espera del reintento
+            try:
+                with semaforo:
+                    response = self._peticion(url, cabeceras)
+                if response.status_code == 304 and entrada is not None:
+                    # Sin cambios desde la última revisión: solo se renueva la fecha
+                    entrada = dict(entrada, revisado=time.time())
+                    self.cache.guardar(url, entrada)
+                    return entrada['valido']
+                if response.status_code not in self.CODIGOS_REINTENTO:
+                    entrada = {
+                        'valido': _respuesta_es_imagen(response),
+                        'status': response.status_code,
+                        'content_type': response.headers.get('content-type', ''),
+                        'etag': response.headers.get('etag'),
+                        'last_modified': response.headers.get('last-modified'),
+                        'revisado': time.time(),
+                    }
+                    self.cache.guardar(url, entrada)
+                    return entrada['valido']
+            except requests.RequestException:
+                pass
+            if intento < self.reintentos:
+                time.sleep(self.espera * (2 ** intento))
         return False
 
+    def validar(self, urls, progreso=None):
+        """Valida las URLs (sin repetir) y devuelve {url: bool}.
+
+        progreso(hechas, total) se llama desde el hilo que invoca validar() tras cada URL.
+        """
+        pendientes = []
+        resultados = {}
+        for url in urls:
+            url = str(url).strip()
+            if not url or url.lower() == 'nan' or url in resultados:
+                continue
+            resultados[url] = None
+            pendientes.append(url)
+        total = len(pendientes)
+        hechas = 0
+        if progreso:
+            progreso(0, total)
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrencia)) as pool:
+            futuros = {pool.submit(self.validar_url, url): url for url in pendientes}
+            for futuro in as_completed(futuros):
+                url = futuros[futuro]
+                try:
+                    valido = futuro.result()
+                except Exception:
+                    valido = False
+                resultados[url] = valido
+                hechas += 1
+                if progreso:
+                    progreso(hechas, total)
+        self.cache.volcar()
+        return resultados
+
 # Patrones regex compilados para mejor rendimiento
 _REGEX_PATTERNS = {
     'img_src_1': re.compile(r'src="[^"]*RB2398-1_resultado\.webp"'),
@@ -49,9 +343,83 @@ _REGEX_PATTERNS = {
     'product_model': re.compile(r'<p[^>]*id="product-model"[^>]*>[^<]*</p>'),
     'old_price': re.compile(r'<span class="text-2xl text-gray-400 line-through mr-2">[^<]*</span>'),
     'discount_badge': re.compile(r'<span class="inline-block bg-red-100 text-red-600 text-lg font-bold px-2 py-1 rounded align-middle mr-2">[^<]*</span>'),
-    'new_price': re.compile(r'<span class="text-5xl font-extrabold text-black">[^<]*</span>')
+    'new_price': re.compile(r'<span class="text-5xl font-extrabold text-black">[^<]*</span>'),
+    # Fila de la tabla de especificaciones: grupo 1 = etiqueta, grupo 2 = valor
+    'spec_row': re.compile(r'<tr[^>]*><td class="py-3 px-4 font-semibold text-gray-700[^"]*">([^<]+)</td><td class="py-3 px-4 text-gray-800">([^<]*)</td></tr>')
 }
 
+# Cache de plantillas de página ya compiladas (clave: contenido de la plantilla)
+_PLANTILLA_COMPILADA_CACHE = {}
+
+# Cache de planes de render de tarjetas (clave: contenido de la plantilla de tarjeta)
+_PLAN_TARJETA_CACHE = {}
+
+class CacheRender:
+    """Cache LRU acotada de HTML ya renderizado (vistas previas de tarjeta y páginas individuales).
+
+    La clave incluye el hash de la plantilla, la huella de la fila, el logo y el
+    link (clave_render), así que un cambio en cualquiera de ellos no reutiliza
+    HTML viejo. Se vacía con clear() al recargar plantillas, logos o links.
+    """
+
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            html = self._entradas.get(clave)
+            if html is not None:
+                self._entradas.move_to_end(clave)
+            return html
+
+    def guardar(self, clave, html):
+        with self._lock:
+            self._entradas[clave] = html
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+def clave_render(tipo, plantilla, registro, logo='', link=''):
+    """Clave de CacheRender: (tipo, hash de la plantilla, huella de la fila, logo, link)."""
+    campos = sorted((str(k), str(v)) for k, v in registro.items())
+    huella = hash_contenido(json.dumps(campos, ensure_ascii=False))
+    return (tipo, hash_contenido(plantilla), huella, logo, link)
+
+# HTML renderizado de vistas previas, para no recalcularlo al volver a un producto
+_RENDER_CACHE = CacheRender()
+
+# Patrones que definen los slots de la página de producto, en orden de prioridad.
+# Varios patrones pueden apuntar al mismo slot (imagen principal y miniatura).
+_SLOTS_PAGINA = [
+    ('img_src_1', 'img1'),
+    ('img_src_2', 'img2'),
+    ('img_src_3', 'img3'),
+    ('thumb_1', 'img1'),
+    ('thumb_2', 'img2'),
+    ('thumb_3', 'img3'),
+    ('image_sources', 'image_sources'),
+    ('product_brand', 'product_brand'),
+    ('product_model', 'product_model'),
+    ('old_price', 'old_price'),
+    ('discount_badge', 'discount_badge'),
+    ('new_price', 'new_price'),
+]
+
+# Etiquetas de la tabla de especificaciones en el orden de la plantilla
+_ETIQUETAS_ESPECIFICACIONES = [
+    'SKU', 'Marca', 'Tipo', 'Color', 'Forma', 'Material', 'Varillas', 'Clip',
+    'Color de Mica', 'Medida', 'Puente', 'Accesorios', 'Garantía',
+]
+
 # ---------------- FUNCIONES AUXILIARES PARA HTML ----------------
 def cargar_plantilla_html(path):
     if not os.path.exists(path):
@@ -67,186 +435,1254 @@ def cargar_plantilla_html(path):
         _PLANTILLA_CACHE[path] = contenido
         return contenido
 
+class PlantillaCompilada:
+    """Plantilla de página dividida en segmentos estáticos y slots con nombre.
+
+    Se construye una sola vez por plantilla; cada producto se renderiza
+    uniendo los segmentos con los valores de sus slots en una sola pasada.
+    """
+
+    def __init__(self, partes, slots):
+        # partes: lista de textos; en las posiciones de los slots está el texto original
+        # slots: lista de (posición en partes, nombre del slot)
+        self.partes = partes
+        self.slots = slots
+        self.nombres = {nombre for _, nombre in slots}
+
+    def render(self, valores):
+        """Devuelve el HTML con los slots reemplazados.
+
+        Los slots sin valor (ausentes o None) conservan el texto de la plantilla.
+        """
+        partes = list(self.partes)
+        for posicion, nombre in self.slots:
+            valor = valores.get(nombre)
+            if valor is not None:
+                partes[posicion] = valor
+        return ''.join(partes)
+
+def compilar_plantilla_pagina(html):
+    """Analiza la plantilla de página una vez y devuelve su PlantillaCompilada (con cache)."""
+    compilada = _PLANTILLA_COMPILADA_CACHE.get(html)
+    if compilada is not None:
+        return compilada
+
+    # Reunir los rangos de todos los slots; si dos rangos se solapan gana el
+    # patrón con mayor prioridad (mismo resultado que aplicar los .sub en orden)
+    rangos = []
+    def _agregar(inicio, fin, nombre):
+        for otro_inicio, otro_fin, _ in rangos:
+            if inicio < otro_fin and otro_inicio < fin:
+                return
+        rangos.append((inicio, fin, nombre))
+
+    for clave, nombre in _SLOTS_PAGINA:
+        for match in _REGEX_PATTERNS[clave].finditer(html):
+            _agregar(match.start(), match.end(), nombre)
+    # En la tabla de especificaciones solo el valor de la celda es variable
+    for match in _REGEX_PATTERNS['spec_row'].finditer(html):
+        _agregar(match.start(2), match.end(2), 'espec:' + match.group(1).strip())
+
+    rangos.sort()
+    partes = []
+    slots = []
+    posicion = 0
+    for inicio, fin, nombre in rangos:
+        partes.append(html[posicion:inicio])
+        slots.append((len(partes), nombre))
+        partes.append(html[inicio:fin])
+        posicion = fin
+    partes.append(html[posicion:])
+
+    compilada = PlantillaCompilada(partes, slots)
+    _PLANTILLA_COMPILADA_CACHE[html] = compilada
+    return compilada
+
+def _valores_slots_pagina(img1, img2, img3, marca, modelo, precios, especificaciones):
+    """Construye el dict de valores de slots para PlantillaCompilada.render.
+
+    precios es una tupla (precio_tachado, badge, precio_actual) o None para
+    conservar los precios de la plantilla; precio_tachado/badge en None ocultan el elemento.
+    """
+    valores = {
+        'img1': f'src="{img1}"',
+        'img2': f'src="{img2}"',
+        'img3': f'src="{img3}"',
+        'image_sources': f'const imageSources = ["{img1}", "{img2}", "{img3}"];',
+        'product_brand': f'<h1 id="product-brand" class="text-4xl md:text-5xl font-bold text-orange-500 uppercase">{marca}</h1>',
+        'product_model': f'<p id="product-model" class="text-xl text-gray-400 mb-4">{modelo}</p>',
+    }
+    if precios is not None:
+        precio_tachado, badge, precio_actual = precios
+        valores['old_price'] = f'<span class="text-2xl text-gray-400 line-through mr-2">{precio_tachado}</span>' if precio_tachado is not None else ''
+        valores['discount_badge'] = f'<span class="inline-block bg-red-100 text-red-600 text-lg font-bold px-2 py-1 rounded align-middle mr-2">{badge}</span>' if badge is not None else ''
+        valores['new_price'] = f'<span class="text-5xl font-extrabold text-black">{precio_actual}</span>'
+    for etiqueta, valor in especificaciones.items():
+        valores['espec:' + etiqueta] = str(valor)
+    return valores
+
+# Caracteres que no cuentan al comparar marcas ("Ray-Ban", "ray ban", "Levi's")
+_TABLA_MARCA = str.maketrans('', '', " -_.'&")
+
+def normalizar_marca(marca):
+    """Clave de una marca: minúsculas, sin acentos ni espacios, guiones o puntuación."""
+    texto = unicodedata.normalize('NFKD', str(marca).strip().lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c)).translate(_TABLA_MARCA)
+
+class ResolutorMarcas:
+    """Logo de cada marca a partir de las claves normalizadas del archivo de logos.
+
+    Se construye una vez al cargar los logos. Una marca que no coincide exactamente
+    se asocia a la clave más parecida (difflib) si la similitud llega a `umbral`
+    ("harley davidson" -> "harleydevidson"). Cada marca resuelta se guarda, así
+    que en un lote cada tarjeta cuesta una búsqueda en un dict; precalcular()
+    resuelve de antemano todas las marcas del inventario.
+    """
+
+    def __init__(self, logos=None, umbral=0.85):
+        self.umbral = umbral
+        self._logos = {}      # clave normalizada -> url del logo
+        self._resueltas = {}  # marca tal como viene en los datos -> url ('' si no hay)
+        if logos:
+            self.update(logos)
+
+    def update(self, logos):
+        """Añade logos ({marca: url}); las claves se vuelven a normalizar por si vienen de otra fuente."""
+        for marca, url in logos.items():
+            clave = normalizar_marca(marca)
+            if clave and url:
+                self._logos[clave] = url
+        self._resueltas.clear()
+
+    def resolver(self, marca):
+        try:
+            return self._resueltas[marca]
+        except KeyError:
+            pass
+        clave = normalizar_marca(marca) if marca else ''
+        logo = self._logos.get(clave, '')
+        if clave and not logo:
+            parecidas = difflib.get_close_matches(clave, self._logos, n=1, cutoff=self.umbral)
+            if parecidas:
+                logo = self._logos[parecidas[0]]
+                log.info("Marca %r asociada al logo de %r por similitud", marca, parecidas[0])
+            else:
+                log.debug("No se encontró logo para la marca: %r", clave)
+        self._resueltas[marca] = logo
+        return logo
+
+    def precalcular(self, marcas):
+        """Resuelve todas las marcas dadas y devuelve {marca: url}."""
+        return {marca: self.resolver(marca) for marca in set(marcas)}
+
+    def __len__(self):
+        return len(self._logos)
+
 def buscar_logo_marca(marca, logos_dict):
-    # Normaliza la marca quitando espacios, minúsculas y caracteres especiales
-    # Optimización: usar translate para mejor rendimiento
+    """Logo de la marca o ''; logos_dict es el ResolutorMarcas de los logos cargados.
+    
+    No acepta un dict: construir el resolutor en cada llamada normalizaría todo el
+    archivo de logos por producto. Se crea una vez con ResolutorMarcas(logos).
+    """
+    if not isinstance(logos_dict, ResolutorMarcas):
+        raise TypeError("buscar_logo_marca necesita un ResolutorMarcas, no un dict de logos")
     if not marca:
         return ''
+    return logos_dict.resolver(marca)
+
+def leer_archivo_logos(path):
+    """Lee un archivo de logos y devuelve {marca_normalizada: url_logo}.
+
+    Acepta CSV (marca, logo) o texto con una marca por línea separada por ':', '=', ',' o espacios.
+    """
+    logos = {}
+
+    if path.endswith('.csv'):
+        df = pd.read_csv(path)
+        for _, row in df.iterrows():
+            marca = normalizar_marca(row.iloc[0])
+            logo = str(row.iloc[1]).strip()
+            logos[marca] = logo
+        return logos
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                if ':' in line:
+                    marca, logo = line.split(':', 1)
+                elif '=' in line:
+                    marca, logo = line.split('=', 1)
+                elif ',' in line:
+                    marca, logo = line.split(',', 1)
+                else:
+                    marca, logo = line.split(None, 1)
+            except ValueError:
+                continue
+            # Misma normalización que ResolutorMarcas
+            marca_normalizada = normalizar_marca(marca)
+            if marca_normalizada and logo.strip():
+                logos[marca_normalizada] = logo.strip()
+    return logos
+
+def leer_archivo_links(path):
+    """Lee el archivo de links de redirección (SKU:url o SKU=url) y devuelve {sku: url}."""
+    links = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea or (':' not in linea and '=' not in linea):
+                continue
+            # Manejar tanto ':' como '=' como separadores
+            if ':' in linea:
+                sku, url = linea.split(':', 1)
+            else:
+                sku, url = linea.split('=', 1)
+            sku = sku.strip()
+            url = url.strip()
+
+            # Remover prefijo 'Producto-' si existe
+            if sku.startswith('Producto-'):
+                sku = sku[9:]
+
+            if sku and url:
+                links[sku] = url
+    return links
+
+# Columnas de precio que se interpretan al armar producto_data: columna CSV -> campo numérico
+COLUMNAS_PRECIO = {
+    'Precio normal': 'precio_normal_num',
+    'precio con descuento': 'precio_descuento_num',
+    'Porcentajede descuento': 'porcentaje_descuento_num',
+}
+
+# Cache del inventario ya limpio en Feather (Arrow IPC sin compresión, se puede mapear en memoria)
+# dentro del directorio de caches del usuario (ver directorio_cache)
+DIRECTORIO_CACHE_INVENTARIO = 'inventario'
+# Forma parte del nombre del archivo: subirla al cambiar la lectura o la limpieza del inventario
+# invalida las caches escritas por versiones anteriores
+VERSION_CACHE_INVENTARIO = 2
+
+def _ruta_cache_inventario(path, directorio):
+    """(ruta del archivo de cache, prefijo) según versión, ruta absoluta, mtime y tamaño del original."""
+    estado = os.stat(path)
+    prefijo = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    nombre = f'{prefijo}-v{VERSION_CACHE_INVENTARIO}-{estado.st_mtime_ns}-{estado.st_size}.feather'
+    return os.path.join(directorio, nombre), prefijo
+
+def leer_cache_inventario(path, directorio=None):
+    """Tabla Arrow en cache del inventario, mapeada en memoria; None si no hay una vigente."""
+    if feather is None:
+        return None
+    directorio = directorio or directorio_cache(DIRECTORIO_CACHE_INVENTARIO)
+    ruta, _ = _ruta_cache_inventario(path, directorio)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return feather.read_table(ruta, memory_map=True)
+    except Exception as e:
+        log.warning("Cache de inventario ilegible %s: %s", ruta, e)
+        return None
+
+def guardar_cache_inventario(path, df, directorio=None):
+    """Guarda el inventario limpio y elimina las versiones anteriores del mismo archivo."""
+    if feather is None:
+        return
+    directorio = directorio or directorio_cache(DIRECTORIO_CACHE_INVENTARIO)
+    try:
+        ruta, prefijo = _ruta_cache_inventario(path, directorio)
+        os.makedirs(directorio, exist_ok=True)
+        temporal = ruta + '.tmp'
+        feather.write_feather(df.reset_index(drop=True), temporal, compression='uncompressed')
+        os.replace(temporal, ruta)
+        for nombre in os.listdir(directorio):
+            anterior = os.path.join(directorio, nombre)
+            if nombre.startswith(prefijo + '-') and anterior != ruta:
+                os.remove(anterior)
+    except Exception as e:
+        log.warning("No se pudo guardar la cache de inventario: %s", e)
+
+def leer_inventario(path):
+    """Lee el CSV/XLSX de productos como texto: sin filas vacías y con '' en las celdas faltantes.
     
-    # Tabla de traducción para eliminar caracteres especiales de una vez
-    trans_table = str.maketrans('', '', ' -_')
-    clave = str(marca).strip().lower().translate(trans_table)
+    Usa la misma lectura por bloques que la interfaz, así la cache que escriben
+    la interfaz y la línea de comandos es la misma.
+    """
+    tabla = leer_cache_inventario(path)
+    if tabla is not None:
+        return tabla.to_pandas()
+    bloques = list(leer_inventario_por_bloques(path))
+    if not bloques:
+        return pd.DataFrame()
+    return pd.concat(bloques, ignore_index=True)
+
+def _texto_celda_excel(valor):
+    """Valor de una celda de openpyxl como texto, igual que read_excel(dtype=str)."""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def _bloques_excel(path, tam_bloque):
+    """Recorre la primera hoja del XLSX en modo de solo lectura, tam_bloque filas a la vez."""
+    libro = load_workbook(path, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        columnas = [str(c) if c is not None else f'Unnamed: {i}' for i, c in enumerate(encabezado)]
+        bloque = []
+        for fila in filas:
+            bloque.append([_texto_celda_excel(v) for v in fila[:len(columnas)]])
+            if len(bloque) >= tam_bloque:
+                yield pd.DataFrame(bloque, columns=columnas)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas)
+    finally:
+        libro.close()
+
+def contar_filas_inventario(path):
+    """Número de filas de datos para la barra de progreso; None en XLSX sin cache.
     
-    print(f"[DEBUG] Buscando logo para marca: '{clave}' en {logos_dict}")
-    logo = logos_dict.get(clave, '')
-    if not logo:
-        print(f"[DEBUG] No se encontró logo para la marca: '{clave}'")
-    return logo
+    En XLSX la dimensión de la hoja incluye filas vacías con formato, así que no es fiable.
+    """
+    tabla = leer_cache_inventario(path)
+    if tabla is not None:
+        return tabla.num_rows
+    if path.endswith('.xlsx'):
+        return None
+    lineas = 0
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            lineas += bloque.count(b'\n')
+    return max(0, lineas - 1)
 
-def generar_tarjeta_catalogo(row, imagenes, logo_marca, link_producto, old_price, new_price, descuento, plantilla_tarjeta):
-    # Usa la plantilla de tarjeta del catálogo (de Armazones-Tienda.html)
-    # Reemplaza los campos clave de manera más precisa
-    html = plantilla_tarjeta
+def leer_inventario_por_bloques(path, tam_bloque=2000):
+    """Lee el inventario por bloques de hasta tam_bloque filas: todo como texto, sin filas vacías y con ''.
+    
+    Si hay cache vigente los bloques salen de ella; si no, al terminar la lectura
+    completa se guarda para la próxima vez.
+    """
+    tabla = leer_cache_inventario(path)
+    if tabla is not None:
+        for lote in tabla.to_batches(max_chunksize=tam_bloque):
+            yield lote.to_pandas()
+        return
+    
+    # Todas las columnas como texto: sin inferencia de tipos (Inventario '1' no se vuelve '1.0')
+    if path.endswith('.xlsx'):
+        bloques = _bloques_excel(path, tam_bloque)
+    else:
+        bloques = pd.read_csv(path, dtype=str, chunksize=tam_bloque)
+    leidos = []
+    for bloque in bloques:
+        bloque = bloque.dropna(how='all')
+        if len(bloque):
+            bloque = bloque.reset_index(drop=True).fillna('')
+            if feather is not None:
+                leidos.append(bloque)
+            yield bloque
+    if leidos:
+        guardar_cache_inventario(path, pd.concat(leidos, ignore_index=True))
+
+def _numero_precio(texto):
+    """'$4,500.00' -> 4500.0, '15%' -> 15.0; None si el texto no es un número."""
+    try:
+        return float(re.sub(r'[\s$,%]', '', str(texto)))
+    except ValueError:
+        return None
+
+def producto_data_desde_registro(registro):
+    """Convierte un registro {columna CSV: valor} al dict producto_data de la generación masiva.
+    
+    Los precios numéricos (*_num) salen del texto de la propia fila, así dos filas
+    con el mismo SKU y distinto precio no comparten valores.
+    """
+    def valor(columna):
+        return registro.get(columna, '')
+
+    producto_data = {
+        'tipo': valor('Etiquetas'),
+        'sku': valor('SKU'),
+        'nombre': valor('SKU'),  # SKU como nombre
+        'precio_normal': valor('Precio normal'),
+        'porcentaje_descuento': valor('Porcentajede descuento'),
+        'precio_descuento': valor('precio con descuento'),
+        'marca': valor('Valor(es) del atributo 2'),  # Marca
+        'descripcion': valor('Tipo'),  # Tipo como descripción
+        'imagen1': valor('IMAGEN 1'),
+        'imagen2': valor('IMAGEN 2'),
+        'imagen3': valor('IMAGEN 3'),
+        'logo': '',
+        # Información adicional para la tabla
+        'color': valor('Valor(es) del atributo 4'),  # Color
+        'forma': valor('Valor(es) del atributo 5'),  # Forma
+        'material': valor('Valor(es) del atributo 6'),  # Material
+        'varillas': valor('Valor(es) del atributo 7'),  # Varillas
+        'clip': valor('Valor(es) del atributo 8'),  # Clip
+        'color_mica': valor('Valor(es) del atributo 9'),  # Color de Mica
+        'medida': valor('Valor(es) del atributo 10'),  # Medida
+        'puente': valor('Valor(es) del atributo 11'),  # Puente
+        'accesorios': valor('Valor(es) del atributo 12'),  # Accesorios
+        'garantia': valor('Valor(es) del atributo 13')  # Garantía
+    }
+    for columna, campo in COLUMNAS_PRECIO.items():
+        producto_data[campo] = _numero_precio(valor(columna)) if valor(columna) else None
+    return producto_data
+
+# Patrones de la plantilla de tarjeta; solo se usan al compilarla (compilar_plantilla_tarjeta)
+_REGEX_TARJETA = {
+    'comentario': re.compile(r'<!-- Tarjeta de Producto: [^>]+-->'),
+    'img_1': re.compile(r'src="[^"]+" alt="[^"]+ - Vista 1" class="product-img active"'),
+    'img_2': re.compile(r'src="[^"]+" alt="[^"]+ - Vista 2" class="product-img"'),
+    'img_3': re.compile(r'src="[^"]+" alt="[^"]+ - Vista 3" class="product-img"'),
+    'logo': re.compile(r'<div class="product-brand-overlay"><img src="[^"]+" alt="[^"]+"></div>'),
+    'badge': re.compile(r'<div class="discount-badge">[^<]*</div>'),
+    'onclick': re.compile(r'onclick="window.open\([^)]+\)"'),
+    'info': re.compile(r'<span class="product-brand">[^<]+</span>\s*<h2 class="product-name">[^<]+</h2>'),
+    'brand': re.compile(r'<span class="product-brand">[^<]+</span>'),
+    'name': re.compile(r'<h2 class="product-name">[^<]+</h2>'),
+    'old_price': re.compile(r'<span class="old-price">[^<]*</span>'),
+    'new_price': re.compile(r'<span class="new-price">[^<]*</span>'),
+}
+
+def _es_valido(valor):
+    if valor is None:
+        return False
+    valor_str = str(valor).strip().lower()
+    return bool(valor_str and valor_str not in ['nan', 'none', ''])
+
+def _aplicar_plantilla_tarjeta(row, imagenes, logo_marca, link_producto, old_price, new_price, descuento, plantilla_tarjeta):
+    """Reemplaza los campos de la plantilla de tarjeta con expresiones regulares.
     
-    # Reemplazar imágenes de manera más específica
-    # Buscar solo dentro del contexto de la tarjeta actual
+    Solo se ejecuta al compilar la plantilla, con valores centinela, una vez por variante de precio.
+    """
+    html = plantilla_tarjeta
+    R = _REGEX_TARJETA
     sku = row.get('Valor(es) del atributo 1', '')
     marca = row.get('Valor(es) del atributo 2', '')
     
-    # Reemplazar imágenes principales con patrones más específicos
-    html = re.sub(r'src="[^"]+" alt="[^"]+ - Vista 1" class="product-img active"', 
-                  f'src="{imagenes[0]}" alt="{sku} - {marca} - Vista 1" class="product-img active"', html)
-    html = re.sub(r'src="[^"]+" alt="[^"]+ - Vista 2" class="product-img"', 
-                  f'src="{imagenes[1]}" alt="{sku} - {marca} - Vista 2" class="product-img"', html)
-    html = re.sub(r'src="[^"]+" alt="[^"]+ - Vista 3" class="product-img"', 
-                  f'src="{imagenes[2]}" alt="{sku} - {marca} - Vista 3" class="product-img"', html)
-    
-    # Reemplazar logo de marca
-    html = re.sub(r'<div class="product-brand-overlay"><img src="[^"]+" alt="[^"]+"></div>', 
-                  f'<div class="product-brand-overlay"><img src="{logo_marca}" alt="Logo {marca}"></div>', html)
-    
-    # Reemplazar badge de descuento de manera más segura
-    def es_valido(valor):
-        if valor is None:
-            return False
-        valor_str = str(valor).strip().lower()
-        return bool(valor_str and valor_str not in ['nan', 'none', ''])
+    # Los reemplazos van como función para que el texto se inserte literal
+    def sub(clave, texto, html):
+        return R[clave].sub(lambda m: texto, html)
+    
+    # Comentario identificador: el índice del catálogo lo usa para ubicar la tarjeta por SKU
+    html = R['comentario'].sub(lambda m: f'<!-- Tarjeta de Producto: {sku} -->', html, count=1)
     
-    if es_valido(descuento):
-        html = re.sub(r'<div class="discount-badge">[^<]*</div>', 
-                      f'<div class="discount-badge">{descuento} de descuento</div>', html)
-    # Si no hay descuento, ocultar completamente el div
+    # Imágenes principales
+    html = sub('img_1', f'src="{imagenes[0]}" alt="{sku} - {marca} - Vista 1" class="product-img active"', html)
+    html = sub('img_2', f'src="{imagenes[1]}" alt="{sku} - {marca} - Vista 2" class="product-img"', html)
+    html = sub('img_3', f'src="{imagenes[2]}" alt="{sku} - {marca} - Vista 3" class="product-img"', html)
+    
+    # Logo de marca
+    html = sub('logo', f'<div class="product-brand-overlay"><img src="{logo_marca}" alt="Logo {marca}"></div>', html)
+    
+    # Badge de descuento; sin descuento se quita el div completo
+    if _es_valido(descuento):
+        html = sub('badge', f'<div class="discount-badge">{descuento} de descuento</div>', html)
     else:
-        html = re.sub(r'<div class="discount-badge">[^<]*</div>', 
-                      '', html)
+        html = sub('badge', '', html)
     
-    # Reemplazar link de redirección
-    html = re.sub(r'onclick="window.open\([^)]+\)"', 
-                  f'onclick="window.open(\'{link_producto}\',\'_blank\')"', html)
+    # Link de redirección
+    html = sub('onclick', f'onclick="window.open(\'{link_producto}\',\'_blank\')"', html)
     
-    # Reemplazar información del producto de manera más específica
+    # Información del producto: bloque completo si está, si no cada elemento por separado
     marca_upper = marca.upper()
     bloque_info = (
         f'<span class="product-brand text-blue-600 uppercase">{marca_upper}</span>\n'
         f'<h2 class="product-name font-bold">{sku}</h2>'
     )
-    
-    # Buscar y reemplazar el bloque de información de manera más precisa
-    # Primero intentar con el patrón completo
-    patron_completo = r'<span class="product-brand">[^<]+</span>\s*<h2 class="product-name">[^<]+</h2>'
-    if re.search(patron_completo, html):
-        html = re.sub(patron_completo, bloque_info, html)
+    if R['info'].search(html):
+        html = sub('info', bloque_info, html)
     else:
-        # Si no encuentra el patrón completo, reemplazar por separado
-        html = re.sub(r'<span class="product-brand">[^<]+</span>', 
-                      f'<span class="product-brand text-blue-600 uppercase">{marca_upper}</span>', html)
-        html = re.sub(r'<h2 class="product-name">[^<]+</h2>', 
-                      f'<h2 class="product-name font-bold">{sku}</h2>', html)
-    
-    # Reemplazar precios de manera más específica
-    if es_valido(descuento) and es_valido(new_price):
+        html = sub('brand', f'<span class="product-brand text-blue-600 uppercase">{marca_upper}</span>', html)
+        html = sub('name', f'<h2 class="product-name font-bold">{sku}</h2>', html)
+    
+    # Precios
+    if _es_valido(descuento) and _es_valido(new_price):
         # Caso con descuento
-        html = re.sub(r'<span class="old-price">[^<]*</span>',
-                    f'<span class="old-price">{old_price}</span>', html)
-        html = re.sub(r'<span class="new-price">[^<]*</span>',
-                    f'<span class="new-price">{new_price}</span>', html)
+        html = sub('old_price', f'<span class="old-price">{old_price}</span>', html)
+        html = sub('new_price', f'<span class="new-price">{new_price}</span>', html)
     else:
         # Caso sin descuento: usar solo el precio normal y quitar tachado
-        html = re.sub(r'<span class="old-price">[^<]*</span>',
-                    '', html)  # Eliminamos precio tachado
-        html = re.sub(r'<span class="new-price">[^<]*</span>',
-                    f'<span class="new-price">{old_price}</span>', html)
+        html = sub('old_price', '', html)
+        html = sub('new_price', f'<span class="new-price">{old_price}</span>', html)
     
     return html
 
+def generar_tarjeta_catalogo(row, imagenes, logo_marca, link_producto, old_price, new_price, descuento, plantilla_tarjeta):
+    """Tarjeta de catálogo a partir de la plantilla (de plantilla_tarjeta.html o del catálogo).
+    
+    La plantilla se compila una sola vez (compilar_plantilla_tarjeta); aquí solo se
+    elige la variante de precio y se unen segmentos y valores, sin expresiones regulares.
+    """
+    if not plantilla_tarjeta:
+        return ''
+    if _es_valido(descuento):
+        variante = 'descuento' if _es_valido(new_price) else 'solo_badge'
+    else:
+        variante = 'sin_descuento'
+    marca = row.get('Valor(es) del atributo 2', '')
+    valores = {
+        'sku': row.get('Valor(es) del atributo 1', ''), 'marca': marca, 'MARCA': marca.upper(),
+        'logo': logo_marca, 'link': link_producto,
+        'img1': imagenes[0], 'img2': imagenes[1], 'img3': imagenes[2],
+        'old_price': old_price, 'new_price': new_price, 'descuento': descuento,
+    }
+    return compilar_plantilla_tarjeta(plantilla_tarjeta)[variante].render(valores)
+
+# Plantilla de tarjeta cuando no se carga ninguna (placeholders de str.format)
+PLANTILLA_TARJETA_PREDETERMINADA = (
+    '<!-- Tarjeta de Producto: {SKU} -->\n'
+    '<div class="product-card" onclick="window.open(\'{LINK}\',\'_blank\')">\n'
+    '  <div class="product-image-container multi-image-hover">\n'
+    '    <div class="product-brand-overlay"><img src="{LOGO}" alt="Logo {MARCA}"></div>\n'
+    '    <img src="{IMG1}" alt="{SKU} - {MARCA} - Vista 1" class="product-img active">\n'
+    '    <img src="{IMG2}" alt="{SKU} - {MARCA} - Vista 2" class="product-img">\n'
+    '    <img src="{IMG3}" alt="{SKU} - {MARCA} - Vista 3" class="product-img">\n'
+    '  </div>\n'
+    '  <div class="product-info">\n'
+    '    <span class="product-brand">{MARCA}</span>\n'
+    '    <h2 class="product-name">{SKU}</h2>\n'
+    '    <p class="product-price">\n'
+    '      <span class="old-price">{OLD_PRICE}</span>\n'
+    '      <span class="new-price">{NEW_PRICE}</span>\n'
+    '    </p>\n'
+    '  </div>\n'
+    '</div>'
+)
+
+def _sentinela(nombre):
+    return f'\x00{nombre}\x00'
+
+def _dividir_por_sentinelas(html):
+    """PlantillaCompilada a partir de un HTML renderizado con valores centinela."""
+    partes = []
+    slots = []
+    for i, pieza in enumerate(html.split('\x00')):
+        if i % 2:
+            slots.append((len(partes), pieza))
+            partes.append('')
+        else:
+            partes.append(pieza)
+    return PlantillaCompilada(partes, slots)
+
+def compilar_plantilla_tarjeta(plantilla_tarjeta):
+    """Plan de render de una plantilla de tarjeta: {variante: PlantillaCompilada} (con cache).
+    
+    La plantilla se procesa una vez por variante de precio con valores centinela
+    y se divide en segmentos; cada tarjeta se arma uniendo segmentos y valores.
+    Sin plantilla se usa PLANTILLA_TARJETA_PREDETERMINADA (variante 'predeterminada').
+    """
+    plan = _PLAN_TARJETA_CACHE.get(plantilla_tarjeta)
+    if plan is not None:
+        return plan
+    
+    s = _sentinela
+    plantilla = (plantilla_tarjeta or '').replace('\x00', '')
+    plan = {}
+    if not plantilla.strip():
+        html = PLANTILLA_TARJETA_PREDETERMINADA.format(
+            SKU=s('sku'), MARCA=s('marca'), LOGO=s('logo'), IMG1=s('img1'), IMG2=s('img2'), IMG3=s('img3'),
+            OLD_PRICE=s('old_price'), NEW_PRICE=s('new_price'), LINK=s('link'))
+        plan['predeterminada'] = _dividir_por_sentinelas(html)
+    else:
+        # La marca centinela va en minúsculas para distinguir el slot en mayúsculas ('MARCA')
+        fila = {'Valor(es) del atributo 1': s('sku'), 'Valor(es) del atributo 2': s('marca')}
+        imagenes = [s('img1'), s('img2'), s('img3')]
+        variantes = (('descuento', s('new_price'), s('descuento')),
+                     ('solo_badge', '', s('descuento')),
+                     ('sin_descuento', '', ''))
+        for variante, new_price, descuento in variantes:
+            html = _aplicar_plantilla_tarjeta(fila, imagenes, s('logo'), s('link'), s('old_price'),
+                                              new_price, descuento, plantilla)
+            plan[variante] = _dividir_por_sentinelas(html)
+    _PLAN_TARJETA_CACHE[plantilla_tarjeta] = plan
+    return plan
+
+def _es_valido_serie(serie):
+    """Versión por columna de _es_valido: ni vacío, ni 'nan', ni 'none'."""
+    return ~serie.astype(str).str.strip().str.lower().isin(['', 'nan', 'none'])
+
+def generar_tarjetas_lote(df, plantilla_tarjeta, logos_dict, links_redireccion, medicion=None):
+    """Genera las tarjetas de todas las filas del DataFrame; devuelve [(sku, html | None)] en orden.
+    
+    Logo, link, orden de imágenes y precios se calculan por columna para todo el
+    lote; cada tarjeta se arma con el plan precompilado de la plantilla. Con
+    `medicion` (MedicionLote) se registra la latencia de cada tarjeta.
+    """
+    def columna(nombre):
+        if nombre in df.columns:
+            return df[nombre].fillna('').astype(str)
+        return pd.Series([''] * len(df), index=df.index, dtype=object)
+    
+    skus = columna('Valor(es) del atributo 1')
+    marcas = columna('Valor(es) del atributo 2')
+    precio_normal = columna('Precio normal')
+    precio_descuento = columna('precio con descuento')
+    porcentaje = columna('Porcentajede descuento')
+    
+    # Logo una vez por marca distinta; link por SKU con el ancla del producto como respaldo
+    resolutor = logos_dict if isinstance(logos_dict, ResolutorMarcas) else ResolutorMarcas(logos_dict)
+    logos = resolutor.precalcular(marcas.unique())
+    col_logo = marcas.map(logos)
+    col_link = skus.map(links_redireccion).fillna('#producto-' + skus)
+    imagenes = [reordenar_imagenes_para_tarjeta(list(trio))
+                for trio in zip(columna('IMAGEN 1'), columna('IMAGEN 2'), columna('IMAGEN 3'))]
+    
+    plan = compilar_plantilla_tarjeta(plantilla_tarjeta)
+    if 'predeterminada' in plan:
+        # Con descuento se muestra el precio tachado; sin descuento solo el precio normal
+        tiene_descuento = _es_valido_serie(precio_descuento) & _es_valido_serie(porcentaje)
+        col_old = precio_normal.where(tiene_descuento, '')
+        col_new = precio_descuento.where(tiene_descuento, precio_normal)
+        col_variante = pd.Series('predeterminada', index=df.index)
+    else:
+        descuento_valido = _es_valido_serie(porcentaje)
+        col_old = precio_normal
+        col_new = precio_descuento
+        col_variante = pd.Series('sin_descuento', index=df.index)
+        col_variante[descuento_valido] = 'solo_badge'
+        col_variante[descuento_valido & _es_valido_serie(precio_descuento)] = 'descuento'
+    
+    resultado = []
+    filas = zip(skus, marcas, col_logo, col_link, imagenes, col_old, col_new, porcentaje, col_variante)
+    for sku, marca, logo, link, imgs, old_price, new_price, descuento, variante in filas:
+        inicio = time.perf_counter()
+        try:
+            valores = {
+                'sku': sku, 'marca': marca, 'MARCA': marca.upper(), 'logo': logo, 'link': link,
+                'img1': imgs[0], 'img2': imgs[1], 'img3': imgs[2],
+                'old_price': old_price, 'new_price': new_price, 'descuento': descuento,
+            }
+            resultado.append((sku, plan[variante].render(valores)))
+        except Exception as e:
+            log.error("Error generando tarjeta para %s: %s", sku or 'SKU desconocido', e)
+            resultado.append((sku, None))
+        if medicion is not None:
+            medicion.producto(time.perf_counter() - inicio)
+    return resultado
+
+def ruta_plantilla_pagina(plantilla_path):
+    """Plantilla seleccionada o, si no existe, la predeterminada junto al programa."""
+    if plantilla_path and os.path.exists(plantilla_path):
+        return plantilla_path
+    return os.path.join(DIRECTORIO_PROGRAMA, 'pagina_producto_VLE41684.html')
+
 def generar_pagina_individual_desde_plantilla(row, imagenes, plantilla_path):
     # Cargar la plantilla seleccionada o la predeterminada
-    if plantilla_path and os.path.exists(plantilla_path):
-        path = plantilla_path
-    else:
-        path = os.path.join(os.path.dirname(__file__), 'pagina_producto_VLE41684.html')
-    html = cargar_plantilla_html(path)
+    html = cargar_plantilla_html(ruta_plantilla_pagina(plantilla_path))
     if html is None:
         return None
 
-    # --- Reemplazo de imágenes principales y thumbnails (6 veces: 3 en <img>, 3 en JS) ---
+    # La plantilla se compila una sola vez en segmentos y slots; cada página
+    # se genera en una sola pasada en lugar de un re.sub por campo
+    plantilla = compilar_plantilla_pagina(html)
+
+    # --- Imágenes principales, miniaturas y array imageSources del JS ---
     # Si no hay imagen, dejar src=""
     img1 = row.get('IMAGEN 1', '') or ''
     img2 = row.get('IMAGEN 2', '') or ''
     img3 = row.get('IMAGEN 3', '') or ''
-    
-    # Usar patrones regex compilados para mejor rendimiento
-    html = _REGEX_PATTERNS['img_src_1'].sub(f'src="{img1}"', html)
-    html = _REGEX_PATTERNS['img_src_2'].sub(f'src="{img2}"', html)
-    html = _REGEX_PATTERNS['img_src_3'].sub(f'src="{img3}"', html)
-    
-    # Reemplazo en miniaturas (puede haber más de una aparición por imagen)
-    html = _REGEX_PATTERNS['thumb_1'].sub(f'src="{img1}"', html)
-    html = _REGEX_PATTERNS['thumb_2'].sub(f'src="{img2}"', html)
-    html = _REGEX_PATTERNS['thumb_3'].sub(f'src="{img3}"', html)
-    
-    # Reemplazo en el script JS (array imageSources, siempre 3, solo links del CSV/campos, o vacío)
-    img1_js = f'"{img1}"'
-    img2_js = f'"{img2}"'
-    img3_js = f'"{img3}"'
-    html = _REGEX_PATTERNS['image_sources'].sub(f'const imageSources = [{img1_js}, {img2_js}, {img3_js}];', html)
 
-    # --- Reemplazo de textos principales (marca, modelo, precios, descuento) ---
-    # Usar patrones regex compilados para mejor rendimiento
-    html = _REGEX_PATTERNS['product_brand'].sub(f'<h1 id="product-brand" class="text-4xl md:text-5xl font-bold text-orange-500 uppercase">{row.get("Valor(es) del atributo 2", "")}</h1>', html)
-    html = _REGEX_PATTERNS['product_model'].sub(f'<p id="product-model" class="text-xl text-gray-400 mb-4">{row.get("Valor(es) del atributo 1", "")}</p>', html)
-    
     # Manejar precios y descuentos de manera condicional
     precio_normal = row.get("Precio normal", "")
     precio_descuento = row.get("precio con descuento", "")
     porcentaje_descuento = row.get("Porcentajede descuento", "")
     
     # Verificar si hay descuento válido (no vacío, no nan, no None)
-    def es_valido(valor):
-        if valor is None:
-            return False
-        valor_str = str(valor).strip().lower()
-        return bool(valor_str and valor_str not in ['nan', 'none', ''])
-    
-    tiene_descuento = es_valido(precio_descuento) and es_valido(porcentaje_descuento)
+    tiene_descuento = _es_valido(precio_descuento) and _es_valido(porcentaje_descuento)
     
     if tiene_descuento:
         # Mostrar precio tachado, badge de descuento y precio con descuento
-        html = _REGEX_PATTERNS['old_price'].sub(f'<span class="text-2xl text-gray-400 line-through mr-2">{precio_normal}</span>', html)
-        html = _REGEX_PATTERNS['discount_badge'].sub(f'<span class="inline-block bg-red-100 text-red-600 text-lg font-bold px-2 py-1 rounded align-middle mr-2">{porcentaje_descuento}</span>', html)
-        html = _REGEX_PATTERNS['new_price'].sub(f'<span class="text-5xl font-extrabold text-black">{precio_descuento}</span>', html)
+        precios = (precio_normal, porcentaje_descuento, precio_descuento)
     else:
-        # Solo mostrar el precio normal (sin descuento)
-        # Ocultar precio tachado y badge de descuento
-        html = _REGEX_PATTERNS['old_price'].sub('', html)
-        html = _REGEX_PATTERNS['discount_badge'].sub('', html)
-        # Mostrar solo el precio normal como precio principal
-        html = _REGEX_PATTERNS['new_price'].sub(f'<span class="text-5xl font-extrabold text-black">{precio_normal}</span>', html)
-
-    # --- Reemplazo de tabla de especificaciones ---
-    # Mapeo de campos: (ajusta si tus columnas cambian)
-    # Usar lambda functions para evitar problemas con group references
-    tabla_replacements = [
-        (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700 w-1/3">SKU</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 1", "")),
-        (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Marca</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 2", "")),
-        (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Tipo</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 3", "")),
-        (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Color</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 4", "")),
-        (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Forma</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 5", "")),
-        (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Material</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 6", "")),
-        (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Varillas</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 7", "")),
-        (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Clip</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 8", "")),
-        (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Color de Mica</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 9", "")),
-        (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Medida</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 10", "")),
-        (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Puente</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 11", "")),
-        (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Accesorios</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 12", "")),
-        (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Garantía</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', row.get("Valor(es) del atributo 13", "")),
-    ]
-    
-    for patron, valor in tabla_replacements:
-        # Use lambda function to safely replace without group reference issues
-        html = re.sub(patron, lambda m: m.group(0).replace('[^<]*', valor), html)
+        # Solo mostrar el precio normal, sin precio tachado ni badge
+        precios = (None, None, precio_normal)
 
-    return html
+    # --- Tabla de especificaciones: etiqueta -> "Valor(es) del atributo N" ---
+    especificaciones = {}
+    for numero, etiqueta in enumerate(_ETIQUETAS_ESPECIFICACIONES, 1):
+        valor = row.get(f"Valor(es) del atributo {numero}", "")
+        especificaciones[etiqueta] = str(valor) if _es_valido(valor) else ''
+
+    valores = _valores_slots_pagina(
+        img1, img2, img3,
+        row.get("Valor(es) del atributo 2", ""),
+        row.get("Valor(es) del atributo 1", ""),
+        precios,
+        especificaciones
+    )
+    return plantilla.render(valores)
+
+# ---------------- PERSISTENCIA: ALMACÉN SQLITE E HISTORIAL DE ESTADOS ----------------
+_ESQUEMA_ALMACEN = """
+CREATE TABLE IF NOT EXISTS productos (
+    posicion INTEGER PRIMARY KEY,
+    sku TEXT,
+    marca TEXT,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_productos_sku ON productos(sku);
+CREATE INDEX IF NOT EXISTS idx_productos_marca ON productos(marca);
+CREATE TABLE IF NOT EXISTS estados (sku TEXT PRIMARY KEY, estado TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_estados_estado ON estados(estado);
+CREATE TABLE IF NOT EXISTS tarjetas (sku TEXT PRIMARY KEY, html TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS links (sku TEXT PRIMARY KEY, url TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+# Máximo de parámetros por consulta IN (...) (límite de SQLite en versiones antiguas: 999)
+_TAM_CONSULTA_ALMACEN = 900
+
+class AlmacenProductos:
+    """Almacén SQLite del catálogo: productos cargados, estados, tarjetas generadas y links.
+
+    Cada producto se guarda por su posición en la última carga, así un SKU repetido
+    conserva todas sus filas; el SKU y la marca tienen índices (no únicos) y los
+    estados se indexan por SKU y estado. Una conexión compartida entre hilos,
+    protegida con un lock; la carga de productos usa una conexión propia.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.executescript(_ESQUEMA_ALMACEN)
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock:
+            return self._conn.execute(sql, parametros).fetchall()
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Productos ---
+    def cargar_productos(self, bloques, cancelado=None):
+        """Upsert por posición de una carga de CSV/Excel.
+
+        bloques es un iterable de (columnas, registros) con registros como lista de
+        dicts {columna: texto}, en el orden del archivo. Los bloques se acumulan en
+        una tabla temporal de una conexión propia, sin bloquear el almacén mientras
+        se lee el archivo, y al final se aplican en una sola transacción; las
+        posiciones que la carga no alcanza se borran. Si `cancelado` queda
+        activado no se toca el almacén. Devuelve el total cargado o None si se canceló.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("CREATE TEMP TABLE carga (posicion INTEGER PRIMARY KEY, sku TEXT, marca TEXT, datos TEXT)")
+            posicion = 0
+            columnas = []
+            for columnas, registros in bloques:
+                filas = []
+                for registro in registros:
+                    filas.append((posicion, registro.get('SKU') or None, registro.get('Valor(es) del atributo 2', ''),
+                                  json.dumps(registro, ensure_ascii=False)))
+                    posicion += 1
+                conn.executemany("INSERT INTO carga VALUES (?, ?, ?, ?)", filas)
+            if cancelado is not None and cancelado.is_set():
+                return None
+            with conn:
+                conn.execute(
+                    "INSERT INTO productos (posicion, sku, marca, datos) "
+                    "SELECT posicion, sku, marca, datos FROM carga WHERE true "
+                    "ON CONFLICT(posicion) DO UPDATE SET sku = excluded.sku, "
+                    "marca = excluded.marca, datos = excluded.datos")
+                conn.execute("DELETE FROM productos WHERE posicion >= ?", (posicion,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (clave, valor) VALUES ('columnas', ?)",
+                    (json.dumps(list(columnas), ensure_ascii=False),))
+            return posicion
+        finally:
+            conn.close()
+
+    def columnas(self):
+        """Columnas de la última carga, en el orden del archivo."""
+        filas = self._consultar("SELECT valor FROM meta WHERE clave = 'columnas'")
+        return json.loads(filas[0][0]) if filas else []
+
+    def total_productos(self):
+        return self._consultar("SELECT COUNT(*) FROM productos")[0][0]
+
+    def producto_en(self, posicion):
+        """Registro en la posición dada de la última carga, o None."""
+        filas = self._consultar("SELECT datos FROM productos WHERE posicion = ?", (posicion,))
+        return json.loads(filas[0][0]) if filas else None
+
+    def productos_en(self, posiciones):
+        """Registros de las posiciones dadas, en el mismo orden (None si no existe)."""
+        posiciones = list(posiciones)
+        encontrados = {}
+        for inicio in range(0, len(posiciones), _TAM_CONSULTA_ALMACEN):
+            parte = posiciones[inicio:inicio + _TAM_CONSULTA_ALMACEN]
+            encontrados.update(self._consultar(
+                f"SELECT posicion, datos FROM productos WHERE posicion IN ({','.join('?' * len(parte))})",
+                parte))
+        return [json.loads(encontrados[p]) if p in encontrados else None for p in posiciones]
+
+    def posiciones_sku(self, sku):
+        """Posiciones de las filas con ese SKU, en orden de carga."""
+        return [p for (p,) in self._consultar(
+            "SELECT posicion FROM productos WHERE sku = ? ORDER BY posicion", (sku,))]
+
+    def skus(self):
+        """SKU de cada fila en orden de carga ('' si la fila no tiene)."""
+        return [sku or '' for (sku,) in self._consultar("SELECT sku FROM productos ORDER BY posicion")]
+
+    def marcas(self):
+        """Marcas distintas del inventario cargado, tal como vienen en el archivo."""
+        return [marca for (marca,) in self._consultar(
+            "SELECT DISTINCT marca FROM productos WHERE marca <> ''")]
+
+    # --- Estados ---
+    def estados(self):
+        return dict(self._consultar("SELECT sku, estado FROM estados"))
+
+    def guardar_estados(self, estados):
+        """Reemplaza el historial de estados en una sola transacción."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM estados")
+            self._conn.executemany(
+                "INSERT INTO estados (sku, estado) VALUES (?, ?)", list(estados.items()))
+
+    def actualizar_estados(self, cambios):
+        """Aplica {sku: estado | None} en una sola transacción; None borra el estado del SKU."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO estados (sku, estado) VALUES (?, ?) "
+                "ON CONFLICT(sku) DO UPDATE SET estado = excluded.estado",
+                [(sku, estado) for sku, estado in cambios.items() if estado is not None])
+            self._conn.executemany(
+                "DELETE FROM estados WHERE sku = ?",
+                [(sku,) for sku, estado in cambios.items() if estado is None])
+
+    def importar_historial_json(self, path):
+        """Migra un historial_estado_productos.json previo y lo renombra a .migrado."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                estados = json.load(f)
+            if isinstance(estados, dict) and not self._consultar("SELECT 1 FROM estados LIMIT 1"):
+                self.guardar_estados(estados)
+            os.replace(path, path + '.migrado')
+        except Exception as e:
+            log.warning("No se pudo migrar el historial %s: %s", path, e)
+
+    # --- Tarjetas generadas ---
+    def guardar_tarjetas(self, tarjetas):
+        """Guarda {sku: html} de las tarjetas generadas."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tarjetas (sku, html) VALUES (?, ?)", list(tarjetas.items()))
+
+    def tarjetas(self):
+        """Tarjetas generadas pendientes de insertar, en orden de generación: {sku: html}."""
+        return dict(self._consultar("SELECT sku, html FROM tarjetas ORDER BY rowid"))
+
+    def total_tarjetas(self):
+        return self._consultar("SELECT COUNT(*) FROM tarjetas")[0][0]
+
+    def limpiar_tarjetas(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tarjetas")
+
+    # --- Links de redirección ---
+    def guardar_links(self, links):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO links (sku, url) VALUES (?, ?)", list(links.items()))
+
+    def links(self):
+        return dict(self._consultar("SELECT sku, url FROM links"))
+
+class HistorialEstados:
+    """Escritura diferida del historial de estados (SKU -> estado).
+
+    Los SKU modificados se acumulan en memoria y solo esos se escriben en el
+    almacén, en una sola transacción, como máximo `intervalo` segundos después
+    del primer cambio pendiente, así que ante un cierre inesperado solo se pierde
+    esa ventana. volcar() fuerza la escritura.
+    """
+
+    def __init__(self, almacen, intervalo=2.0):
+        self.almacen = almacen
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._timer = None
+        self._pendiente = {}  # SKU -> estado pendiente de escribir (None = borrar)
+
+    def cargar(self):
+        """Lee el historial del almacén; devuelve {} si no se puede leer."""
+        try:
+            return self.almacen.estados()
+        except Exception:
+            return {}
+
+    def programar(self, estados, skus):
+        """Anota el estado actual de los SKU dados y programa la escritura si no hay una en curso."""
+        with self._lock:
+            for sku in skus:
+                self._pendiente[sku] = estados.get(sku)
+            if self._timer is None:
+                self._timer = threading.Timer(self.intervalo, self.volcar)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def volcar(self):
+        """Escribe los cambios pendientes en una sola transacción."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pendiente:
+                return
+            cambios, self._pendiente = self._pendiente, {}
+            try:
+                self.almacen.actualizar_estados(cambios)
+            except Exception as e:
+                log.error("Error guardando historial de estados: %s", e)
+
+    def descartar(self):
+        """Cancela la escritura pendiente (al reiniciar el historial)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pendiente = {}
+
+# ---------------- TABLA VIRTUAL ----------------
+class TablaVirtual:
+    """Tabla con la interfaz de ttk.Treeview que solo materializa las filas visibles.
+
+    Cada fila guarda sus columnas propias (número, casillas...) y una referencia a
+    la lista de valores compartida del modelo de productos, así las pestañas no
+    duplican los datos. Al desplazarse se reemplazan los pocos items del Treeview
+    interno; item, set, get_children, selection, etc. trabajan sobre las filas en
+    memoria y el resto (heading, column, tag_configure, identify_*, grid...) se
+    delega al Treeview interno.
+    """
+
+    def __init__(self, master, yscrollcommand=None, **opciones):
+        self._arbol = ttk.Treeview(master, **opciones)
+        self._yscrollcommand = yscrollcommand
+        self._columnas = {}
+        self._fijar_columnas(opciones.get('columns', ()))
+        self._orden = []       # iids en orden de inserción
+        self._posicion = {}    # iid -> índice en _orden
+        self._propias = {}     # iid -> valores de las columnas propias de la vista
+        self._filas = {}       # iid -> lista compartida con los valores del modelo
+        self._tags = {}
+        self._seleccion = ()
+        self._seleccion_renderizada = ()
+        self._visibles = set()
+        self._inicio = 0
+        self._capacidad = int(opciones.get('height', 10))
+        self._render_pendiente = False
+        self._contador = 0
+
+        self._arbol.bind('<Configure>', lambda e: self._recalcular_capacidad(), add='+')
+        for secuencia in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self._arbol.bind(secuencia, self._rueda, add='+')
+        if opciones.get('selectmode') != 'none':
+            self._arbol.bind('<Up>', lambda e: self._mover_foco(-1))
+            self._arbol.bind('<Down>', lambda e: self._mover_foco(1))
+            self._arbol.bind('<Prior>', lambda e: self._mover_foco(-self._capacidad))
+            self._arbol.bind('<Next>', lambda e: self._mover_foco(self._capacidad))
+
+    def __getattr__(self, nombre):
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+        return getattr(self._arbol, nombre)
+
+    def __getitem__(self, opcion):
+        if opcion == 'columns':
+            return tuple(self._columnas)
+        return self._arbol[opcion]
+
+    def __setitem__(self, opcion, valor):
+        if opcion == 'columns':
+            self._fijar_columnas(valor)
+        elif opcion == 'yscrollcommand':
+            # El desplazamiento vertical lo calcula la tabla, no el Treeview interno
+            self._yscrollcommand = valor
+            self._programar_render()
+            return
+        self._arbol[opcion] = valor
+
+    def _fijar_columnas(self, columnas):
+        self._columnas = {col: i for i, col in enumerate(columnas)}
+
+    # --- Filas ---
+    def insert(self, parent, index, iid=None, values=(), tags=(), fila=None):
+        """Agrega una fila al final; `fila` es la lista compartida con los valores del modelo."""
+        if iid is None:
+            self._contador += 1
+            iid = f"F{self._contador}"
+        elif iid in self._posicion:
+            raise tk.TclError(f"Item {iid} already exists")
+        self._posicion[iid] = len(self._orden)
+        self._orden.append(iid)
+        self._propias[iid] = list(values)
+        self._filas[iid] = fila if fila is not None else []
+        self._tags[iid] = (tags,) if isinstance(tags, str) else tuple(tags)
+        self._programar_render()
+        return iid
+
+    def delete(self, *items):
+        borrar = set(items)
+        if not borrar:
+            return
+        self._orden = [iid for iid in self._orden if iid not in borrar]
+        self._posicion = {iid: i for i, iid in enumerate(self._orden)}
+        for iid in borrar:
+            self._propias.pop(iid, None)
+            self._filas.pop(iid, None)
+            self._tags.pop(iid, None)
+        self._seleccion = tuple(iid for iid in self._seleccion if iid not in borrar)
+        self._programar_render()
+
+    def get_children(self, item=''):
+        return tuple(self._orden)
+
+    def exists(self, iid):
+        return iid in self._posicion
+
+    def index(self, iid):
+        return self._posicion[iid]
+
+    def _valores(self, iid):
+        return self._propias[iid] + self._filas[iid]
+
+    def item(self, iid, option=None, **kw):
+        if iid not in self._posicion:
+            raise tk.TclError(f"Item {iid} not found")
+        if kw:
+            if 'values' in kw:
+                valores = list(kw['values'])
+                propias = self._propias[iid]
+                propias[:] = valores[:len(propias)]
+                fila = self._filas[iid]
+                if valores[len(propias):] != fila:
+                    fila[:] = valores[len(propias):]
+            if 'tags' in kw:
+                tags = kw['tags']
+                self._tags[iid] = (tags,) if isinstance(tags, str) else tuple(tags)
+            if iid in self._visibles:
+                self._arbol.item(iid, values=self._valores(iid), tags=self._tags[iid])
+            return None
+        datos = {'text': '', 'image': '', 'values': tuple(self._valores(iid)),
+                 'open': 0, 'tags': self._tags[iid]}
+        return datos if option is None else datos[option]
+
+    def set(self, iid, column=None, value=None):
+        valores = self._valores(iid)
+        if column is None:
+            return {col: valores[i] for col, i in self._columnas.items() if i < len(valores)}
+        i = self._columnas[column]
+        if value is None:
+            return valores[i] if i < len(valores) else ''
+        propias = self._propias[iid]
+        if i < len(propias):
+            propias[i] = value
+        else:
+            fila = self._filas[iid]
+            j = i - len(propias)
+            fila.extend([''] * (j + 1 - len(fila)))
+            fila[j] = value
+        if iid in self._visibles:
+            self._arbol.set(iid, column, value)
+
+    # --- Selección ---
+    def selection(self):
+        return self._seleccion
+
+    def selection_set(self, *items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        self._seleccion = tuple(items)
+        self._arbol.selection_set([iid for iid in self._seleccion if iid in self._visibles])
+
+    def bind(self, secuencia=None, func=None, add=None):
+        if secuencia == '<<TreeviewSelect>>' and func is not None:
+            def _filtrada(event, func=func):
+                # Ignorar los eventos que provoca volver a materializar la selección al desplazarse
+                actual = tuple(self._arbol.selection())
+                if actual == self._seleccion_renderizada:
+                    return None
+                self._seleccion = self._seleccion_renderizada = actual
+                return func(event)
+            return self._arbol.bind(secuencia, _filtrada, add)
+        return self._arbol.bind(secuencia, func, add)
+
+    # --- Desplazamiento ---
+    def yview(self, *args):
+        total = len(self._orden)
+        if not args:
+            if not total:
+                return (0.0, 1.0)
+            return (self._inicio / total, min(1.0, (self._inicio + self._capacidad) / total))
+        if args[0] == 'moveto':
+            self._desplazar_a(int(float(args[1]) * total))
+        elif args[0] == 'scroll':
+            paso = int(args[1]) * (self._capacidad if args[2] == 'pages' else 1)
+            self._desplazar_a(self._inicio + paso)
+
+    def see(self, iid):
+        posicion = self._posicion[iid]
+        if posicion < self._inicio:
+            self._desplazar_a(posicion)
+        elif posicion >= self._inicio + self._capacidad:
+            self._desplazar_a(posicion - self._capacidad + 1)
+
+    def _desplazar_a(self, inicio):
+        inicio = max(0, min(inicio, len(self._orden) - self._capacidad))
+        if inicio != self._inicio:
+            self._inicio = inicio
+            self._renderizar()
+
+    def _rueda(self, event):
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self._desplazar_a(self._inicio - 3)
+        else:
+            self._desplazar_a(self._inicio + 3)
+        return 'break'
+
+    def _mover_foco(self, paso):
+        foco = self._arbol.focus() or (self._seleccion[0] if self._seleccion else None)
+        if foco in self._posicion:
+            destino = max(0, min(len(self._orden) - 1, self._posicion[foco] + paso))
+            iid = self._orden[destino]
+            self.see(iid)
+            self.selection_set(iid)
+            self._arbol.focus(iid)
+        return 'break'
+
+    def _recalcular_capacidad(self):
+        """Ajusta cuántas filas caben según el alto real del widget y de una fila."""
+        hijos = self._arbol.get_children()
+        if not hijos:
+            return
+        caja = self._arbol.bbox(hijos[0])
+        if not caja:
+            return
+        _, y, _, alto_fila = caja
+        capacidad = max(1, (self._arbol.winfo_height() - y) // max(1, alto_fila))
+        if capacidad != self._capacidad:
+            self._capacidad = capacidad
+            self._renderizar()
+
+    # --- Materialización ---
+    def _programar_render(self):
+        if not self._render_pendiente:
+            self._render_pendiente = True
+            self._arbol.after_idle(self._renderizar)
+
+    def _renderizar(self):
+        """Reemplaza los items del Treeview interno por las filas de la ventana visible."""
+        self._render_pendiente = False
+        self._inicio = max(0, min(self._inicio, len(self._orden) - self._capacidad))
+        visibles = self._orden[self._inicio:self._inicio + self._capacidad]
+        arbol = self._arbol
+        arbol.delete(*arbol.get_children())
+        for iid in visibles:
+            arbol.insert('', 'end', iid=iid, values=self._valores(iid), tags=self._tags[iid])
+        primera_vez = not self._visibles
+        self._visibles = set(visibles)
+        self._seleccion_renderizada = tuple(iid for iid in self._seleccion if iid in self._visibles)
+        if self._seleccion_renderizada:
+            arbol.selection_set(self._seleccion_renderizada)
+        if self._yscrollcommand:
+            self._yscrollcommand(*self.yview())
+        if primera_vez and visibles:
+            arbol.after_idle(self._recalcular_capacidad)
+
+# ---------------- DESPACHO DE ACTUALIZACIONES DE LA UI ----------------
+class DespachadorUI:
+    """Cola de actualizaciones de la interfaz para los hilos de trabajo.
+
+    Tk no es seguro entre hilos: los hilos publican aquí y el hilo de Tk aplica
+    los cambios en un tick de root.after cada `intervalo_ms`. Los eventos se
+    agrupan: de cada clave de estado (p. ej. ('masiva', fila)) solo se aplica el
+    último, y de cada texto de progreso solo el último valor del tick. Las
+    llamadas sueltas (mensajes, resultados) se ejecutan todas, en orden, cuando
+    ya no quedan estados pendientes.
+    """
+
+    def __init__(self, root, intervalo_ms=40, presupuesto_ms=30):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.presupuesto = presupuesto_ms / 1000
+        self._lock = threading.Lock()
+        self._estados = OrderedDict()  # clave -> (función, args), el último gana
+        self._textos = {}              # StringVar -> texto, el último gana
+        self._llamadas = []            # (función, args) en orden de llegada
+        self._activo = False
+
+    def estado(self, clave, funcion, *args):
+        """Publica el estado de una fila; reemplaza al pendiente con la misma clave."""
+        with self._lock:
+            self._estados.pop(clave, None)
+            self._estados[clave] = (funcion, args)
+
+    def texto(self, variable, valor):
+        """Publica el texto de una variable de progreso; solo se aplica el último del tick."""
+        with self._lock:
+            self._textos[variable] = valor
+
+    def llamar(self, funcion, *args):
+        """Ejecuta funcion(*args) en el hilo de Tk, después de los estados pendientes."""
+        with self._lock:
+            self._llamadas.append((funcion, args))
+
+    def iniciar(self):
+        self._activo = True
+        self.root.after(self.intervalo_ms, self._tick)
+
+    def detener(self):
+        self._activo = False
+
+    def _tick(self):
+        if not self._activo:
+            return
+        with self._lock:
+            textos, self._textos = self._textos, {}
+        
+        # Estados por fila, del más antiguo al más nuevo, hasta agotar el presupuesto;
+        # lo que sobra sigue en la cola en su lugar para el siguiente tick
+        limite = time.perf_counter() + self.presupuesto
+        while True:
+            with self._lock:
+                if not self._estados:
+                    break
+                _, (funcion, args) = self._estados.popitem(last=False)
+            self._ejecutar(funcion, args)
+            if time.perf_counter() >= limite:
+                break
+        for variable, valor in textos.items():
+            self._ejecutar(variable.set, (valor,))
+        
+        with self._lock:
+            if self._estados:
+                llamadas = []
+            else:
+                llamadas, self._llamadas = self._llamadas, []
+        for funcion, args in llamadas:
+            self._ejecutar(funcion, args)
+        self.root.after(self.intervalo_ms, self._tick)
+
+    @staticmethod
+    def _ejecutar(funcion, args):
+        try:
+            funcion(*args)
+        except Exception:
+            log.exception("Error aplicando una actualización de la interfaz")
 
 # ---------------- GUI PRINCIPAL ----------------
 class GeneradorCatalogoApp:
@@ -260,38 +1696,45 @@ class GeneradorCatalogoApp:
         except:
             self.root.attributes('-zoomed', True)  # Linux/Mac
         self.root.minsize(1000, 700)
-        self.df = None
         self.producto_actual = None
         self.catalogo_path = ''
         self.campos_csv = []
         self.plantilla_ind_path = ''
         self.plantilla_tarjeta = ''
-        self.logos_dict = {}
+        self.logos_dict = ResolutorMarcas()
         self.tarjeta_html_actual = ''
         self.checked_rows = {}  # Dict para saber qué filas están marcadas
+        self.filas_productos = []  # Modelo compartido: valores CSV por producto, en orden de carga
         self.checkbox_images = {
             True: tk.PhotoImage(data='''R0lGODlhEAAQAMQfAFVVVf///wAAAMzMzPz8/Obm5gAAAFhYWPj4+P39/fb29gAAAJmZmQAAAPDw8AAAAGZmZgAAAJmZmf///wAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAACH5BAEAAB8ALAAAAAAQABAAAAVu4CeOZGmeaKqubOu+cCzPdFQFACHhQAOw=='''),
             False: tk.PhotoImage(data='''R0lGODlhEAAQAMQfAFVVVf///wAAAMzMzPz8/Obm5gAAAFhYWPj4+P39/fb29gAAAJmZmQAAAPDw8AAAAGZmZgAAAJmZmf///wAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAACH5BAEAAB8ALAAAAAAQABAAAAVu4CeOZGmeaKqubOu+cCzPdFQFACHhQAOw=='''),
         }
         self.estado_filas = {}  # Dict para el estado visual de cada fila
-        self.historial_estado_path = 'historial_estado_productos.json'
+        # Índices SKU -> item id de los TreeView individual y masivo (se reconstruyen al cargar)
+        self.indice_sku = {}
+        self.indice_sku_masiva = {}
+        # Productos, estados, tarjetas y links viven en el almacén SQLite
+        self.almacen = AlmacenProductos(os.path.join(DIRECTORIO_PROGRAMA, 'catalogo_productos.db'))
+        self.almacen.importar_historial_json(os.path.join(DIRECTORIO_PROGRAMA, 'historial_estado_productos.json'))
+        self.historial = HistorialEstados(self.almacen)
         
         # Variables para optimizaciones de Fase 2
         self.progress_var = tk.StringVar(value="")
         self.progress_label = None
         self.executor = ThreadPoolExecutor(max_workers=4)
+        # Los hilos de trabajo actualizan la interfaz a través del despachador
+        self.despachador = DespachadorUI(self.root)
+        self.despachador.iniciar()
+        self.validador_imagenes = None  # Validación masiva de imágenes en curso
+        self.carga_cancelada = None  # Event de la carga de inventario en curso
+        self._carga = None  # Tabla y modelo en construcción mientras llegan los bloques
         
         # Variables para pestaña de tarjetas masivas
         self.productos_seleccionados_tarjetas = set()
-        self.tarjetas_generadas = {}
-        self.links_redireccion = {}  # Dict para almacenar links de redirección por SKU
         self.progress_var_tarjetas = None  # Se inicializa en _configurar_tab4
         
         self.cargar_historial_estado()
         
-        # Tabla de traducción para normalización de marcas (optimización)
-        self.trans_table = str.maketrans('', '', ' -_')
-        
         # Configurar limpieza al cerrar
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
 
@@ -405,6 +1848,17 @@ class GeneradorCatalogoApp:
                                                  relief="flat", padx=20, pady=8, cursor="hand2")
         self.btn_reiniciar_historial.pack(side="left", padx=(10, 0))
         
+        self.btn_validar_imagenes = tk.Button(csv_row1, text="🔎 Validar Imágenes del CSV", command=self.validar_imagenes_csv,
+                                              font=('Segoe UI', 9, 'bold'), fg="#ffffff", bg="#17a2b8",
+                                              relief="flat", padx=20, pady=8, cursor="hand2")
+        self.btn_validar_imagenes.pack(side="left", padx=(10, 0))
+        
+        # Progreso de la carga del inventario (visibles solo mientras carga)
+        self.barra_carga = ttk.Progressbar(csv_row1, orient="horizontal", length=200, mode="determinate")
+        self.btn_cancelar_carga = tk.Button(csv_row1, text="✖ Cancelar carga", command=self.cancelar_carga_csv,
+                                            font=('Segoe UI', 9, 'bold'), fg="#ffffff", bg="#6c757d",
+                                            relief="flat", padx=20, pady=8, cursor="hand2")
+        
         # Fila 2: Plantilla
         csv_row2 = tk.Frame(csv_controls, bg="#ffffff")
         csv_row2.pack(fill="x")
@@ -722,7 +2176,27 @@ class GeneradorCatalogoApp:
                                               font=('Segoe UI', 9), fg="#ffffff", bg="#28a745",
                                               relief="flat", padx=15, pady=5, cursor="hand2")
         self.btn_buscar_directorio.pack(side="left", padx=5)
-        
+
+        # Fila 3: Procesos en paralelo (1 = generación secuencial)
+        row3_3 = tk.Frame(config_controls3, bg="#ffffff")
+        row3_3.pack(fill="x")
+
+        tk.Label(row3_3, text="Procesos en paralelo:", font=('Segoe UI', 9, 'bold'),
+                fg="#495057", bg="#ffffff").pack(side="left")
+        self.procesos_masiva = tk.IntVar(value=1)
+        self.spin_procesos_masiva = tk.Spinbox(row3_3, from_=1, to=os.cpu_count() or 1,
+                                              textvariable=self.procesos_masiva,
+                                              font=('Segoe UI', 9), width=5, state="readonly")
+        self.spin_procesos_masiva.pack(side="left", padx=(10, 5))
+        tk.Label(row3_3, text="(1 = secuencial)", font=('Segoe UI', 9),
+                fg="#6c757d", bg="#ffffff").pack(side="left")
+
+        # Regeneración incremental: omitir productos sin cambios desde la última generación
+        self.solo_modificados_masiva = tk.BooleanVar(value=True)
+        tk.Checkbutton(row3_3, text="Solo regenerar productos modificados",
+                       variable=self.solo_modificados_masiva, font=('Segoe UI', 9),
+                       fg="#495057", bg="#ffffff", activebackground="#ffffff").pack(side="left", padx=(20, 0))
+
         # Frame de selección de productos
         selection_frame = tk.LabelFrame(self.tab3, text="Selección de Productos",
                                        font=('Segoe UI', 10, 'bold'), fg="#495057", bg="#ffffff",
@@ -787,10 +2261,10 @@ class GeneradorCatalogoApp:
                  foreground=[('selected', '#212529')])
         
         # TreeView masiva
-        self.tree_masiva = ttk.Treeview(tree_frame_masiva, 
-                                       yscrollcommand=scrollbar_y_masiva.set,
-                                       xscrollcommand=scrollbar_x_masiva.set,
-                                       selectmode="none", height=12, style='Masiva.Treeview')
+        self.tree_masiva = TablaVirtual(tree_frame_masiva, 
+                                        yscrollcommand=scrollbar_y_masiva.set,
+                                        xscrollcommand=scrollbar_x_masiva.set,
+                                        selectmode="none", height=12, style='Masiva.Treeview')
         
         # Configurar scrollbars
         scrollbar_y_masiva.config(command=self.tree_masiva.yview)
@@ -851,7 +2325,6 @@ class GeneradorCatalogoApp:
         
         # Variables para generación masiva de tarjetas
         self.productos_seleccionados_tarjetas = set()
-        self.tarjetas_generadas = {}  # Dict para almacenar tarjetas generadas
         
         # Configurar pestaña 4 después de configurar las otras pestañas
         self._configurar_tab4()
@@ -944,6 +2417,21 @@ class GeneradorCatalogoApp:
                                          relief="solid", bd=1, padx=15, pady=5, cursor="hand2")
         self.btn_cargar_links.pack(side="left")
         
+        # Fila 5: Catálogo paginado
+        row5_4 = tk.Frame(config_controls4, bg="#ffffff")
+        row5_4.pack(fill="x", pady=(10, 0))
+        
+        tk.Label(row5_4, text="Tarjetas por página:", font=('Segoe UI', 9),
+                fg="#495057", bg="#ffffff").pack(side="left", padx=(0, 10))
+        self.tam_pagina_catalogo = tk.IntVar(value=48)
+        tk.Spinbox(row5_4, from_=1, to=1000, textvariable=self.tam_pagina_catalogo,
+                   font=('Segoe UI', 9), width=6).pack(side="left", padx=(0, 20))
+        tk.Label(row5_4, text="Ordenar por:", font=('Segoe UI', 9),
+                fg="#495057", bg="#ffffff").pack(side="left", padx=(0, 10))
+        self.orden_catalogo = tk.StringVar(value=ORDENES_CATALOGO[0])
+        ttk.Combobox(row5_4, textvariable=self.orden_catalogo, values=ORDENES_CATALOGO,
+                     state="readonly", width=12, font=('Segoe UI', 9)).pack(side="left")
+        
         # Frame de selección de productos
         selection_frame4 = tk.LabelFrame(self.tab4, text="Selección de Productos",
                                         font=('Segoe UI', 10, 'bold'), fg="#495057", bg="#ffffff",
@@ -1008,7 +2496,7 @@ class GeneradorCatalogoApp:
                  foreground=[('selected', '#212529')])
         
         # TreeView tarjetas
-        self.tree_tarjetas = ttk.Treeview(tree_frame_tarjetas, 
+        self.tree_tarjetas = TablaVirtual(tree_frame_tarjetas, 
                                          yscrollcommand=scrollbar_y_tarjetas.set,
                                          xscrollcommand=scrollbar_x_tarjetas.set,
                                          selectmode="none", height=12, style='Tarjetas.Treeview')
@@ -1073,13 +2561,27 @@ class GeneradorCatalogoApp:
                                                        command=self.insertar_tarjetas_en_catalogo,
                                                        font=('Segoe UI', 11, 'bold'), fg="#ffffff", bg="#28a745",
                                                        relief="flat", padx=30, pady=10, cursor="hand2")
-        self.btn_insertar_tarjetas_catalogo.pack(side="left")
+        self.btn_insertar_tarjetas_catalogo.pack(side="left", padx=(0, 10))
+        
+        self.btn_catalogo_paginado = tk.Button(actions_controls4, text="📑 Catálogo Paginado",
+                                              command=self.crear_catalogo_paginado,
+                                              font=('Segoe UI', 11, 'bold'), fg="#ffffff", bg="#fd7e14",
+                                              relief="flat", padx=30, pady=10, cursor="hand2")
+        self.btn_catalogo_paginado.pack(side="left")
+        
+        # Upsert: las tarjetas de SKU ya presentes se reemplazan en su lugar en vez de duplicarse
+        self.actualizar_existentes_tarjetas = tk.BooleanVar(value=True)
+        tk.Checkbutton(actions_controls4, text="Actualizar tarjetas existentes (sin duplicar)",
+                       variable=self.actualizar_existentes_tarjetas, font=('Segoe UI', 9),
+                       fg="#495057", bg="#ffffff", activebackground="#ffffff").pack(side="left", padx=(20, 0))
     
     def _setup_button_hover_effects(self):
         """Configura efectos hover para los botones"""
         buttons_config = [
             (self.btn_cargar, "#007bff", "#0056b3"),
             (self.btn_reiniciar_historial, "#dc3545", "#c82333"),
+            (self.btn_validar_imagenes, "#17a2b8", "#138496"),
+            (self.btn_cancelar_carga, "#6c757d", "#545b62"),
             (self.btn_reiniciar_historial_masiva, "#dc3545", "#c82333"),
             (self.btn_reiniciar_historial_tarjetas, "#dc3545", "#c82333"),
             (self.btn_buscar_plantilla_ind, "#f8f9fa", "#e9ecef"),
@@ -1093,7 +2595,8 @@ class GeneradorCatalogoApp:
             (self.btn_insertar_tarjeta, "#28a745", "#1e7e34"),
             (self.btn_eliminar_tarjeta, "#dc3545", "#c82333"),
             (self.btn_generar_tarjetas_masivo, "#6f42c1", "#5a32a3"),
-            (self.btn_insertar_tarjetas_catalogo, "#28a745", "#1e7e34")
+            (self.btn_insertar_tarjetas_catalogo, "#28a745", "#1e7e34"),
+            (self.btn_catalogo_paginado, "#fd7e14", "#e8690b")
         ]
         
         for button, normal_color, hover_color in buttons_config:
@@ -1112,34 +2615,40 @@ class GeneradorCatalogoApp:
         button.bind("<Leave>", on_leave)
 
     def cargar_historial_estado(self):
-        try:
-            with open(self.historial_estado_path, 'r', encoding='utf-8') as f:
-                self.estado_filas = json.load(f)
-        except Exception:
-            self.estado_filas = {}
+        self.estado_filas = self.historial.cargar()
 
-    def guardar_historial_estado(self):
-        try:
-            with open(self.historial_estado_path, 'w', encoding='utf-8') as f:
-                json.dump(self.estado_filas, f)
-        except Exception:
-            pass
+    def guardar_historial_estado(self, *skus, inmediato=False):
+        """Programa la escritura de los SKU modificados; con inmediato=True escribe ya (fin de proceso)."""
+        if skus:
+            self.historial.programar(self.estado_filas, skus)
+        if inmediato:
+            self.historial.volcar()
     
     def limpiar_cache_plantillas(self):
         """Limpia el cache de plantillas HTML para liberar memoria"""
-        global _PLANTILLA_CACHE
+        global _PLANTILLA_CACHE, _PLANTILLA_COMPILADA_CACHE
         _PLANTILLA_CACHE.clear()
-        print("[DEBUG] Cache de plantillas limpiado")
+        _PLANTILLA_COMPILADA_CACHE.clear()
+        log.debug("Cache de plantillas limpiado")
         
     def _on_closing(self):
         """Limpia recursos al cerrar la aplicación."""
         try:
-            # Cerrar el executor de threads
+            # Cerrar el executor de threads y detener la validación de imágenes en curso
+            self.despachador.detener()
             self.executor.shutdown(wait=False)
-            # Limpiar caches
-            global _PLANTILLA_CACHE, _URL_VALIDATION_CACHE
+            if self.validador_imagenes is not None:
+                self.validador_imagenes.cancelado.set()
+            if self.carga_cancelada is not None:
+                self.carga_cancelada.set()
+            # Limpiar caches (la de URLs se guarda en disco)
+            global _PLANTILLA_CACHE, _PLANTILLA_COMPILADA_CACHE, _URL_VALIDATION_CACHE
             _PLANTILLA_CACHE.clear()
-            _URL_VALIDATION_CACHE.clear()
+            _PLANTILLA_COMPILADA_CACHE.clear()
+            _URL_VALIDATION_CACHE.volcar()
+            # Escribir los cambios de estado pendientes y cerrar el almacén
+            self.historial.volcar()
+            self.almacen.cerrar()
         except:
             pass
         finally:
@@ -1248,146 +2757,267 @@ class GeneradorCatalogoApp:
         if not respuesta:
             return
         
+        # Las variables de Tk se leen aquí, en el hilo de la interfaz, y el hilo de trabajo recibe una copia
+        try:
+            procesos = int(self.procesos_masiva.get())
+        except (tk.TclError, ValueError):
+            procesos = 1
+        # Clave del manifiesto y nombre de archivo por fila, según su lugar en el inventario
+        claves = claves_paginas(self.almacen.skus())
+        parametros = {
+            'paginas': [(item_id,) + claves[int(item_id)]
+                        for item_id in sorted(self.productos_seleccionados_masiva, key=int)],
+            'archivos': {archivo for _, archivo in claves},
+            'plantilla_path': self.plantilla_masiva_path.get(),
+            'directorio': self.directorio_salida.get(),
+            'incremental': self.solo_modificados_masiva.get(),
+            'procesos': procesos,
+        }
+        
         # Ejecutar generación en hilo separado
-        self.executor.submit(self._generar_masivo_async)
+        self.executor.submit(self._generar_masivo_async, parametros)
     
-    def _generar_masivo_async(self):
+    def _generar_masivo_async(self, parametros):
         """Ejecuta la generación masiva en segundo plano"""
         try:
-            self.progress_var_masiva.set("Iniciando generación masiva...")
+            self.despachador.texto(self.progress_var_masiva, "Iniciando generación masiva...")
+            
+            paginas = parametros['paginas']
+            directorio = parametros['directorio']
+            incremental = parametros['incremental']
+            procesos = parametros['procesos']
+            total_productos = len(paginas)
+            
+            # Con más de un proceso se usa el modo paralelo
+            paralelo = procesos > 1 and total_productos > 1
+            
+            # Tiempos por etapa y latencia por producto; el avance muestra productos/s y ETA
+            prefijo = f"Generando páginas en {procesos} procesos..." if paralelo else "Generando páginas..."
+            medicion = MedicionLote('paginas', total_productos,
+                                    al_avanzar=lambda texto: self.despachador.texto(self.progress_var_masiva, f"{prefijo} {texto}"))
             
             # Cargar plantilla
-            with open(self.plantilla_masiva_path.get(), 'r', encoding='utf-8') as f:
-                plantilla_content = f.read()
+            with medicion.etapa('plantilla'):
+                with open(parametros['plantilla_path'], 'r', encoding='utf-8') as f:
+                    plantilla_content = f.read()
             
-            total_productos = len(self.productos_seleccionados_masiva)
-            productos_generados = 0
-            productos_fallidos = 0
+            # Manifiesto de la regeneración incremental (huella por fila)
+            with medicion.etapa('manifiesto'):
+                manifiesto = cargar_manifiesto(directorio)
+            hash_plantilla = hash_contenido(plantilla_content)
             
-            for i, item_id in enumerate(self.productos_seleccionados_masiva, 1):
-                try:
-                    # Marcar como procesando
-                    self.set_estado_fila_masiva(item_id, 'procesando')
-                    
-                    # Actualizar progreso
-                    self.progress_var_masiva.set(f"Generando página {i}/{total_productos}...")
-                    
-                    # Obtener datos del producto
-                    values = self.tree_masiva.item(item_id, 'values')
-                    if not values:
-                        continue
-                    
-                    # Crear diccionario de datos del producto
-                    # Estructura TreeView masivo: ['sel', '_numero', '_checked'] + campos_csv
-                    # Los datos CSV empiezan en índice 3
-                    
-                    # Crear mapeo dinámico basado en los campos CSV
-                    def get_value_by_column_name(column_name):
-                        try:
-                            if column_name in self.campos_csv:
-                                csv_index = self.campos_csv.index(column_name)
-                                values_index = csv_index + 3  # +3 por ['sel', '_numero', '_checked']
-                                return values[values_index] if len(values) > values_index else ''
-                            return ''
-                        except (ValueError, IndexError):
-                            return ''
-                    
-                    producto_data = {
-                        'tipo': get_value_by_column_name('Etiquetas'),
-                        'sku': get_value_by_column_name('SKU'),
-                        'nombre': get_value_by_column_name('SKU'),  # SKU como nombre
-                        'precio_normal': get_value_by_column_name('Precio normal'),
-                        'porcentaje_descuento': get_value_by_column_name('Porcentajede descuento'),
-                        'precio_descuento': get_value_by_column_name('precio con descuento'),
-                        'marca': get_value_by_column_name('Valor(es) del atributo 2'),  # Marca
-                        'descripcion': get_value_by_column_name('Tipo'),  # Tipo como descripción
-                        'imagen1': get_value_by_column_name('IMAGEN 1'),
-                        'imagen2': get_value_by_column_name('IMAGEN 2'),
-                        'imagen3': get_value_by_column_name('IMAGEN 3'),
-                        'logo': '',
-                        # Información adicional para la tabla
-                        'color': get_value_by_column_name('Valor(es) del atributo 4'),  # Color
-                        'forma': get_value_by_column_name('Valor(es) del atributo 5'),  # Forma
-                        'material': get_value_by_column_name('Valor(es) del atributo 6'),  # Material
-                        'varillas': get_value_by_column_name('Valor(es) del atributo 7'),  # Varillas
-                        'clip': get_value_by_column_name('Valor(es) del atributo 8'),  # Clip
-                        'color_mica': get_value_by_column_name('Valor(es) del atributo 9'),  # Color de Mica
-                        'medida': get_value_by_column_name('Valor(es) del atributo 10'),  # Medida
-                        'puente': get_value_by_column_name('Valor(es) del atributo 11'),  # Puente
-                        'accesorios': get_value_by_column_name('Valor(es) del atributo 12'),  # Accesorios
-                        'garantia': get_value_by_column_name('Valor(es) del atributo 13')  # Garantía
-                    }
-                    
-                    # Generar contenido HTML
-                    html_content = self._procesar_plantilla_masiva(plantilla_content, producto_data)
-                    
-                    # Crear nombre de archivo seguro
-                    nombre_archivo = self._crear_nombre_archivo_seguro(producto_data['nombre'], i)
-                    ruta_archivo = os.path.join(self.directorio_salida.get(), f"{nombre_archivo}.html")
-                    
-                    # Guardar archivo
-                    with open(ruta_archivo, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
-                    
-                    # Marcar como generado exitosamente (color verde)
-                    self.set_estado_fila_masiva(item_id, 'verde')
-                    
-                    # Guardar en historial y sincronizar con TreeView individual
-                    sku = producto_data['sku']
-                    if sku:
-                        print(f"DEBUG: Guardando estado 'verde' para SKU {sku} en generación masiva")
-                        self.estado_filas[sku] = 'verde'
-                        self.guardar_historial_estado()
-                        print(f"DEBUG: Historial guardado. Estado actual: {self.estado_filas}")
-                        self.sincronizar_estado_individual(sku, 'verde')
-                    
-                    productos_generados += 1
-                    
-                except Exception as e:
-                    print(f"Error generando producto {i}: {str(e)}")
-                    
-                    # Marcar como error (color rojo) y sincronizar
-                    self.set_estado_fila_masiva(item_id, 'rojo')
-                    
-                    # Obtener SKU para sincronización
-                    try:
-                        values = self.tree_masiva.item(item_id, 'values')
-                        if values and len(values) > 4:
-                            sku = values[4]  # SKU está en índice 4 (sel, _numero, _checked, Tipo, SKU)
-                            if sku:
-                                self.estado_filas[sku] = 'rojo'
-                                self.guardar_historial_estado()
-                                self.sincronizar_estado_individual(sku, 'rojo')
-                    except Exception:
-                        pass
-                    
-                    productos_fallidos += 1
-                    continue
+            if paralelo:
+                productos_generados, productos_sin_cambios, productos_fallidos = self._generar_masivo_paralelo(
+                    paginas, directorio, plantilla_content, procesos, manifiesto, hash_plantilla, incremental, medicion)
+            else:
+                productos_generados, productos_sin_cambios, productos_fallidos = self._generar_masivo_secuencial(
+                    paginas, directorio, plantilla_content, manifiesto, hash_plantilla, incremental, medicion)
+            
+            with medicion.etapa('manifiesto'):
+                guardar_manifiesto(directorio, manifiesto, parametros['archivos'])
+            with medicion.etapa('historial'):
+                self.guardar_historial_estado(inmediato=True)
+            
+            ruta_informe = guardar_informe(directorio, medicion, generados=productos_generados,
+                                           sin_cambios=productos_sin_cambios, fallidos=productos_fallidos,
+                                           procesos=procesos if paralelo else 1, incremental=bool(incremental))
             
             # Mostrar resultado final
-            self.progress_var_masiva.set(
-                f"Completado: {productos_generados} generados, {productos_fallidos} fallidos"
+            self.despachador.texto(
+                self.progress_var_masiva,
+                f"Completado: {productos_generados} generados, {productos_sin_cambios} sin cambios, "
+                f"{productos_fallidos} fallidos en {medicion.transcurrido():.1f} s ({medicion.rendimiento():.1f}/s)"
             )
             
             # Limpiar mensaje después de 5 segundos
-            self.root.after(5000, lambda: self.progress_var_masiva.set(""))
+            self.despachador.llamar(self.root.after, 5000, lambda: self.progress_var_masiva.set(""))
             
             # Mostrar mensaje de éxito
-            messagebox.showinfo(
+            self.despachador.llamar(
+                messagebox.showinfo,
                 "Generación Completada",
                 f"Generación masiva completada:\n\n"
                 f"✅ Páginas generadas: {productos_generados}\n"
+                f"⏭️ Páginas sin cambios: {productos_sin_cambios}\n"
                 f"❌ Páginas fallidas: {productos_fallidos}\n\n"
-                f"Directorio: {self.directorio_salida.get()}"
+                f"Directorio: {directorio}"
+                + (f"\nInforme de tiempos: {os.path.basename(ruta_informe)}" if ruta_informe else "")
             )
             
         except Exception as e:
-            self.progress_var_masiva.set("Error en generación masiva")
-            messagebox.showerror("Error", f"Error durante la generación masiva:\n{str(e)}")
+            self.despachador.texto(self.progress_var_masiva, "Error en generación masiva")
+            self.despachador.llamar(messagebox.showerror, "Error", f"Error durante la generación masiva:\n{str(e)}")
+    
+    def _generar_masivo_secuencial(self, paginas, directorio, plantilla_content, manifiesto, hash_plantilla, incremental, medicion):
+        """Genera las páginas una por una en el hilo actual; devuelve (generados, sin_cambios, fallidos)
+        
+        paginas es una lista de (item_id, clave del manifiesto, archivo de la página).
+        """
+        productos_generados = 0
+        productos_sin_cambios = 0
+        productos_fallidos = 0
+        
+        for i, (item_id, clave, archivo) in enumerate(paginas, 1):
+            inicio_producto = time.perf_counter()
+            try:
+                # Marcar como procesando
+                with medicion.etapa('estado_tabla'):
+                    self.despachador.estado(('masiva', item_id), self.set_estado_fila_masiva, item_id, 'procesando')
+                
+                # Obtener datos del producto
+                with medicion.etapa('lectura_almacen'):
+                    producto_data = self._datos_producto_masiva(item_id)
+                if not producto_data:
+                    continue
+                sku = producto_data['sku']
+                
+                # Omitir productos cuya página ya está generada con los mismos datos
+                with medicion.etapa('huella'):
+                    huella = huella_producto(producto_data, hash_plantilla)
+                    sin_cambios = incremental and pagina_sin_cambios(manifiesto, directorio, clave, huella, archivo)
+                if sin_cambios:
+                    with medicion.etapa('estado_historial'):
+                        self._registrar_resultado_masiva(item_id, sku, 'verde')
+                    productos_sin_cambios += 1
+                    continue
+                
+                # Generar contenido HTML
+                with medicion.etapa('render'):
+                    html_content = self._procesar_plantilla_masiva(plantilla_content, producto_data)
+                
+                # Nombre de archivo seguro, único y estable entre ejecuciones (claves_paginas)
+                ruta_archivo = os.path.join(directorio, archivo)
+                
+                # Guardar archivo
+                with medicion.etapa('escritura'):
+                    with open(ruta_archivo, 'w', encoding='utf-8') as f:
+                        f.write(html_content)
+                
+                if clave:
+                    manifiesto[clave] = {'huella': huella, 'archivo': archivo}
+                
+                # Marcar como generado exitosamente (color verde)
+                with medicion.etapa('estado_historial'):
+                    self._registrar_resultado_masiva(item_id, sku, 'verde')
+                productos_generados += 1
+                
+            except Exception as e:
+                log.error("Error generando producto %s: %s", i, e)
+                
+                # Marcar como error (color rojo) y sincronizar
+                try:
+                    values = self.tree_masiva.item(item_id, 'values')
+                    sku = values[4] if values and len(values) > 4 else ''  # SKU está en índice 4 (sel, _numero, _checked, Tipo, SKU)
+                except Exception:
+                    sku = ''
+                self._registrar_resultado_masiva(item_id, sku, 'rojo')
+                
+                productos_fallidos += 1
+                continue
+            finally:
+                medicion.producto(time.perf_counter() - inicio_producto)
+        
+        return productos_generados, productos_sin_cambios, productos_fallidos
+    
+    def _generar_masivo_paralelo(self, paginas, directorio, plantilla_content, procesos, manifiesto, hash_plantilla, incremental, medicion):
+        """Genera las páginas en lotes con un ProcessPoolExecutor; devuelve (generados, sin_cambios, fallidos)
+        
+        paginas es una lista de (item_id, clave del manifiesto, archivo de la página).
+        """
+        productos_generados = 0
+        productos_sin_cambios = 0
+        productos_fallidos = 0
+        
+        # Leer los datos de todas las filas antes de repartir el trabajo
+        tareas = []
+        entradas_manifiesto = {}  # item_id -> (clave, entrada del manifiesto si se genera bien)
+        for item_id, clave, archivo in paginas:
+            with medicion.etapa('lectura_almacen'):
+                producto_data = self._datos_producto_masiva(item_id)
+            if not producto_data:
+                medicion.producto()
+                continue
+            sku = producto_data['sku']
+            with medicion.etapa('huella'):
+                huella = huella_producto(producto_data, hash_plantilla)
+                sin_cambios = incremental and pagina_sin_cambios(manifiesto, directorio, clave, huella, archivo)
+            if sin_cambios:
+                self._registrar_resultado_masiva(item_id, sku, 'verde')
+                productos_sin_cambios += 1
+                medicion.producto()
+                continue
+            entradas_manifiesto[item_id] = (clave, {'huella': huella, 'archivo': archivo})
+            tareas.append((archivo, item_id, producto_data))
+        
+        total_productos = len(tareas)
+        if not total_productos:
+            return productos_generados, productos_sin_cambios, productos_fallidos
+        
+        # Lotes pequeños para repartir bien la carga sin pagar un envío por producto
+        tamano_lote = max(1, min(50, total_productos // (procesos * 4)))
+        lotes = [tareas[inicio:inicio + tamano_lote] for inicio in range(0, total_productos, tamano_lote)]
+        
+        for _, item_id, _ in tareas:
+            self.despachador.estado(('masiva', item_id), self.set_estado_fila_masiva, item_id, 'procesando')
+        self.despachador.texto(self.progress_var_masiva,
+                               f"Generando páginas en {procesos} procesos... {medicion.texto_avance()}")
+        
+        # render y escritura suman el tiempo de todos los procesos; 'procesos' es el tiempo de pared
+        with medicion.etapa('procesos'), ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {
+                pool.submit(_generar_lote_paginas, plantilla_content, lote, directorio): lote
+                for lote in lotes
+            }
+            for futuro in as_completed(futuros):
+                try:
+                    resultados = futuro.result()
+                except Exception as e:
+                    # Si el proceso falla, todo su lote queda como error
+                    log.error("Error en proceso de generación: %s", e)
+                    resultados = [(item_id, producto_data['sku'], str(e), (0.0, 0.0))
+                                  for _, item_id, producto_data in futuros[futuro]]
+                
+                for item_id, sku, error, (render, escritura) in resultados:
+                    medicion.sumar('render', render)
+                    medicion.sumar('escritura', escritura)
+                    if error is None:
+                        productos_generados += 1
+                        estado = 'verde'
+                        clave, entrada = entradas_manifiesto[item_id]
+                        if clave:
+                            manifiesto[clave] = entrada
+                    else:
+                        log.error("Error generando producto %s: %s", sku, error)
+                        productos_fallidos += 1
+                        estado = 'rojo'
+                    self._registrar_resultado_masiva(item_id, sku, estado)
+                    medicion.producto(render + escritura)
+        
+        return productos_generados, productos_sin_cambios, productos_fallidos
+    
+    def _registrar_resultado_masiva(self, item_id, sku, estado):
+        """Guarda el estado verde/rojo en el historial y publica el color de la fila y su sincronización.
+        
+        Se llama desde el hilo de generación: los cambios visuales pasan por el despachador.
+        """
+        self.despachador.estado(('masiva', item_id), self.set_estado_fila_masiva, item_id, estado)
+        if sku:
+            log.debug("Guardando estado %r para SKU %s en generación masiva", estado, sku)
+            self.estado_filas[sku] = estado
+            self.guardar_historial_estado(sku)
+            self.despachador.estado(('individual', sku), self.sincronizar_estado_individual, sku, estado)
+    
+    def _datos_producto_masiva(self, item_id):
+        """Crea el diccionario producto_data de una fila leyendo su registro del almacén"""
+        # El iid de la fila es su posición en la carga
+        registro = self.almacen.producto_en(int(item_id))
+        return producto_data_desde_registro(registro) if registro else None
     
-    def _procesar_plantilla_masiva(self, plantilla_content, producto_data):
-        """Procesa la plantilla HTML con los datos del producto usando regex como en generación individual"""
-        html_content = plantilla_content
+    @staticmethod
+    def _procesar_plantilla_masiva(plantilla_content, producto_data):
+        """Procesa la plantilla HTML con los datos del producto usando la plantilla compilada"""
+        # La plantilla se compila una vez y queda en cache para todo el lote
+        plantilla = compilar_plantilla_pagina(plantilla_content)
         
         # Obtener imágenes del producto del CSV en orden original
         imagenes_csv = [
@@ -1400,122 +3030,65 @@ class GeneradorCatalogoApp:
         imagenes_ordenadas = reordenar_imagenes_para_tarjeta(imagenes_csv)
         img1, img2, img3 = imagenes_ordenadas
         
-        # Usar patrones regex compilados para reemplazar imágenes (igual que en generación individual)
-        html_content = _REGEX_PATTERNS['img_src_1'].sub('src="' + img1 + '"', html_content)
-        html_content = _REGEX_PATTERNS['img_src_2'].sub('src="' + img2 + '"', html_content)
-        html_content = _REGEX_PATTERNS['img_src_3'].sub('src="' + img3 + '"', html_content)
-        
-        # Reemplazo en miniaturas
-        html_content = _REGEX_PATTERNS['thumb_1'].sub('src="' + img1 + '"', html_content)
-        html_content = _REGEX_PATTERNS['thumb_2'].sub('src="' + img2 + '"', html_content)
-        html_content = _REGEX_PATTERNS['thumb_3'].sub('src="' + img3 + '"', html_content)
-        
-        # Reemplazo en el script JS (array imageSources)
-        img1_js = '"' + img1 + '"'
-        img2_js = '"' + img2 + '"'
-        img3_js = '"' + img3 + '"'
-        html_content = _REGEX_PATTERNS['image_sources'].sub('const imageSources = [' + img1_js + ', ' + img2_js + ', ' + img3_js + '];', html_content)
-        
-        # Reemplazar información del producto (marca, modelo, precios)
+        # Información del producto (marca, modelo, precios)
         sku = producto_data.get('sku', '')
         marca = producto_data.get('marca', '')
         precio_normal = producto_data.get('precio_normal', '')
         precio_descuento = producto_data.get('precio_descuento', '')
         porcentaje_descuento = producto_data.get('porcentaje_descuento', '')
         
-        # Reemplazar marca y modelo usando regex
-        html_content = _REGEX_PATTERNS['product_brand'].sub('<h1 id="product-brand" class="text-4xl md:text-5xl font-bold text-orange-500 uppercase">' + marca + '</h1>', html_content)
-        html_content = _REGEX_PATTERNS['product_model'].sub('<p id="product-model" class="text-xl text-gray-400 mb-4">' + sku + '</p>', html_content)
-        
-        # Reemplazar precios
-        try:
-            # Verificar si hay descuento válido (no vacío, no nan, no None)
-            def es_valido(valor):
-                if valor is None:
-                    return False
-                valor_str = str(valor).strip().lower()
-                return bool(valor_str and valor_str not in ['nan', 'none', ''])
-            
-            tiene_descuento = es_valido(precio_descuento) and es_valido(porcentaje_descuento)
-            
-            if tiene_descuento and precio_normal and '$' in str(precio_normal) and '$' in str(precio_descuento):
-                # Formatear precio normal (tachado)
-                precio_normal_float = float(str(precio_normal).replace('$', '').replace(',', ''))
-                precio_normal_formateado = f'${precio_normal_float:,.2f}'
-                
-                # Formatear precio con descuento
-                precio_descuento_float = float(str(precio_descuento).replace('$', '').replace(',', ''))
-                precio_descuento_formateado = f'${precio_descuento_float:,.2f}'
-                
-                # Formatear porcentaje de descuento
-                porcentaje_float = float(str(porcentaje_descuento).replace('%', ''))
-                porcentaje_formateado = f'{porcentaje_float:.0f}%'
-                
-                # Reemplazar precio tachado
-                html_content = _REGEX_PATTERNS['old_price'].sub('<span class="text-2xl text-gray-400 line-through mr-2">' + precio_normal_formateado + '</span>', html_content)
-                
-                # Reemplazar badge de descuento
-                html_content = _REGEX_PATTERNS['discount_badge'].sub('<span class="inline-block bg-red-100 text-red-600 text-lg font-bold px-2 py-1 rounded align-middle mr-2">' + porcentaje_formateado + '</span>', html_content)
-                
-                # Reemplazar precio actual
-                html_content = _REGEX_PATTERNS['new_price'].sub('<span class="text-5xl font-extrabold text-black">' + precio_descuento_formateado + '</span>', html_content)
-            elif precio_normal and '$' in str(precio_normal):
-                # Solo precio normal disponible (sin descuento)
-                precio_normal_float = float(str(precio_normal).replace('$', '').replace(',', ''))
-                precio_normal_formateado = f'${precio_normal_float:,.2f}'
-                
-                # Ocultar precio tachado y badge de descuento
-                html_content = _REGEX_PATTERNS['old_price'].sub('', html_content)
-                html_content = _REGEX_PATTERNS['discount_badge'].sub('', html_content)
-                
-                # Mostrar solo el precio normal como precio principal
-                html_content = _REGEX_PATTERNS['new_price'].sub('<span class="text-5xl font-extrabold text-black">' + precio_normal_formateado + '</span>', html_content)
-        except Exception as e:
-            print(f"Error procesando precios: {e}")
-        
-        # --- Reemplazo de tabla de especificaciones ---
-        # Usar el mismo enfoque que la función individual para consistencia
-        tabla_replacements = [
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700 w-1/3">SKU</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('sku', '')),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Marca</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('marca', '')),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Tipo</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('tipo', '')),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Color</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('color', '')),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Forma</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('forma', '')),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Material</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('material', '')),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Varillas</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('varillas', '')),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Clip</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('clip', '')),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Color de Mica</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('color_mica', '')),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Medida</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('medida', '')),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Puente</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('puente', '')),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Accesorios</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('accesorios', '')),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Garantía</td><td class="py-3 px-4 text-gray-800">[^<]*</td></tr>', producto_data.get('garantia', '')),
-            # Patrones específicos para valores hardcodeados en la plantilla
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700 w-1/3">SKU</td><td class="py-3 px-4 text-gray-800">RB2398</td></tr>', f'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700 w-1/3">SKU</td><td class="py-3 px-4 text-gray-800">{producto_data.get("sku", "")}</td></tr>'),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Marca</td><td class="py-3 px-4 text-gray-800">RAYBAN</td></tr>', f'<tr><td class="py-3 px-4 font-semibold text-gray-700">Marca</td><td class="py-3 px-4 text-gray-800">{producto_data.get("marca", "")}</td></tr>'),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Tipo</td><td class="py-3 px-4 text-gray-800">Lente oftálmico</td></tr>', f'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Tipo</td><td class="py-3 px-4 text-gray-800">{producto_data.get("tipo", "")}</td></tr>'),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Color</td><td class="py-3 px-4 text-gray-800">Transparente con negro</td></tr>', f'<tr><td class="py-3 px-4 font-semibold text-gray-700">Color</td><td class="py-3 px-4 text-gray-800">{producto_data.get("color", "")}</td></tr>'),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Forma</td><td class="py-3 px-4 text-gray-800">Ovalado</td></tr>', f'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Forma</td><td class="py-3 px-4 text-gray-800">{producto_data.get("forma", "")}</td></tr>'),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Material</td><td class="py-3 px-4 text-gray-800">Acetato</td></tr>', f'<tr><td class="py-3 px-4 font-semibold text-gray-700">Material</td><td class="py-3 px-4 text-gray-800">{producto_data.get("material", "")}</td></tr>'),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Varillas</td><td class="py-3 px-4 text-gray-800">Acetato</td></tr>', f'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Varillas</td><td class="py-3 px-4 text-gray-800">{producto_data.get("varillas", "")}</td></tr>'),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Clip</td><td class="py-3 px-4 text-gray-800">Sin clip</td></tr>', f'<tr><td class="py-3 px-4 font-semibold text-gray-700">Clip</td><td class="py-3 px-4 text-gray-800">{producto_data.get("clip", "")}</td></tr>'),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Color de Mica</td><td class="py-3 px-4 text-gray-800">Transparente</td></tr>', f'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Color de Mica</td><td class="py-3 px-4 text-gray-800">{producto_data.get("color_mica", "")}</td></tr>'),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Medida</td><td class="py-3 px-4 text-gray-800">Mediano</td></tr>', f'<tr><td class="py-3 px-4 font-semibold text-gray-700">Medida</td><td class="py-3 px-4 text-gray-800">{producto_data.get("medida", "")}</td></tr>'),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Puente</td><td class="py-3 px-4 text-gray-800">Puente anatómico</td></tr>', f'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Puente</td><td class="py-3 px-4 text-gray-800">{producto_data.get("puente", "")}</td></tr>'),
-            (r'<tr><td class="py-3 px-4 font-semibold text-gray-700">Accesorios</td><td class="py-3 px-4 text-gray-800">Lente, paño, estuche y líquido antirreflejante</td></tr>', f'<tr><td class="py-3 px-4 font-semibold text-gray-700">Accesorios</td><td class="py-3 px-4 text-gray-800">{producto_data.get("accesorios", "")}</td></tr>'),
-            (r'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Garantía</td><td class="py-3 px-4 text-gray-800">30 días de garantía contra defectos de fábrica.</td></tr>', f'<tr class="bg-gray-50"><td class="py-3 px-4 font-semibold text-gray-700">Garantía</td><td class="py-3 px-4 text-gray-800">{producto_data.get("garantia", "")}</td></tr>'),
-        ]
-        
-        for patron, valor in tabla_replacements:
-            # Para patrones con [^<]*, usar lambda function
-            if '[^<]*' in patron:
-                html_content = re.sub(patron, lambda m, v=valor: m.group(0).replace('[^<]*', v), html_content)
-            else:
-                # Para patrones específicos con valores hardcodeados, usar reemplazo directo
-                html_content = re.sub(patron, valor, html_content)
-        
-        return html_content
+        # Valores numéricos interpretados al cargar el inventario; si no vienen, se convierten aquí
+        def numero(campo, texto):
+            if campo + '_num' in producto_data:
+                return producto_data[campo + '_num']
+            return _numero_precio(texto)
+        
+        precio_normal_float = numero('precio_normal', precio_normal)
+        precio_descuento_float = numero('precio_descuento', precio_descuento)
+        porcentaje_float = numero('porcentaje_descuento', porcentaje_descuento)
+        
+        # Valor formateado, o el texto tal como viene en el inventario si no es un número
+        def formato(numero_texto, texto, patron):
+            if numero_texto is None:
+                log.warning("Producto %s: %r no es un número, se usa tal cual", sku, texto)
+                return str(texto).strip()
+            return patron.format(numero_texto)
+        
+        # Precios: None conserva los de la plantilla si no se pueden interpretar
+        precios = None
+        tiene_descuento = _es_valido(precio_descuento) and _es_valido(porcentaje_descuento)
+        if (tiene_descuento and _es_valido(precio_normal)
+                and '$' in str(precio_normal) and '$' in str(precio_descuento)):
+            # Precio normal (tachado), porcentaje y precio con descuento
+            precios = (formato(precio_normal_float, precio_normal, '${:,.2f}'),
+                       formato(porcentaje_float, porcentaje_descuento, '{:.0f}%'),
+                       formato(precio_descuento_float, precio_descuento, '${:,.2f}'))
+        elif precio_normal_float is not None and '$' in str(precio_normal):
+            # Solo precio normal disponible: ocultar precio tachado y badge de descuento
+            precios = (None, None, f'${precio_normal_float:,.2f}')
+        
+        # --- Tabla de especificaciones ---
+        especificaciones = dict(zip(_ETIQUETAS_ESPECIFICACIONES, [
+            producto_data.get('sku', ''),
+            producto_data.get('marca', ''),
+            producto_data.get('tipo', ''),
+            producto_data.get('color', ''),
+            producto_data.get('forma', ''),
+            producto_data.get('material', ''),
+            producto_data.get('varillas', ''),
+            producto_data.get('clip', ''),
+            producto_data.get('color_mica', ''),
+            producto_data.get('medida', ''),
+            producto_data.get('puente', ''),
+            producto_data.get('accesorios', ''),
+            producto_data.get('garantia', ''),
+        ]))
+        
+        valores = _valores_slots_pagina(img1, img2, img3, marca, sku, precios, especificaciones)
+        return plantilla.render(valores)
     
-    def _crear_nombre_archivo_seguro(self, nombre_producto, indice):
+    @staticmethod
+    def _crear_nombre_archivo_seguro(nombre_producto, indice):
         """Crea un nombre de archivo seguro basado en el nombre del producto"""
         if not nombre_producto:
             return f"producto_{indice}"
@@ -1578,7 +3151,7 @@ class GeneradorCatalogoApp:
         if values and len(values) > 4:  # Asegurar que hay SKU (índice 4 en masiva)
             sku = values[4]  # SKU está en el índice 4 (sel, _numero, _checked, Tipo, SKU)
             self.estado_filas[sku] = estado
-            self.guardar_historial_estado()
+            self.guardar_historial_estado(sku)
             # Sincronizar con TreeView individual
             self.sincronizar_estado_individual(sku, estado)
     
@@ -1592,12 +3165,9 @@ class GeneradorCatalogoApp:
             # Limpiar el diccionario de estados
             self.estado_filas = {}
             
-            # Eliminar el archivo de historial
-            try:
-                if os.path.exists(self.historial_estado_path):
-                    os.remove(self.historial_estado_path)
-            except Exception:
-                pass
+            # Borrar el historial guardado
+            self.historial.descartar()
+            self.almacen.guardar_estados({})
             
             # Restablecer estados visuales en ambos TreeViews
             if self.tree:
@@ -1634,9 +3204,6 @@ class GeneradorCatalogoApp:
         else:
             # Normal - sin color de fondo especial
             pass
-        
-        # Forzar actualización visual
-        self.tree_masiva.update_idletasks()
     
     def configurar_columnas_masiva(self):
         """Configura las columnas del TreeView masiva basándose en los campos CSV"""
@@ -1700,27 +3267,27 @@ class GeneradorCatalogoApp:
         self.configurar_columnas_masiva()
         
         # Limpiar TreeView masiva
-        for item in self.tree_masiva.get_children():
-            self.tree_masiva.delete(item)
+        self.tree_masiva.delete(*self.tree_masiva.get_children())
+        self.indice_sku_masiva = {}
         
         # Limpiar selecciones
         self.productos_seleccionados_masiva.clear()
         
-        # Copiar datos del TreeView principal
-        for item in self.tree.get_children():
-            values = self.tree.item(item, 'values')
-            tags = self.tree.item(item, 'tags')
-            if values:
-                # Insertar en TreeView masiva: sel + valores originales
-                new_values = ('☐',) + values
-                new_item = self.tree_masiva.insert('', 'end', values=new_values, tags=tags)
-                
-                # Restaurar estado del historial si existe (usar SKU como clave)
-                if len(values) > 3:  # Asegurar que hay SKU
-                    sku = values[3]  # SKU está en el índice 3 en el TreeView principal (_numero, _checked, Tipo, SKU)
-                    if sku in self.estado_filas:
-                        estado = self.estado_filas[sku]
-                        self.set_estado_fila_masiva(new_item, estado)
+        # Mismas filas del modelo compartido que el TreeView principal
+        for idx, fila in enumerate(self.filas_productos):
+            item = str(idx)
+            # Insertar en TreeView masiva: sel + número + checkbox de la pestaña individual
+            new_values = ('☐', str(idx + 1), self.tree.set(item, '_checked'))
+            new_item = self.tree_masiva.insert('', 'end', iid=item, values=new_values,
+                                               fila=fila, tags=self.tree.item(item, 'tags'))
+            
+            # Restaurar estado del historial si existe (usar SKU como clave)
+            if len(fila) > 1:  # Asegurar que hay SKU
+                sku = fila[1]  # SKU: índice 4 en la tabla masiva (sel, _numero, _checked, Tipo, SKU)
+                self.indice_sku_masiva.setdefault(sku, new_item)
+                if sku in self.estado_filas:
+                    estado = self.estado_filas[sku]
+                    self.set_estado_fila_masiva(new_item, estado)
         
         self.actualizar_contador_seleccionados()
 
@@ -1730,11 +3297,9 @@ class GeneradorCatalogoApp:
             return
         
         # Buscar la fila correspondiente en TreeView individual por SKU
-        for item in self.tree.get_children():
-            values = self.tree.item(item, 'values')
-            if values and len(values) > 3 and values[3] == sku:  # SKU está en índice 3
-                self.set_estado_fila(item, estado)
-                break
+        item = self.indice_sku.get(sku)
+        if item is not None:
+            self.set_estado_fila(item, estado)
     
     def sincronizar_estado_masivo(self, sku, estado):
         """Sincroniza el estado desde TreeView individual hacia TreeView masivo"""
@@ -1742,48 +3307,26 @@ class GeneradorCatalogoApp:
             return
         
         # Buscar la fila correspondiente en TreeView masivo por SKU
-        for item in self.tree_masiva.get_children():
-            values = self.tree_masiva.item(item, 'values')
-            if values and len(values) > 4 and values[4] == sku:  # SKU está en índice 4 (sel, _numero, _checked, Tipo, SKU)
-                self.set_estado_fila_masiva(item, estado)
-                break
+        item = self.indice_sku_masiva.get(sku)
+        if item is not None:
+            self.set_estado_fila_masiva(item, estado)
     
     def forzar_sincronizacion_completa(self):
         """Fuerza la sincronización completa del historial en ambos TreeViews"""
-        print("DEBUG: Iniciando sincronización completa...")
-        print(f"DEBUG: Estados en historial: {self.estado_filas}")
-        
-        # Aplicar estados del historial al TreeView individual
-        if hasattr(self, 'tree') and self.tree:
-            print("DEBUG: Revisando TreeView individual...")
-            for item in self.tree.get_children():
-                values = self.tree.item(item, 'values')
-                if values and len(values) > 3:
-                    sku = values[3]  # SKU está en índice 3 (_numero, _checked, Tipo, SKU)
-                    print(f"DEBUG: Encontrado SKU '{sku}' en TreeView individual")
-                    if sku in self.estado_filas:
-                        estado = self.estado_filas[sku]
-                        print(f"DEBUG: Aplicando estado {estado} a SKU {sku} en TreeView individual")
-                        self.set_estado_fila(item, estado)
-                    else:
-                        print(f"DEBUG: SKU '{sku}' no encontrado en historial")
+        log.debug("Sincronizando %d estados del historial...", len(self.estado_filas))
         
-        # Aplicar estados del historial al TreeView masivo
-        if hasattr(self, 'tree_masiva') and self.tree_masiva:
-            print("DEBUG: Revisando TreeView masivo...")
-            for item in self.tree_masiva.get_children():
-                values = self.tree_masiva.item(item, 'values')
-                if values and len(values) > 3:  # En masivo, SKU está en índice 3 (después de checkbox)
-                    sku = values[3]  # SKU está en índice 3
-                    print(f"DEBUG: Encontrado SKU '{sku}' en TreeView masivo")
-                    if sku in self.estado_filas:
-                        estado = self.estado_filas[sku]
-                        print(f"DEBUG: Aplicando estado {estado} a SKU {sku} en TreeView masivo")
-                        self.set_estado_fila_masiva(item, estado)
-                    else:
-                        print(f"DEBUG: SKU '{sku}' no encontrado en historial")
+        # Solo se visitan los SKU con estado guardado, localizados por índice
+        for sku, estado in self.estado_filas.items():
+            if self.tree:
+                item = self.indice_sku.get(sku)
+                if item is not None:
+                    self.set_estado_fila(item, estado)
+            if hasattr(self, 'tree_masiva') and self.tree_masiva:
+                item = self.indice_sku_masiva.get(sku)
+                if item is not None:
+                    self.set_estado_fila_masiva(item, estado)
         
-        print("DEBUG: Sincronización completa finalizada")
+        log.debug("Sincronización completa finalizada")
 
     def reiniciar_historial(self):
         """Reinicia el historial de estados de productos"""
@@ -1795,12 +3338,9 @@ class GeneradorCatalogoApp:
             # Limpiar el diccionario de estados
             self.estado_filas = {}
             
-            # Eliminar el archivo de historial
-            try:
-                if os.path.exists(self.historial_estado_path):
-                    os.remove(self.historial_estado_path)
-            except Exception:
-                pass
+            # Borrar el historial guardado
+            self.historial.descartar()
+            self.almacen.guardar_estados({})
             
             # Restablecer estados visuales en ambos TreeViews
             if self.tree:
@@ -1820,6 +3360,9 @@ class GeneradorCatalogoApp:
             self.entry_plantilla_ind.delete(0, tk.END)
             self.entry_plantilla_ind.insert(0, path)
             self.plantilla_ind_path = path
+            # Releer la plantilla aunque sea la misma ruta y descartar páginas ya renderizadas
+            _PLANTILLA_CACHE.pop(path, None)
+            _RENDER_CACHE.clear()
 
     def cargar_logos(self):
         path = filedialog.askopenfilename(filetypes=[("CSV or TXT", "*.csv;*.txt")])
@@ -1827,67 +3370,122 @@ class GeneradorCatalogoApp:
             return
         self.entry_logos.delete(0, tk.END)
         self.entry_logos.insert(0, path)
-        self.logos_dict = {}
-        # Tabla de traducción para normalización optimizada
-        trans_table = str.maketrans('', '', ' -_')
-        
-        if path.endswith('.csv'):
-            df = pd.read_csv(path)
-            for _, row in df.iterrows():
-                marca = str(row.iloc[0]).strip().lower().translate(trans_table)
-                logo = str(row.iloc[1]).strip()
-                self.logos_dict[marca] = logo
-        else:
-            with open(path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    if ':' in line:
-                        marca, logo = line.split(':', 1)
-                    elif ',' in line:
-                        marca, logo = line.split(',', 1)
-                    else:
-                        marca, logo = line.split(None, 1)
-                    # Usar la misma normalización optimizada
-                    marca_normalizada = marca.strip().lower().translate(trans_table)
-                    self.logos_dict[marca_normalizada] = logo.strip()
+        self.logos_dict = ResolutorMarcas(leer_archivo_logos(path))
+        self._precalcular_logos()
+        _RENDER_CACHE.clear()
         messagebox.showinfo("Éxito", "Archivo de logos cargado correctamente.")
 
+    def _precalcular_logos(self):
+        """Resuelve de una vez el logo de cada marca distinta del inventario cargado"""
+        if not self.logos_dict or not self.filas_productos:
+            return
+        self.logos_dict.precalcular(self.almacen.marcas())
+
     def cargar_csv(self):
         path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("Excel Files", "*.xlsx")])
-        if not path:
+        if not path or self.carga_cancelada is not None:
             return
-            
-        # Mostrar indicador de progreso
+        
+        # La lectura corre en un hilo de trabajo; los bloques llegan al hilo de Tk por una cola
+        self.carga_cancelada = threading.Event()
+        self._carga = {'campos': None, 'tabla': None, 'filas': [], 'indice_sku': {},
+                       'checked': {}, 'total': None}
+        cola = queue.Queue()
+        
         self.progress_var.set("Cargando archivo...")
-        self.root.update_idletasks()
+        self.btn_cargar.config(state="disabled")
+        self.barra_carga.config(value=0, maximum=1)
+        self.barra_carga.pack(side="left", padx=(10, 0))
+        self.btn_cancelar_carga.pack(side="left", padx=(10, 0))
         
+        self.executor.submit(self._leer_inventario_async, path, cola, self.carga_cancelada)
+        self.root.after(50, self._drenar_cola_carga, cola)
+    
+    def cancelar_carga_csv(self):
+        if self.carga_cancelada is not None:
+            self.carga_cancelada.set()
+            self.progress_var.set("Cancelando carga...")
+    
+    def _leer_inventario_async(self, path, cola, cancelado):
+        """Hilo de trabajo: lee el inventario por bloques, los guarda en el almacén y los envía a la cola"""
         try:
-            if path.endswith('.xlsx'):
-                self.df = pd.read_excel(path)
-            else:
-                self.df = pd.read_csv(path)
-            
-            # Limpiar datos: remover filas completamente vacías
-            self.df = self.df.dropna(how='all')
-            
-            # Resetear índices después de limpiar
-            self.df = self.df.reset_index(drop=True)
+            cola.put(('total', contar_filas_inventario(path)))
             
-            self.campos_csv = list(self.df.columns)
-            
-            # Actualizar progreso
-            self.progress_var.set(f"Procesando {len(self.df)} filas...")
-            self.root.update_idletasks()
+            def bloques():
+                campos = None
+                for bloque in leer_inventario_por_bloques(path):
+                    if cancelado.is_set():
+                        return
+                    campos = campos or list(bloque.columns)
+                    registros = bloque.to_dict('records')
+                    cola.put(('bloque', campos, registros))
+                    yield campos, registros
             
+            # Upsert por posición al terminar la lectura; si se cancela, el almacén conserva la carga anterior
+            if self.almacen.cargar_productos(bloques(), cancelado) is None:
+                cola.put(('cancelado',))
+                return
+            cola.put(('fin',))
         except Exception as e:
-            self.progress_var.set("")
-            messagebox.showerror("Error", f"Error al cargar archivo: {str(e)}")
-            return
-        # Eliminar tabla anterior si existe
-        if self.tree:
-            self.tree.destroy()
+            cola.put(('error', str(e)))
+    
+    def _drenar_cola_carga(self, cola):
+        """Hilo de Tk: incorpora los bloques recibidos sin bloquear la interfaz más de ~30 ms por ciclo"""
+        limite = time.perf_counter() + 0.03
+        while time.perf_counter() < limite:
+            try:
+                mensaje = cola.get_nowait()
+            except queue.Empty:
+                break
+            tipo = mensaje[0]
+            if tipo == 'total':
+                self._carga['total'] = mensaje[1]
+                if mensaje[1] is None:
+                    self.barra_carga.config(mode="indeterminate")
+                    self.barra_carga.start(50)
+                else:
+                    self.barra_carga.config(maximum=max(1, mensaje[1]))
+            elif tipo == 'bloque':
+                self._agregar_bloque_carga(*mensaje[1:])
+            else:
+                if tipo == 'fin':
+                    self._finalizar_carga_csv()
+                else:
+                    self._terminar_carga()
+                    if tipo == 'error':
+                        messagebox.showerror("Error", f"Error al cargar archivo: {mensaje[1]}")
+                    else:
+                        messagebox.showinfo("Carga cancelada", "Se canceló la carga; se conservan los datos anteriores.")
+                return
+        self.root.after(20, self._drenar_cola_carga, cola)
+    
+    def _agregar_bloque_carga(self, campos, registros):
+        """Agrega un bloque de registros a la tabla en construcción (aún no visible)"""
+        carga = self._carga
+        if carga['tabla'] is None:
+            carga['campos'] = campos
+            carga['tabla'] = self._crear_tabla_productos(campos)
+        tabla = carga['tabla']
+        filas = carga['filas']
+        # Modelo compartido por las tres pestañas: una lista de valores por producto.
+        # La tabla es virtual, así que insertar solo registra la fila en memoria.
+        for registro in registros:
+            fila = [registro.get(col, "") for col in campos]
+            iid = str(len(filas))
+            filas.append(fila)
+            carga['checked'][iid] = False
+            tabla.insert("", "end", iid=iid, values=[str(len(filas)), ""], fila=fila)
+            if len(fila) > 1:
+                carga['indice_sku'].setdefault(fila[1], iid)  # SKU: índice 3 de la tabla (_numero, _checked, Tipo, SKU)
+        
+        if carga['total'] is None:
+            self.progress_var.set(f"Cargando productos... {len(filas)}")
+        else:
+            self.barra_carga.config(value=len(filas))
+            self.progress_var.set(f"Cargando productos... {len(filas)}/{max(carga['total'], len(filas))}")
+    
+    def _crear_tabla_productos(self, campos):
+        """Crea la tabla de productos de la pestaña individual (sin colocarla todavía)"""
         # --- Configurar estilo moderno para TreeView ---
         style = ttk.Style()
         style.configure('Modern.Treeview', 
@@ -1907,14 +3505,13 @@ class GeneradorCatalogoApp:
                  foreground=[('selected', '#ffffff')])
         
         # --- Agregar columna de numeración y checkbox al inicio ---
-        cols = ["_numero", "_checked"] + self.campos_csv
-        self.tree = ttk.Treeview(self.tree_frame, columns=cols, show="headings", 
-                                height=10, yscrollcommand=self.yscroll.set, 
-                                xscrollcommand=self.xscroll.set, style='Modern.Treeview')
-        self.tree.heading("_numero", text="#", anchor="center")
-        self.tree.column("_numero", width=50, anchor="center", stretch=False)
-        self.tree.heading("_checked", text="✔", anchor="center")
-        self.tree.column("_checked", width=40, anchor="center", stretch=False)
+        cols = ["_numero", "_checked"] + campos
+        tabla = TablaVirtual(self.tree_frame, columns=cols, show="headings",
+                             height=10, style='Modern.Treeview')
+        tabla.heading("_numero", text="#", anchor="center")
+        tabla.column("_numero", width=50, anchor="center", stretch=False)
+        tabla.heading("_checked", text="✔", anchor="center")
+        tabla.column("_checked", width=40, anchor="center", stretch=False)
         # Definir anchos fijos para columnas clave
         col_widths = {
             "Tipo": 90,
@@ -1943,12 +3540,47 @@ class GeneradorCatalogoApp:
             "IMAGEN 2": 180,
             "IMAGEN 3": 180,
         }
-        for col in self.campos_csv:
-            self.tree.heading(col, text=col)
+        for col in campos:
+            tabla.heading(col, text=col)
             width = col_widths.get(col, 100)
-            self.tree.column(col, width=width, anchor="center", stretch=False)
+            tabla.column(col, width=width, anchor="center", stretch=False)
+        
+        return tabla
+    
+    def _terminar_carga(self):
+        """Restablece los controles de carga; descarta la tabla si no llegó a mostrarse"""
+        if self._carga and self._carga['tabla'] is not None and self._carga['tabla'] is not self.tree:
+            self._carga['tabla'].destroy()
+        self._carga = None
+        self.carga_cancelada = None
+        self.barra_carga.stop()
+        self.barra_carga.config(mode="determinate", value=0)
+        self.barra_carga.pack_forget()
+        self.btn_cancelar_carga.pack_forget()
+        self.btn_cargar.config(state="normal")
+        self.progress_var.set("")
+    
+    def _finalizar_carga_csv(self):
+        """Reemplaza la tabla anterior por la recién cargada y sincroniza las pestañas"""
+        carga = self._carga
+        if carga['tabla'] is None:
+            carga['campos'] = carga['campos'] or []
+            carga['tabla'] = self._crear_tabla_productos(carga['campos'])
+        
+        # Eliminar tabla anterior si existe
+        if self.tree:
+            self.tree.destroy()
+        self.tree = carga['tabla']
+        self.campos_csv = carga['campos']
+        self.filas_productos = carga['filas']
+        self.indice_sku = carga['indice_sku']
+        self.checked_rows = carga['checked']
+        self._precalcular_logos()
+        self._terminar_carga()
         
         # Configurar scrollbars
+        self.tree['yscrollcommand'] = self.yscroll.set
+        self.tree['xscrollcommand'] = self.xscroll.set
         self.yscroll.config(command=self.tree.yview)
         self.xscroll.config(command=self.tree.xview)
         
@@ -1958,40 +3590,7 @@ class GeneradorCatalogoApp:
         self.xscroll.grid(row=1, column=0, sticky="ew")
         
         self.tree.bind("<<TreeviewSelect>>", self.on_select_producto)
-        self.tree.bind("<Button-1>", self.on_treeview_click)
-        self.tree.delete(*self.tree.get_children())
-        self.checked_rows = {}
-        
-        # Optimización: Insertar filas en lotes para mejor rendimiento
-        total_rows = len(self.df)
-        batch_size = 100
-        
-        for batch_start in range(0, total_rows, batch_size):
-            batch_end = min(batch_start + batch_size, total_rows)
-            
-            # Actualizar progreso
-            progress = int((batch_start / total_rows) * 100)
-            self.progress_var.set(f"Cargando filas: {progress}% ({batch_start}/{total_rows})")
-            self.root.update_idletasks()
-            
-            # Procesar lote
-            for idx in range(batch_start, batch_end):
-                row = self.df.iloc[idx]
-                iid = str(idx)
-                self.checked_rows[iid] = False
-                
-                # Manejar valores NaN y nulos correctamente
-                csv_values = []
-                for col in self.campos_csv:
-                    value = row.get(col, "")
-                    # Convertir NaN, None y valores nulos a string vacío
-                    if pd.isna(value) or value is None:
-                        csv_values.append("")
-                    else:
-                        csv_values.append(str(value))
-                
-                values = [str(idx + 1), "", *csv_values]
-                self.tree.insert("", "end", iid=iid, values=values)
+        self.tree.bind("<Button-1>", self.on_treeview_click)
         
         # Restaurar colores/estados desde historial
         self.progress_var.set("Restaurando estados...")
@@ -1999,11 +3598,9 @@ class GeneradorCatalogoApp:
         
         # Buscar rowid correcto basado en SKU
         for sku, estado in self.estado_filas.items():
-            for item in self.tree.get_children():
-                values = self.tree.item(item, 'values')
-                if values and len(values) > 3 and values[3] == sku:  # SKU está en índice 3
-                    self.set_estado_fila(item, estado)
-                    break
+            item = self.indice_sku.get(sku)
+            if item is not None:
+                self.set_estado_fila(item, estado)
             
         # Sincronizar datos con pestaña masiva
         self.sincronizar_datos_masiva()
@@ -2012,13 +3609,78 @@ class GeneradorCatalogoApp:
         self.sincronizar_datos_tarjetas()
         
         # Forzar sincronización del historial después de cargar CSV
-        print(f"DEBUG: Estado filas después de cargar CSV: {self.estado_filas}")
+        log.debug("Estado filas después de cargar CSV: %s", self.estado_filas)
         self.forzar_sincronizacion_completa()
         
         # Limpiar indicador de progreso
         self.progress_var.set("")
-        messagebox.showinfo("Éxito", f"Archivo CSV cargado: {total_rows} productos")
+        messagebox.showinfo("Éxito", f"Archivo CSV cargado: {len(self.filas_productos)} productos")
+        
+    def validar_imagenes_csv(self):
+        """Valida en segundo plano todas las URLs IMAGEN 1/2/3 del CSV cargado"""
+        if not self.filas_productos:
+            messagebox.showwarning("Advertencia", "Primero debe cargar un archivo CSV.")
+            return
+        if self.validador_imagenes is not None:
+            messagebox.showinfo("Validación de imágenes", "Ya hay una validación de imágenes en curso.")
+            return
+        columnas = [self.campos_csv.index(col) for col in ("IMAGEN 1", "IMAGEN 2", "IMAGEN 3")
+                    if col in self.campos_csv]
+        if not columnas:
+            messagebox.showwarning("Advertencia", "El archivo no tiene columnas IMAGEN 1, IMAGEN 2 o IMAGEN 3.")
+            return
+        
+        self.validador_imagenes = ValidadorImagenes()
+        self.btn_validar_imagenes.config(state="disabled")
+        threading.Thread(target=self._validar_imagenes_async,
+                         args=(self.validador_imagenes, self.filas_productos, columnas), daemon=True).start()
+    
+    def _validar_imagenes_async(self, validador, filas, columnas):
+        """Valida las imágenes de todas las filas y muestra el resultado en el hilo principal"""
+        urls = [fila[i] for fila in filas for i in columnas if i < len(fila)]
+        
+        def progreso(hechas, total):
+            # El despachador aplica solo el último avance de cada tick
+            self.despachador.texto(self.progress_var, f"Validando imágenes... {hechas}/{total}")
+        
+        resultados = validador.validar(urls, progreso)
+        if validador.cancelado.is_set():
+            return
+        
+        # Filas (iid) con al menos una imagen no válida
+        filas_con_error = [
+            str(idx) for idx, fila in enumerate(filas)
+            if any(resultados.get(str(fila[i]).strip()) is False for i in columnas if i < len(fila))
+        ]
+        self.despachador.llamar(self._mostrar_resultado_validacion_masiva, resultados, filas_con_error)
+    
+    def _mostrar_resultado_validacion_masiva(self, resultados, filas_con_error):
+        """Resume la validación masiva y ofrece marcar en amarillo los productos con imágenes rotas"""
+        self.validador_imagenes = None
+        self.btn_validar_imagenes.config(state="normal")
+        invalidas = sum(1 for valido in resultados.values() if valido is False)
+        self.progress_var.set(f"✅ {len(resultados)} imágenes validadas, {invalidas} no válidas")
+        self.root.after(5000, lambda: self.progress_var.set(""))
+        
+        if not filas_con_error:
+            messagebox.showinfo("Validación de imágenes", f"Las {len(resultados)} imágenes del CSV son accesibles.")
+            return
         
+        # SKU está en índice 3 de la tabla (_numero, _checked, Tipo, SKU)
+        pares = [(iid, self.tree.item(iid, 'values')[3]) for iid in filas_con_error
+                 if self.tree.exists(iid) and len(self.tree.item(iid, 'values')) > 3]
+        skus = [sku for _, sku in pares]
+        ejemplo = ", ".join(skus[:15]) + ("..." if len(skus) > 15 else "")
+        if not messagebox.askyesno("Validación de imágenes",
+                                   f"⚠️ {invalidas} URLs no válidas en {len(skus)} productos:\n{ejemplo}\n\n"
+                                   "¿Marcar esos productos como 'Sin imágenes' (amarillo)?"):
+            return
+        for iid, sku in pares:
+            self.set_estado_fila(iid, 'amarillo')
+            self.estado_filas[sku] = 'amarillo'
+            self.sincronizar_estado_masivo(sku, 'amarillo')
+        self.guardar_historial_estado(*skus, inmediato=True)
+    
     def _mostrar_resultado_validacion(self, urls_invalidas):
         """Muestra el resultado de la validación de URLs."""
         self.progress_var.set("")
@@ -2071,7 +3733,7 @@ class GeneradorCatalogoApp:
         if values and len(values) > 3:  # Asegurar que hay SKU
             sku = values[3]  # SKU está en el índice 3
             self.estado_filas[sku] = estado
-            self.guardar_historial_estado()
+            self.guardar_historial_estado(sku)
             # Sincronizar con TreeView masivo
             self.sincronizar_estado_masivo(sku, estado)
 
@@ -2122,7 +3784,7 @@ class GeneradorCatalogoApp:
             if values and len(values) > 3:
                 sku = values[3]  # SKU está en índice 3
                 self.estado_filas[sku] = 'verde'
-                self.guardar_historial_estado()
+                self.guardar_historial_estado(sku)
                 # Sincronizar con TreeView masivo
                 self.sincronizar_estado_masivo(sku, 'verde')
         else:
@@ -2132,7 +3794,7 @@ class GeneradorCatalogoApp:
             if values and len(values) > 3:
                 sku = values[3]  # SKU está en índice 3
                 self.estado_filas[sku] = 'normal'
-                self.guardar_historial_estado()
+                self.guardar_historial_estado(sku)
                 # Sincronizar con TreeView masivo
                 self.sincronizar_estado_masivo(sku, 'normal')
 
@@ -2140,11 +3802,16 @@ class GeneradorCatalogoApp:
         # Busca la primera tarjeta en el catálogo y la usa como plantilla
         if not self.catalogo_path or not os.path.exists(self.catalogo_path):
             return
-        with open(self.catalogo_path, 'r', encoding='utf-8') as f:
-            contenido = f.read()
-        match = re.search(r'(<!-- Tarjeta de Producto:[\s\S]+?product-card[\s\S]+?</div>\s*</div>)', contenido)
-        if match:
-            self.plantilla_tarjeta = match.group(1)
+        try:
+            indice = indice_catalogo(self.catalogo_path)
+        except ValueError:
+            return
+        skus = indice.skus()
+        _RENDER_CACHE.clear()
+        if skus:
+            self.plantilla_tarjeta = indice.tarjeta(skus[0])
+            # Compilar el plan de render una vez; las vistas previas solo unen segmentos
+            compilar_plantilla_tarjeta(self.plantilla_tarjeta)
 
     def buscar_catalogo(self):
         path = filedialog.askopenfilename(filetypes=[("HTML Files", "*.html")])
@@ -2156,10 +3823,12 @@ class GeneradorCatalogoApp:
 
     def on_select_producto(self, event):
         selected = self.tree.selection()
-        if not selected or self.df is None:
+        if not selected:
+            return
+        # El iid de la fila es su posición en la carga
+        row = self.almacen.producto_en(int(selected[0]))
+        if row is None:
             return
-        idx = self.tree.index(selected[0])
-        row = self.df.iloc[idx]
         self.producto_actual = row
         # Autollenar campos de imágenes en ambas pestañas
         self.img1.delete(0, tk.END)
@@ -2200,9 +3869,16 @@ class GeneradorCatalogoApp:
         row["IMAGEN 1"] = imagenes[0]
         row["IMAGEN 2"] = imagenes[1]
         row["IMAGEN 3"] = imagenes[2]
-        html = generar_pagina_individual_desde_plantilla(row, imagenes, self.plantilla_ind_path)
-        if html is None:
+        plantilla = cargar_plantilla_html(ruta_plantilla_pagina(self.plantilla_ind_path))
+        if plantilla is None:
             return
+        clave = clave_render('pagina', plantilla, row)
+        html = _RENDER_CACHE.obtener(clave)
+        if html is None:
+            html = generar_pagina_individual_desde_plantilla(row, imagenes, self.plantilla_ind_path)
+            if html is None:
+                return
+            _RENDER_CACHE.guardar(clave, html)
         nombre_archivo = f"{row.get('SKU','producto')}.html"
         save_path = filedialog.asksaveasfilename(defaultextension=".html", initialfile=nombre_archivo, filetypes=[("HTML Files", "*.html")])
         if save_path:
@@ -2244,7 +3920,7 @@ class GeneradorCatalogoApp:
                         urls_invalidas.append(f"Imagen {i}")
             
             # Actualizar UI en el hilo principal
-            self.root.after(0, lambda: self._mostrar_resultado_validacion(urls_invalidas))
+            self.despachador.llamar(self._mostrar_resultado_validacion, urls_invalidas)
         
         # Ejecutar validación en background
         self.executor.submit(validar_imagenes_async)
@@ -2257,72 +3933,51 @@ class GeneradorCatalogoApp:
         logo = buscar_logo_marca(marca_original, self.logos_dict)
         if not logo:
             messagebox.showwarning("Advertencia", f"No se encontró logo para la marca '{self.producto_actual.get('Valor(es) del atributo 2', '')}'. Verifica el archivo de logos.")
-        plantilla_tarjeta = self.plantilla_tarjeta if self.plantilla_tarjeta else (
-            '<!-- Tarjeta de Producto: {SKU} -->\n'
-            '<div class="product-card" onclick="window.open(\'{LINK}\',\'_blank\')">\n'
-            '  <div class="product-image-container multi-image-hover">\n'
-            '    <div class="product-brand-overlay"><img src="{LOGO}" alt="Logo {MARCA}"></div>\n'
-            '    <img src="{IMG1}" alt="{SKU} - {MARCA} - Vista 1" class="product-img active">\n'
-            '    <img src="{IMG2}" alt="{SKU} - {MARCA} - Vista 2" class="product-img">\n'
-            '    <img src="{IMG3}" alt="{SKU} - {MARCA} - Vista 3" class="product-img">\n'
-            '  </div>\n'
-            '  <div class="product-info">\n'
-            '    <span class="product-brand">{MARCA}</span>\n'
-            '    <h2 class="product-name">{SKU}</h2>\n'
-            '    <p class="product-price">\n'
-            '      <span class="old-price">{OLD_PRICE}</span>\n'
-            '      <span class="new-price">{NEW_PRICE}</span>\n'
-            '    </p>\n'
-            '  </div>\n'
-            '</div>'
-        )
+        plantilla_tarjeta = self.plantilla_tarjeta if self.plantilla_tarjeta else PLANTILLA_TARJETA_PREDETERMINADA
         link_redireccion = self.entry_link_tarjeta.get().strip() or self.producto_actual.get("Link_Producto", "")
-        if not self.plantilla_tarjeta:
-            # Verificar si hay descuento válido
-            precio_normal = self.producto_actual.get("Precio normal", "")
-            precio_descuento = self.producto_actual.get("precio con descuento", "")
-            porcentaje_descuento = self.producto_actual.get("Porcentajede descuento", "")
-            
-            def es_valido(valor):
-                if valor is None:
-                    return False
-                valor_str = str(valor).strip().lower()
-                return bool(valor_str and valor_str not in ['nan', 'none', ''])
-            
-            tiene_descuento = es_valido(precio_descuento) and es_valido(porcentaje_descuento)
-            
-            # Determinar qué precios mostrar
-            if tiene_descuento:
-                old_price_display = precio_normal if precio_normal else ''
-                new_price_display = precio_descuento if precio_descuento else ''
+        clave = clave_render('tarjeta', plantilla_tarjeta, self.producto_actual, logo, link_redireccion)
+        tarjeta_html = _RENDER_CACHE.obtener(clave)
+        if tarjeta_html is None:
+            if not self.plantilla_tarjeta:
+                # Verificar si hay descuento válido
+                precio_normal = self.producto_actual.get("Precio normal", "")
+                precio_descuento = self.producto_actual.get("precio con descuento", "")
+                porcentaje_descuento = self.producto_actual.get("Porcentajede descuento", "")
+                
+                tiene_descuento = _es_valido(precio_descuento) and _es_valido(porcentaje_descuento)
+                
+                # Determinar qué precios mostrar
+                if tiene_descuento:
+                    old_price_display = precio_normal if precio_normal else ''
+                    new_price_display = precio_descuento if precio_descuento else ''
+                else:
+                    old_price_display = ''  # No mostrar precio tachado
+                    new_price_display = precio_normal if precio_normal else ''  # Mostrar precio normal como principal
+                
+                tarjeta_html = plantilla_tarjeta.format(
+                    SKU=self.producto_actual.get("Valor(es) del atributo 1", ""),
+                    MARCA=self.producto_actual.get("Valor(es) del atributo 2", ""),
+                    LOGO=logo,
+                    IMG1=imagenes[0],
+                    IMG2=imagenes[1],
+                    IMG3=imagenes[2],
+                    OLD_PRICE=old_price_display,
+                    NEW_PRICE=new_price_display,
+                    LINK=link_redireccion
+                )
+                tarjeta_html = tarjeta_html.replace('<!-- Tarjeta de Producto: {SKU} -->', f'<!-- Tarjeta de Producto: {self.producto_actual.get("Valor(es) del atributo 1", "")} -->')
             else:
-                old_price_display = ''  # No mostrar precio tachado
-                new_price_display = precio_normal if precio_normal else ''  # Mostrar precio normal como principal
-            
-            tarjeta_html = plantilla_tarjeta.format(
-                SKU=self.producto_actual.get("Valor(es) del atributo 1", ""),
-                MARCA=self.producto_actual.get("Valor(es) del atributo 2", ""),
-                LOGO=logo,
-                IMG1=imagenes[0],
-                IMG2=imagenes[1],
-                IMG3=imagenes[2],
-                OLD_PRICE=old_price_display,
-                NEW_PRICE=new_price_display,
-                LINK=link_redireccion
-            )
-            tarjeta_html = tarjeta_html.replace('<!-- Tarjeta de Producto: {SKU} -->', f'<!-- Tarjeta de Producto: {self.producto_actual.get("Valor(es) del atributo 1", "")} -->')
-        else:
-            tarjeta_html = generar_tarjeta_catalogo(
-                self.producto_actual,
-                imagenes,
-                logo,
-                link_redireccion,
-                self.producto_actual.get("Precio normal", ""),
-                self.producto_actual.get("precio con descuento", ""),
-                self.producto_actual.get("Porcentajede descuento", ""),
-                self.plantilla_tarjeta
-            )
-            tarjeta_html = re.sub(r'<!-- Tarjeta de Producto: [^>]+-->', f'<!-- Tarjeta de Producto: {self.producto_actual.get("Valor(es) del atributo 1", "")} -->', tarjeta_html)
+                tarjeta_html = generar_tarjeta_catalogo(
+                    self.producto_actual,
+                    imagenes,
+                    logo,
+                    link_redireccion,
+                    self.producto_actual.get("Precio normal", ""),
+                    self.producto_actual.get("precio con descuento", ""),
+                    self.producto_actual.get("Porcentajede descuento", ""),
+                    self.plantilla_tarjeta
+                )
+            _RENDER_CACHE.guardar(clave, tarjeta_html)
         self.tarjeta_html_actual = tarjeta_html
         self.txt_tarjeta.delete("1.0", tk.END)
         self.txt_tarjeta.insert("1.0", self.tarjeta_html_actual)
@@ -2343,42 +3998,21 @@ class GeneradorCatalogoApp:
             return
         
         try:
-            # Leer el catálogo actual
-            with open(self.catalogo_path, 'r', encoding='utf-8') as f:
-                contenido = f.read()
-            
-            # Verificar que el contenido no esté corrupto
-            if len(contenido.strip()) == 0:
-                messagebox.showerror("Error", "El archivo de catálogo está vacío o corrupto.")
-                return
-            
-            # Buscar el punto de inserción de manera más precisa
-            # Primero intentar encontrar </main>
-            if '</main>' in contenido:
-                nuevo_contenido = contenido.replace('</main>', f'{self.tarjeta_html_actual}\n</main>')
-            # Si no hay </main>, buscar antes del cierre del body
-            elif '</body>' in contenido:
-                nuevo_contenido = contenido.replace('</body>', f'{self.tarjeta_html_actual}\n</body>')
-            # Si no hay ninguno, agregar al final del archivo
+            # Si el SKU ya tiene tarjeta en el catálogo se reemplaza en su lugar (respaldo en <catálogo>.backup)
+            sku = str(self.producto_actual.get('Valor(es) del atributo 1', '')).strip() if self.producto_actual else ''
+            if sku:
+                resumen = actualizar_tarjetas_en_archivo(self.catalogo_path, {sku: self.tarjeta_html_actual})
             else:
-                nuevo_contenido = contenido + '\n' + self.tarjeta_html_actual
-            
-            # Verificar que el nuevo contenido sea válido
-            if len(nuevo_contenido) < len(contenido):
-                messagebox.showerror("Error", "Se detectó un problema con la inserción. No se realizó el cambio.")
-                return
-            
-            # Crear una copia de respaldo antes de escribir
-            backup_path = self.catalogo_path + '.backup'
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(contenido)
+                insertar_tarjetas_en_archivo(self.catalogo_path, [self.tarjeta_html_actual])
+                resumen = {'reemplazadas': 0}
             
-            # Escribir el nuevo contenido
-            with open(self.catalogo_path, 'w', encoding='utf-8') as f:
-                f.write(nuevo_contenido)
-            
-            messagebox.showinfo("Éxito", "Tarjeta añadida correctamente al catálogo.")
+            if resumen['reemplazadas']:
+                messagebox.showinfo("Éxito", "Tarjeta actualizada correctamente en el catálogo.")
+            else:
+                messagebox.showinfo("Éxito", "Tarjeta añadida correctamente al catálogo.")
             
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Error al insertar en el catálogo: {str(e)}")
 
@@ -2386,7 +4020,7 @@ class GeneradorCatalogoApp:
         if not self.catalogo_path:
             messagebox.showerror("Error", "Selecciona el archivo de catálogo.")
             return
-        if self.producto_actual is None or self.producto_actual.empty:
+        if not self.producto_actual:
             messagebox.showerror("Error", "Selecciona un producto de la tabla.")
             return
         
@@ -2403,115 +4037,15 @@ class GeneradorCatalogoApp:
             return
         
         try:
-            with open(self.catalogo_path, 'r', encoding='utf-8') as f:
-                contenido = f.read()
-            
-            import re
-            
-            # Guardar una copia del contenido original para comparar
-            contenido_original = contenido
-            
-            # Buscar la tarjeta de manera más precisa
-            # Primero, buscar comentarios que identifiquen la tarjeta
-            comentario_tarjeta = f"<!-- Tarjeta de Producto: {sku} -->"
-            
-            # Buscar desde el comentario hasta el final del div de la tarjeta
-            if comentario_tarjeta in contenido:
-                # Encontrar la posición del comentario
-                inicio_comentario = contenido.find(comentario_tarjeta)
-                
-                # Buscar el div que sigue al comentario
-                div_inicio = contenido.find('<div class="product-card"', inicio_comentario)
-                if div_inicio == -1:
-                    div_inicio = contenido.find('<div class="product-card', inicio_comentario)
-                
-                if div_inicio != -1:
-                    # Encontrar el div de cierre correspondiente
-                    nivel = 0
-                    pos = div_inicio
-                    div_fin = -1
-                    
-                    while pos < len(contenido):
-                        if contenido[pos:pos+5] == '<div ':
-                            nivel += 1
-                        elif contenido[pos:pos+6] == '</div>':
-                            nivel -= 1
-                            if nivel == 0:
-                                div_fin = pos + 6
-                                break
-                        pos += 1
-                    
-                    if div_fin != -1:
-                        # Eliminar desde el comentario hasta el final del div
-                        contenido_nuevo = contenido[:inicio_comentario] + contenido[div_fin:]
-                        
-                        # Verificar que el contenido no se haya corrompido
-                        # El contenido nuevo debe ser menor que el original (porque eliminamos algo)
-                        # pero no demasiado menor (máximo 20% menos)
-                        if len(contenido_nuevo) < len(contenido_original) and len(contenido_nuevo) > len(contenido_original) * 0.8:
-                            with open(self.catalogo_path, 'w', encoding='utf-8') as f:
-                                f.write(contenido_nuevo)
-                            messagebox.showinfo("Éxito", f"Tarjeta del producto '{sku}' eliminada correctamente del catálogo.")
-                        else:
-                            messagebox.showerror("Error", "Se detectó una posible corrupción del archivo. No se realizó la eliminación.")
-                    else:
-                        messagebox.showwarning("Advertencia", f"No se pudo encontrar el final de la tarjeta del producto '{sku}'.")
-                else:
-                    messagebox.showwarning("Advertencia", f"No se pudo encontrar la estructura de la tarjeta del producto '{sku}'.")
+            # El índice del catálogo ubica la tarjeta (y sus duplicados) sin recorrer el HTML a mano
+            resumen = actualizar_tarjetas_en_archivo(self.catalogo_path, {sku.strip(): None})
+            if resumen['eliminadas']:
+                messagebox.showinfo("Éxito", f"Tarjeta del producto '{sku}' eliminada correctamente del catálogo.")
             else:
-                # Si no hay comentario, buscar por SKU en el contenido de manera más segura
-                # Buscar en los atributos alt de las imágenes
-                patron_alt = rf'alt="[^"]*{re.escape(sku)}[^"]*"'
-                match_alt = re.search(patron_alt, contenido)
-                
-                if match_alt:
-                    # Encontrar el div padre que contiene esta imagen
-                    pos_alt = match_alt.start()
-                    
-                    # Buscar hacia atrás para encontrar el div de inicio
-                    pos = pos_alt
-                    while pos >= 0:
-                        if contenido[pos:pos+5] == '<div ' and 'product-card' in contenido[pos:pos+100]:
-                            div_inicio = pos
-                            break
-                        pos -= 1
-                    else:
-                        messagebox.showwarning("Advertencia", f"No se pudo encontrar la estructura de la tarjeta del producto '{sku}'.")
-                        return
-                    
-                    # Encontrar el div de cierre correspondiente
-                    nivel = 0
-                    pos = div_inicio
-                    div_fin = -1
-                    
-                    while pos < len(contenido):
-                        if contenido[pos:pos+5] == '<div ':
-                            nivel += 1
-                        elif contenido[pos:pos+6] == '</div>':
-                            nivel -= 1
-                            if nivel == 0:
-                                div_fin = pos + 6
-                                break
-                        pos += 1
-                    
-                    if div_fin != -1:
-                        # Eliminar el div completo
-                        contenido_nuevo = contenido[:div_inicio] + contenido[div_fin:]
-                        
-                        # Verificar que el contenido no se haya corrompido
-                        # El contenido nuevo debe ser menor que el original (porque eliminamos algo)
-                        # pero no demasiado menor (máximo 20% menos)
-                        if len(contenido_nuevo) < len(contenido_original) and len(contenido_nuevo) > len(contenido_original) * 0.8:
-                            with open(self.catalogo_path, 'w', encoding='utf-8') as f:
-                                f.write(contenido_nuevo)
-                            messagebox.showinfo("Éxito", f"Tarjeta del producto '{sku}' eliminada correctamente del catálogo.")
-                        else:
-                            messagebox.showerror("Error", "Se detectó una posible corrupción del archivo. No se realizó la eliminación.")
-                    else:
-                        messagebox.showwarning("Advertencia", f"No se pudo encontrar el final de la tarjeta del producto '{sku}'.")
-                else:
-                    messagebox.showwarning("Advertencia", f"No se encontró la tarjeta del producto '{sku}' en el catálogo.")
+                messagebox.showwarning("Advertencia", f"No se encontró la tarjeta del producto '{sku}' en el catálogo.")
                 
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Error al eliminar la tarjeta: {str(e)}")
 
@@ -2571,7 +4105,7 @@ class GeneradorCatalogoApp:
     
     def seleccionar_todos_tarjetas(self):
         """Selecciona todos los productos en la pestaña de tarjetas"""
-        if not hasattr(self, 'tree_tarjetas') or not self.df is not None:
+        if not hasattr(self, 'tree_tarjetas') or not self.campos_csv:
             return
         
         self.productos_seleccionados_tarjetas.clear()
@@ -2652,12 +4186,14 @@ class GeneradorCatalogoApp:
         if not selection:
             return
         
+        skus = []
         for item in selection:
             sku = self.tree_tarjetas.set(item, 'Valor(es) del atributo 1')
             self.set_estado_fila_tarjetas(sku, estado)
             self.update_checkbox_and_color_tarjetas(item)
+            skus.append(sku)
         
-        self.guardar_historial_estado()
+        self.guardar_historial_estado(*skus)
     
     def set_estado_fila_tarjetas(self, sku, estado):
         """Establece el estado de una fila en la pestaña de tarjetas"""
@@ -2683,10 +4219,6 @@ class GeneradorCatalogoApp:
         
         color = colores.get(estado, '#ffffff')
         
-        # Aplicar color a todas las columnas de la fila
-        for col in self.tree_tarjetas['columns']:
-            self.tree_tarjetas.set(rowid, col, self.tree_tarjetas.set(rowid, col))
-        
         # Configurar tags para colores
         tag_name = f"estado_{estado}"
         self.tree_tarjetas.tag_configure(tag_name, background=color)
@@ -2701,31 +4233,29 @@ class GeneradorCatalogoApp:
     def reiniciar_historial_tarjetas(self):
         """Reinicia el historial de estados en la pestaña de tarjetas"""
         if messagebox.askyesno("Confirmar", "¿Estás seguro de que quieres reiniciar el historial de estados?"):
-            # Limpiar estados
+            # Limpiar estados y borrar el historial guardado
             self.estado_filas.clear()
-            self.tarjetas_generadas.clear()
+            self.historial.descartar()
+            self.almacen.guardar_estados({})
+            self.almacen.limpiar_tarjetas()
             
             # Actualizar TreeView
             if hasattr(self, 'tree_tarjetas'):
                 for item in self.tree_tarjetas.get_children():
                     self.update_checkbox_and_color_tarjetas(item)
             
-            # Guardar cambios
-            self.guardar_historial_estado()
-            
             messagebox.showinfo("Éxito", "Historial reiniciado correctamente.")
     
     def configurar_columnas_tarjetas(self):
         """Configura las columnas del TreeView de tarjetas basándose en el CSV cargado"""
-        if self.df is None:
+        if not self.campos_csv:
             return
         
         # Limpiar TreeView
-        for item in self.tree_tarjetas.get_children():
-            self.tree_tarjetas.delete(item)
+        self.tree_tarjetas.delete(*self.tree_tarjetas.get_children())
         
         # Configurar columnas
-        columnas = ['Seleccionado'] + list(self.df.columns)
+        columnas = ['Seleccionado'] + self.campos_csv
         self.tree_tarjetas['columns'] = columnas
         
         # Configurar encabezados y anchos
@@ -2743,17 +4273,18 @@ class GeneradorCatalogoApp:
             self.tree_tarjetas.heading(col, text=col, anchor='w')
             self.tree_tarjetas.column(col, width=ancho, anchor='w')
         
-        # Llenar con datos
-        for index, row in self.df.iterrows():
-            valores = [''] + [str(row.get(col, '')) for col in self.df.columns]
-            item_id = self.tree_tarjetas.insert('', 'end', values=valores)
+        # Llenar con las filas del modelo compartido
+        col_sku = columnas.index('Valor(es) del atributo 1') - 1 if 'Valor(es) del atributo 1' in columnas else None
+        for idx, fila in enumerate(self.filas_productos):
+            item_id = self.tree_tarjetas.insert('', 'end', iid=str(idx), values=('',), fila=fila)
             
-            # Aplicar color basado en el historial
-            self.update_checkbox_and_color_tarjetas(item_id)
+            # Aplicar color basado en el historial (las filas sin estado quedan en blanco)
+            if col_sku is not None and col_sku < len(fila) and fila[col_sku] in self.estado_filas:
+                self.update_checkbox_and_color_tarjetas(item_id)
     
     def sincronizar_datos_tarjetas(self):
         """Sincroniza los datos del CSV con el TreeView de tarjetas"""
-        if self.df is not None:
+        if self.campos_csv:
             self.configurar_columnas_tarjetas()
     
     def generar_tarjetas_masivo(self):
@@ -2770,163 +4301,74 @@ class GeneradorCatalogoApp:
         if not self.logos_dict:
             messagebox.showwarning("Advertencia", "No se han cargado los logos de marcas. Algunas tarjetas podrían no tener logo.")
         
-        # Ejecutar generación en hilo separado
-        threading.Thread(target=self._generar_tarjetas_async, daemon=True).start()
+        # Ejecutar generación en hilo separado; la selección se copia en el hilo de la interfaz
+        items = sorted(self.productos_seleccionados_tarjetas, key=int)
+        threading.Thread(target=self._generar_tarjetas_async, args=(plantilla_path, items), daemon=True).start()
     
-    def _generar_tarjetas_async(self):
+    def _generar_tarjetas_async(self, plantilla_path, items):
         """Genera tarjetas de forma asíncrona"""
         try:
-            plantilla_path = self.entry_plantilla_tarjeta_masiva.get().strip()
+            total_productos = len(items)
+            
+            # Tiempos por etapa y latencia por tarjeta; el avance muestra tarjetas/s y ETA
+            medicion = MedicionLote('tarjetas', total_productos,
+                                    al_avanzar=lambda texto: self.despachador.texto(
+                                        self.progress_var_tarjetas, f"Generando tarjetas... {texto}"))
             
             # Cargar plantilla
-            plantilla_content = cargar_plantilla_html(plantilla_path)
+            with medicion.etapa('plantilla'):
+                plantilla_content = cargar_plantilla_html(plantilla_path)
             if not plantilla_content:
                 return
             
-            total_productos = len(self.productos_seleccionados_tarjetas)
-            productos_procesados = 0
+            self.despachador.texto(self.progress_var_tarjetas, f"Generando tarjetas... {medicion.texto_avance()}")
             
-            self.progress_var_tarjetas.set(f"Generando tarjetas... 0/{total_productos}")
+            with medicion.etapa('lectura_filas'):
+                links_redireccion = self.almacen.links()
+                # Las filas salen del almacén por posición (iid = posición), no del TreeView
+                registros = self.almacen.productos_en(int(item_id) for item_id in items)
+                lote = pd.DataFrame([registro or {} for registro in registros], columns=self.campos_csv).fillna('')
+            with medicion.etapa('render'):
+                generadas = generar_tarjetas_lote(lote, plantilla_content, self.logos_dict, links_redireccion,
+                                                  medicion=medicion)
             
-            for item_id in self.productos_seleccionados_tarjetas:
-                try:
-                    # Obtener datos del producto
-                    valores = {}
-                    for col in self.tree_tarjetas['columns']:
-                        if col != 'Seleccionado':
-                            valores[col] = self.tree_tarjetas.set(item_id, col)
-                    
-                    # Generar tarjeta
-                    tarjeta_html = self._generar_tarjeta_individual(valores, plantilla_content)
-                    
+            tarjetas = {}
+            with medicion.etapa('estado_tabla'):
+                for item_id, (sku, tarjeta_html) in zip(items, generadas):
                     if tarjeta_html:
                         # Guardar tarjeta generada
-                        sku = valores.get('Valor(es) del atributo 1', '')
-                        self.tarjetas_generadas[sku] = tarjeta_html
+                        tarjetas[sku] = tarjeta_html
                         
                         # Marcar como generado (morado)
                         self.set_estado_fila_tarjetas(sku, 'morado')
-                        self.root.after(0, lambda item=item_id: self.update_checkbox_and_color_tarjetas(item))
-                    
-                    productos_procesados += 1
-                    self.progress_var_tarjetas.set(f"Generando tarjetas... {productos_procesados}/{total_productos}")
-                    
-                except Exception as e:
-                    print(f"Error procesando producto: {e}")
-                    continue
+                        self.despachador.estado(('tarjetas', item_id), self.update_checkbox_and_color_tarjetas, item_id)
+            
+            # Guardar tarjetas e historial en el almacén
+            with medicion.etapa('almacen'):
+                self.almacen.guardar_tarjetas(tarjetas)
+            with medicion.etapa('historial'):
+                self.guardar_historial_estado(*tarjetas, inmediato=True)
             
-            # Guardar historial
-            self.guardar_historial_estado()
+            # El informe queda junto al almacén, donde se guardan las tarjetas
+            guardar_informe(os.path.dirname(os.path.abspath(self.almacen.path)), medicion,
+                            generadas=len(tarjetas), fallidas=total_productos - len(tarjetas))
             
-            self.progress_var_tarjetas.set(f"✅ Tarjetas generadas: {len(self.tarjetas_generadas)}")
-            messagebox.showinfo("Éxito", f"Se generaron {len(self.tarjetas_generadas)} tarjetas correctamente.")
+            total_tarjetas = self.almacen.total_tarjetas()
+            self.despachador.texto(
+                self.progress_var_tarjetas,
+                f"✅ Tarjetas generadas: {total_tarjetas} ({len(tarjetas)} en {medicion.transcurrido():.1f} s, "
+                f"{medicion.rendimiento():.1f}/s)")
+            self.despachador.llamar(messagebox.showinfo, "Éxito", f"Se generaron {total_tarjetas} tarjetas correctamente.")
             
         except Exception as e:
-            self.progress_var_tarjetas.set("❌ Error en la generación")
-            messagebox.showerror("Error", f"Error durante la generación: {str(e)}")
+            self.despachador.texto(self.progress_var_tarjetas, "❌ Error en la generación")
+            self.despachador.llamar(messagebox.showerror, "Error", f"Error durante la generación: {str(e)}")
     
-    def _generar_tarjeta_individual(self, producto_data, plantilla_content):
+    @staticmethod
+    def _generar_tarjeta_individual(producto_data, plantilla_content, logos_dict, links_redireccion):
         """Genera una tarjeta individual basada en los datos del producto"""
-        try:
-            # Extraer datos del producto
-            sku = producto_data.get('Valor(es) del atributo 1', '')
-            marca = producto_data.get('Valor(es) del atributo 2', '')
-            precio_normal = producto_data.get('Precio normal', '')
-            precio_descuento = producto_data.get('precio con descuento', '')
-            porcentaje_desc = producto_data.get('Porcentajede descuento', '')
-            
-            # Construir URLs de imágenes del CSV en orden original
-            imagenes_csv = [
-                producto_data.get('IMAGEN 1', ''),
-                producto_data.get('IMAGEN 2', ''),
-                producto_data.get('IMAGEN 3', '')
-            ]
-            
-            # Reordenar imágenes para la tarjeta según la lógica especificada
-            imagenes = reordenar_imagenes_para_tarjeta(imagenes_csv)
-            
-            # Buscar logo de la marca
-            logo_marca = buscar_logo_marca(marca, self.logos_dict)
-            
-            # Buscar link de redirección específico para este SKU
-            link_producto = self.links_redireccion.get(sku, f"#producto-{sku}")
-            
-            # Generar tarjeta usando la función existente
-            row_dict = {
-                'SKU': sku,
-                'Marca': marca,
-                'Valor(es) del atributo 1': sku,
-                'Valor(es) del atributo 2': marca
-            }
-            
-            # Usar la misma lógica que vista_previa_tarjeta
-            if not plantilla_content or plantilla_content.strip() == '':
-                # Usar plantilla por defecto si no hay plantilla cargada
-                plantilla_tarjeta = (
-                    '<!-- Tarjeta de Producto: {SKU} -->\n'
-                    '<div class="product-card" onclick="window.open(\'{LINK}\',\'_blank\')"\n'
-                    '  <div class="product-image-container multi-image-hover">\n'
-                    '    <div class="product-brand-overlay"><img src="{LOGO}" alt="Logo {MARCA}"></div>\n'
-                    '    <img src="{IMG1}" alt="{SKU} - {MARCA} - Vista 1" class="product-img active">\n'
-                    '    <img src="{IMG2}" alt="{SKU} - {MARCA} - Vista 2" class="product-img">\n'
-                    '    <img src="{IMG3}" alt="{SKU} - {MARCA} - Vista 3" class="product-img">\n'
-                    '  </div>\n'
-                    '  <div class="product-info">\n'
-                    '    <span class="product-brand">{MARCA}</span>\n'
-                    '    <h2 class="product-name">{SKU}</h2>\n'
-                    '    <p class="product-price">\n'
-                    '      <span class="old-price">{OLD_PRICE}</span>\n'
-                    '      <span class="new-price">{NEW_PRICE}</span>\n'
-                    '    </p>\n'
-                    '  </div>\n'
-                    '</div>'
-                )
-                # Verificar si hay descuento válido
-                def es_valido(valor):
-                    if valor is None:
-                        return False
-                    valor_str = str(valor).strip().lower()
-                    return bool(valor_str and valor_str not in ['nan', 'none', ''])
-                
-                tiene_descuento = es_valido(precio_descuento) and es_valido(porcentaje_desc)
-                
-                # Determinar qué precios mostrar
-                if tiene_descuento:
-                    old_price_display = precio_normal if precio_normal else ''
-                    new_price_display = precio_descuento if precio_descuento else ''
-                else:
-                    old_price_display = ''  # No mostrar precio tachado
-                    new_price_display = precio_normal if precio_normal else ''  # Mostrar precio normal como principal
-                
-                tarjeta_html = plantilla_tarjeta.format(
-                    SKU=sku,
-                    MARCA=marca,
-                    LOGO=logo_marca,
-                    IMG1=imagenes[0] if len(imagenes) > 0 else '',
-                    IMG2=imagenes[1] if len(imagenes) > 1 else '',
-                    IMG3=imagenes[2] if len(imagenes) > 2 else '',
-                    OLD_PRICE=old_price_display,
-                    NEW_PRICE=new_price_display,
-                    LINK=link_producto
-                )
-            else:
-                # Usar plantilla cargada con generar_tarjeta_catalogo
-                tarjeta_html = generar_tarjeta_catalogo(
-                    row_dict,
-                    imagenes,
-                    logo_marca,
-                    link_producto,
-                    precio_normal,
-                    precio_descuento,
-                    porcentaje_desc,
-                    plantilla_content
-                )
-            
-            return tarjeta_html
-            
-        except Exception as e:
-            print(f"Error generando tarjeta para {producto_data.get('Valor(es) del atributo 1', 'SKU desconocido')}: {e}")
-            return None
+        return generar_tarjetas_lote(pd.DataFrame([producto_data]), plantilla_content,
+                                     logos_dict, links_redireccion)[0][1]
     
     def cargar_logos_tarjetas(self):
         """Carga archivo de logos específico para la pestaña de tarjetas"""
@@ -2938,33 +4380,13 @@ class GeneradorCatalogoApp:
             self.entry_logos_tarjetas.delete(0, tk.END)
             self.entry_logos_tarjetas.insert(0, filename)
             
-            # Cargar logos usando la función existente
+            # Añadir logos al resolutor (se vuelven a resolver las marcas del inventario)
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    contenido = f.read()
-                
-                # Procesar líneas del archivo
-                lineas = contenido.strip().split('\n')
-                logos_cargados = 0
-                
-                for linea in lineas:
-                    linea = linea.strip()
-                    if linea and (':' in linea or '=' in linea):
-                        try:
-                            # Manejar tanto ':' como '=' como separadores
-                            if ':' in linea:
-                                marca, url = linea.split(':', 1)
-                            else:
-                                marca, url = linea.split('=', 1)
-                            marca = marca.strip()
-                            url = url.strip()
-                            if marca and url:
-                                self.logos_dict[marca] = url
-                                logos_cargados += 1
-                        except ValueError:
-                            continue
-                
-                messagebox.showinfo("Éxito", f"Se cargaron {logos_cargados} logos de marcas.")
+                logos = leer_archivo_logos(filename)
+                self.logos_dict.update(logos)
+                self._precalcular_logos()
+                _RENDER_CACHE.clear()
+                messagebox.showinfo("Éxito", f"Se cargaron {len(logos)} logos de marcas.")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Error al cargar logos: {str(e)}")
@@ -2980,43 +4402,18 @@ class GeneradorCatalogoApp:
             self.entry_links_redireccion.insert(0, filename)
             
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    contenido = f.read()
-                
-                # Procesar líneas del archivo
-                lineas = contenido.strip().split('\n')
-                links_cargados = 0
-                
-                for linea in lineas:
-                    linea = linea.strip()
-                    if linea and (':' in linea or '=' in linea):
-                        try:
-                            # Manejar tanto ':' como '=' como separadores
-                            if ':' in linea:
-                                sku, url = linea.split(':', 1)
-                            else:
-                                sku, url = linea.split('=', 1)
-                            sku = sku.strip()
-                            url = url.strip()
-                            
-                            # Remover prefijo 'Producto-' si existe
-                            if sku.startswith('Producto-'):
-                                sku = sku[9:]  # Remover 'Producto-'
-                            
-                            if sku and url:
-                                self.links_redireccion[sku] = url
-                                links_cargados += 1
-                        except ValueError:
-                            continue
-                
-                messagebox.showinfo("Éxito", f"Se cargaron {links_cargados} links de redirección.")
+                links = leer_archivo_links(filename)
+                self.almacen.guardar_links(links)
+                _RENDER_CACHE.clear()
+                messagebox.showinfo("Éxito", f"Se cargaron {len(links)} links de redirección.")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Error al cargar links: {str(e)}")
     
     def insertar_tarjetas_en_catalogo(self):
         """Inserta todas las tarjetas generadas en el catálogo"""
-        if not self.tarjetas_generadas:
+        tarjetas_generadas = self.almacen.tarjetas()
+        if not tarjetas_generadas:
             messagebox.showwarning("Advertencia", "No hay tarjetas generadas para insertar.")
             return
         
@@ -3026,50 +4423,650 @@ class GeneradorCatalogoApp:
             return
         
         try:
-            # Leer catálogo actual
-            with open(catalogo_path, 'r', encoding='utf-8') as f:
-                contenido_catalogo = f.read()
-            
-            # Verificar que el contenido no esté corrupto
-            if len(contenido_catalogo.strip()) == 0:
-                messagebox.showerror("Error", "El archivo de catálogo está vacío o corrupto.")
-                return
-            
-            # Preparar todas las tarjetas para insertar
-            todas_las_tarjetas = '\n'.join(self.tarjetas_generadas.values())
-            
-            # Buscar el punto de inserción de manera más precisa
-            # Primero intentar encontrar </main>
-            if '</main>' in contenido_catalogo:
-                nuevo_contenido = contenido_catalogo.replace('</main>', f'{todas_las_tarjetas}\n</main>')
-            # Si no hay </main>, buscar antes del cierre del body
-            elif '</body>' in contenido_catalogo:
-                nuevo_contenido = contenido_catalogo.replace('</body>', f'{todas_las_tarjetas}\n</body>')
-            # Si no hay ninguno, agregar al final del archivo
+            if self.actualizar_existentes_tarjetas.get():
+                # Upsert en una sola reescritura: reemplaza las tarjetas existentes y añade solo las nuevas
+                cambios = {sku.strip(): html for sku, html in tarjetas_generadas.items()}
+                resumen = actualizar_tarjetas_en_archivo(catalogo_path, cambios)
+                mensaje = (f"Catálogo actualizado: {resumen['reemplazadas']} tarjetas reemplazadas "
+                           f"y {resumen['añadidas']} añadidas.")
+                if resumen['eliminadas']:
+                    mensaje += f"\nSe eliminaron {resumen['eliminadas']} tarjetas duplicadas."
             else:
-                nuevo_contenido = contenido_catalogo + '\n' + todas_las_tarjetas
-            
-            # Verificar que el nuevo contenido sea válido
-            if len(nuevo_contenido) < len(contenido_catalogo):
-                messagebox.showerror("Error", "Se detectó un problema con la inserción. No se realizó el cambio.")
-                return
+                # Inserción por bloques: el catálogo no se carga completo en memoria
+                insertadas = insertar_tarjetas_en_archivo(catalogo_path, tarjetas_generadas.values())
+                mensaje = f"Se insertaron {insertadas} tarjetas en el catálogo correctamente."
             
-            # Crear una copia de respaldo antes de escribir
-            backup_path = catalogo_path + '.backup'
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(contenido_catalogo)
-            
-            # Escribir catálogo actualizado
-            with open(catalogo_path, 'w', encoding='utf-8') as f:
-                f.write(nuevo_contenido)
-            
-            messagebox.showinfo("Éxito", f"Se insertaron {len(self.tarjetas_generadas)} tarjetas en el catálogo correctamente.")
+            messagebox.showinfo("Éxito", mensaje)
             
             # Limpiar tarjetas generadas después de insertar
-            self.tarjetas_generadas.clear()
+            self.almacen.limpiar_tarjetas()
             
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Error al insertar tarjetas en el catálogo: {str(e)}")
+    
+    def crear_catalogo_paginado(self):
+        """Reparte las tarjetas del catálogo (más las generadas pendientes) en páginas"""
+        catalogo_path = self.entry_catalogo_masivo.get().strip()
+        if not catalogo_path or not os.path.exists(catalogo_path):
+            messagebox.showerror("Error", "Selecciona un archivo de catálogo válido.")
+            return
+        try:
+            tam_pagina = int(self.tam_pagina_catalogo.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", "El número de tarjetas por página debe ser un entero.")
+            return
+        
+        directorio = filedialog.askdirectory(title="Directorio para el catálogo paginado")
+        if not directorio:
+            return
+        
+        try:
+            # Tarjetas del catálogo; las generadas pendientes reemplazan a las de su SKU
+            indice = indice_catalogo(catalogo_path)
+            tarjetas = {sku: indice.tarjeta(sku) for sku in indice.skus()}
+            tarjetas.update({sku.strip(): html for sku, html in self.almacen.tarjetas().items()})
+            
+            escritos = generar_catalogo_paginado(tarjetas.values(), directorio, envoltura=indice.contenido,
+                                                 tam_pagina=tam_pagina, orden=self.orden_catalogo.get())
+            messagebox.showinfo("Éxito", f"Catálogo paginado: {len(tarjetas)} tarjetas en "
+                                         f"{len(escritos) - 1} páginas.\nÍndice: {escritos[-1]}")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al generar el catálogo paginado: {str(e)}")
+
+# ---------------- ESCRITURA DEL CATÁLOGO ----------------
+_TAM_BLOQUE_CATALOGO = 64 * 1024
+# Las tarjetas se insertan antes de </main>; si no existe, antes de </body>; si no, al final
+_MARCADORES_INSERCION = (b'</main>', b'</body>')
+
+def _analizar_catalogo(path, tam_bloque=_TAM_BLOQUE_CATALOGO):
+    """Recorre el catálogo por bloques y devuelve ({marcador: primera posición en bytes}, tiene_contenido)."""
+    posiciones = {}
+    tiene_contenido = False
+    solape = max(len(m) for m in _MARCADORES_INSERCION) - 1
+    desplazamiento = 0  # posición absoluta del inicio de `previo`
+    previo = b''
+    with open(path, 'rb') as f:
+        while len(posiciones) < len(_MARCADORES_INSERCION):
+            bloque = f.read(tam_bloque)
+            if not bloque:
+                break
+            tiene_contenido = tiene_contenido or bool(bloque.strip())
+            datos = previo + bloque
+            for marcador in _MARCADORES_INSERCION:
+                if marcador not in posiciones:
+                    pos = datos.find(marcador)
+                    if pos != -1:
+                        posiciones[marcador] = desplazamiento + pos
+            corte = max(0, len(datos) - solape)
+            desplazamiento += corte
+            previo = datos[corte:]
+    return posiciones, tiene_contenido
+
+def _copiar_bytes(origen, destino, cantidad, tam_bloque=_TAM_BLOQUE_CATALOGO):
+    """Copia exactamente `cantidad` bytes de origen a destino por bloques."""
+    while cantidad > 0:
+        bloque = origen.read(min(tam_bloque, cantidad))
+        if not bloque:
+            break
+        destino.write(bloque)
+        cantidad -= len(bloque)
+
+def insertar_tarjetas_en_archivo(catalogo_path, tarjetas, respaldo=True, tam_bloque=_TAM_BLOQUE_CATALOGO):
+    """Inserta las tarjetas (iterable de str) en el catálogo sin cargarlo completo en memoria.
+
+    Copia el catálogo por bloques a un archivo temporal, escribe las tarjetas en
+    el punto de inserción, copia el resto y reemplaza el original con os.replace.
+    Con respaldo=True deja una copia del original en <catalogo>.backup.
+    Devuelve cuántas tarjetas se insertaron; lanza ValueError si el catálogo está vacío.
+    """
+    posiciones, tiene_contenido = _analizar_catalogo(catalogo_path, tam_bloque)
+    if not tiene_contenido:
+        raise ValueError("El archivo de catálogo está vacío o corrupto.")
+    punto = next((posiciones[m] for m in _MARCADORES_INSERCION if m in posiciones), None)
+    
+    temporal = catalogo_path + '.tmp'
+    insertadas = 0
+    try:
+        with open(catalogo_path, 'rb') as origen, open(temporal, 'wb') as destino:
+            if punto is None:
+                shutil.copyfileobj(origen, destino, tam_bloque)
+                destino.write(b'\n')
+            else:
+                _copiar_bytes(origen, destino, punto, tam_bloque)
+            for tarjeta in tarjetas:
+                destino.write(tarjeta.encode('utf-8'))
+                destino.write(b'\n')
+                insertadas += 1
+            shutil.copyfileobj(origen, destino, tam_bloque)
+        if respaldo:
+            shutil.copyfile(catalogo_path, catalogo_path + '.backup')
+        os.replace(temporal, catalogo_path)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return insertadas
+
+class _LectorTarjetas(HTMLParser):
+    """Tokenizador que localiza las tarjetas product-card y su comentario de SKU."""
+    
+    def __init__(self, contenido):
+        super().__init__(convert_charrefs=False)
+        self._contenido = contenido
+        self._inicios_linea = [0] + [m.end() for m in re.finditer('\n', contenido)]
+        self._nivel = 0
+        self._comentario = None  # (inicio, sku) del último comentario de tarjeta
+        self._actual = None  # [inicio, nivel, sku del comentario, texto del h2]
+        self._en_nombre = False
+        self.tarjetas = []  # (sku, inicio, fin)
+        self.fin_main = None
+        self.fin_body = None
+    
+    def _posicion(self):
+        linea, columna = self.getpos()
+        return self._inicios_linea[linea - 1] + columna
+    
+    def handle_comment(self, data):
+        m = re.match(r'\s*Tarjeta de Producto:\s*(.*?)\s*$', data, re.S)
+        self._comentario = (self._posicion(), m.group(1)) if m else None
+    
+    def handle_starttag(self, tag, attrs):
+        clases = ' '.join(v or '' for n, v in attrs if n == 'class').split()
+        if tag == 'div':
+            self._nivel += 1
+            if self._actual is None and 'product-card' in clases:
+                inicio, sku = self._comentario or (self._posicion(), '')
+                self._actual = [inicio, self._nivel, sku, '']
+        elif tag == 'h2' and self._actual is not None and 'product-name' in clases:
+            self._en_nombre = True
+        self._comentario = None
+    
+    def handle_endtag(self, tag):
+        if tag == 'div':
+            if self._actual is not None and self._nivel == self._actual[1]:
+                inicio, _, sku, nombre = self._actual
+                # El comentario manda salvo que sea el placeholder de la plantilla
+                if not sku or sku.startswith('PLACEHOLDER'):
+                    sku = nombre.strip()
+                fin = self._contenido.find('>', self._posicion()) + 1
+                self.tarjetas.append((sku, inicio, fin))
+                self._actual = None
+            self._nivel = max(0, self._nivel - 1)
+        elif tag == 'h2':
+            self._en_nombre = False
+        elif tag == 'main' and self.fin_main is None:
+            self.fin_main = self._posicion()
+        elif tag == 'body' and self.fin_body is None:
+            self.fin_body = self._posicion()
+        self._comentario = None
+    
+    def handle_data(self, data):
+        if self._en_nombre:
+            self._actual[3] += data
+        if data.strip():
+            self._comentario = None
+
+class IndiceTarjetas:
+    """Índice SKU -> posiciones (inicio, fin) de las tarjetas de un catálogo HTML.
+    
+    Se construye una vez por versión del archivo; eliminar, reemplazar y añadir
+    tarjetas son operaciones de slicing que se aplican juntas en una sola reescritura.
+    """
+    
+    def __init__(self, contenido):
+        lector = _LectorTarjetas(contenido)
+        lector.feed(contenido)
+        lector.close()
+        self.contenido = contenido
+        self.posiciones = OrderedDict()  # sku -> [(inicio, fin), ...] en orden de aparición
+        for sku, inicio, fin in lector.tarjetas:
+            self.posiciones.setdefault(sku, []).append((inicio, fin))
+        punto = lector.fin_main if lector.fin_main is not None else lector.fin_body
+        self._sin_marcador = punto is None
+        self.punto_insercion = len(contenido) if punto is None else punto
+    
+    def __contains__(self, sku):
+        return sku in self.posiciones
+    
+    def __len__(self):
+        return len(self.posiciones)
+    
+    def skus(self):
+        return list(self.posiciones)
+    
+    def tarjeta(self, sku):
+        """HTML de la primera tarjeta del SKU, o None."""
+        spans = self.posiciones.get(sku)
+        if not spans:
+            return None
+        inicio, fin = spans[0]
+        return self.contenido[inicio:fin]
+    
+    def _linea_completa(self, inicio, fin):
+        """Amplía (inicio, fin) a las líneas completas si la tarjeta ocupa sus propias líneas."""
+        c = self.contenido
+        i = inicio
+        while i > 0 and c[i - 1] in ' \t':
+            i -= 1
+        if i > 0 and c[i - 1] != '\n':
+            return inicio, fin
+        f = fin
+        while f < len(c) and c[f] in ' \t\r':
+            f += 1
+        if f < len(c) and c[f] != '\n':
+            return inicio, fin
+        return i, min(f + 1, len(c))
+    
+    def aplicar(self, cambios):
+        """Aplica {sku: html | None} y devuelve (contenido nuevo, resumen).
+        
+        Con html se reemplaza la primera tarjeta del SKU y se eliminan sus
+        duplicados; con None se eliminan todas. Los SKU que no están en el
+        índice se añaden en el punto de inserción (antes de </main>).
+        """
+        ediciones = []  # (inicio, fin, texto)
+        nuevas = []
+        resumen = {'reemplazadas': 0, 'eliminadas': 0, 'añadidas': 0}
+        for sku, html in cambios.items():
+            spans = self.posiciones.get(sku)
+            if not spans:
+                if html is not None:
+                    nuevas.append(html.strip() + '\n')
+                    resumen['añadidas'] += 1
+                continue
+            for n, (inicio, fin) in enumerate(spans):
+                if html is not None and n == 0:
+                    ediciones.append((inicio, fin, html.strip()))
+                    resumen['reemplazadas'] += 1
+                else:
+                    ediciones.append(self._linea_completa(inicio, fin) + ('',))
+                    resumen['eliminadas'] += 1
+        if nuevas:
+            prefijo = '\n' if self._sin_marcador else ''
+            ediciones.append((self.punto_insercion, self.punto_insercion, prefijo + ''.join(nuevas)))
+        
+        partes = []
+        cursor = 0
+        for inicio, fin, texto in sorted(ediciones, key=lambda e: (e[0], e[1])):
+            partes.append(self.contenido[cursor:inicio])
+            partes.append(texto)
+            cursor = fin
+        partes.append(self.contenido[cursor:])
+        return ''.join(partes), resumen
+
+_INDICES_CATALOGO = {}
+
+def indice_catalogo(catalogo_path):
+    """Índice de tarjetas del catálogo; se reconstruye solo si el archivo cambió."""
+    clave = os.path.abspath(catalogo_path)
+    estado = os.stat(catalogo_path)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    guardado = _INDICES_CATALOGO.get(clave)
+    if guardado and guardado[0] == firma:
+        return guardado[1]
+    with open(catalogo_path, 'r', encoding='utf-8', newline='') as f:
+        contenido = f.read()
+    if not contenido.strip():
+        raise ValueError("El archivo de catálogo está vacío o corrupto.")
+    indice = IndiceTarjetas(contenido)
+    _INDICES_CATALOGO[clave] = (firma, indice)
+    return indice
+
+def actualizar_tarjetas_en_archivo(catalogo_path, cambios, respaldo=True):
+    """Aplica {sku: html | None} al catálogo en una sola reescritura y devuelve el resumen."""
+    indice = indice_catalogo(catalogo_path)
+    contenido, resumen = indice.aplicar(cambios)
+    if contenido == indice.contenido:
+        return resumen
+    
+    temporal = catalogo_path + '.tmp'
+    try:
+        with open(temporal, 'w', encoding='utf-8', newline='') as f:
+            f.write(contenido)
+        if respaldo:
+            shutil.copyfile(catalogo_path, catalogo_path + '.backup')
+        os.replace(temporal, catalogo_path)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return resumen
+
+# ---------------- CATÁLOGO PAGINADO ----------------
+ORDENES_CATALOGO = ('marca', 'precio', 'descuento')
+
+_ENVOLTURA_CATALOGO = '<main class="product-grid">\n</main>\n'
+
+def _numero_en_texto(texto):
+    """Primer número de un texto como '$2,550.00' o '15%'; None si no hay."""
+    m = re.search(r'\d[\d,]*(?:\.\d+)?', texto or '')
+    return float(m.group(0).replace(',', '')) if m else None
+
+def clave_orden_tarjeta(html, orden='marca'):
+    """Clave de ordenamiento de una tarjeta a partir de su HTML (marca, precio o descuento)."""
+    def texto(clase):
+        m = re.search(rf'class="{clase}(?:\s[^"]*)?">([^<]*)<', html)
+        return m.group(1).strip() if m else ''
+    
+    marca = texto('product-brand').lower()
+    nombre = texto('product-name')
+    if orden == 'precio':
+        precio = _numero_en_texto(texto('new-price'))
+        return (precio is None, precio or 0, marca, nombre)
+    if orden == 'descuento':
+        descuento = _numero_en_texto(texto('discount-badge'))
+        return (-(descuento or 0), marca, nombre)
+    return (marca, nombre)
+
+def _nav_paginacion(actual, total, prefijo):
+    """Fragmento <nav> con enlaces a la página anterior, las páginas y la siguiente."""
+    enlaces = []
+    if actual > 1:
+        enlaces.append(f'<a class="page-prev" href="{prefijo}_{actual - 1}.html">&laquo; Anterior</a>')
+    for n in range(1, total + 1):
+        if n == actual:
+            enlaces.append(f'<span class="page-current">{n}</span>')
+        else:
+            enlaces.append(f'<a href="{prefijo}_{n}.html">{n}</a>')
+    if actual < total:
+        enlaces.append(f'<a class="page-next" href="{prefijo}_{actual + 1}.html">Siguiente &raquo;</a>')
+    return '<nav class="catalog-pagination">\n  ' + '\n  '.join(enlaces) + '\n</nav>\n'
+
+def generar_catalogo_paginado(tarjetas, directorio, envoltura=None, tam_pagina=48, orden='marca', prefijo='catalogo'):
+    """Reparte las tarjetas en páginas de tam_pagina tarjetas y escribe un índice con la paginación.
+    
+    tarjetas es un iterable de HTML. envoltura es el HTML de un catálogo (estilos y
+    <main class="product-grid">): se le quitan sus tarjetas y cada página pone las
+    suyas en el mismo lugar. Escribe <prefijo>_1.html ... <prefijo>_N.html y
+    <prefijo>_indice.html, borra páginas sobrantes de una ejecución anterior y
+    devuelve la lista de archivos escritos.
+    """
+    if orden not in ORDENES_CATALOGO:
+        raise ValueError(f"Orden no válido: {orden}")
+    tam_pagina = max(1, int(tam_pagina))
+    tarjetas = sorted((t.strip() for t in tarjetas if t and t.strip()), key=lambda t: clave_orden_tarjeta(t, orden))
+    paginas = [tarjetas[i:i + tam_pagina] for i in range(0, len(tarjetas), tam_pagina)] or [[]]
+    
+    # Envoltura sin tarjetas, partida en el punto de inserción
+    indice = IndiceTarjetas(envoltura or _ENVOLTURA_CATALOGO)
+    vacia, _ = indice.aplicar({sku: None for sku in indice.skus()})
+    punto = IndiceTarjetas(vacia).punto_insercion
+    cabecera, pie = vacia[:punto], vacia[punto:]
+    
+    os.makedirs(directorio, exist_ok=True)
+    escritos = []
+    total = len(paginas)
+    for n, pagina in enumerate(paginas, 1):
+        nav = _nav_paginacion(n, total, prefijo)
+        pie_pagina = pie.replace('</main>', '</main>\n' + nav, 1) if '</main>' in pie else nav + pie
+        ruta = os.path.join(directorio, f'{prefijo}_{n}.html')
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(cabecera)
+            for tarjeta in pagina:
+                f.write(tarjeta)
+                f.write('\n')
+            f.write(pie_pagina)
+        escritos.append(ruta)
+    
+    # Páginas sobrantes de una ejecución anterior con más páginas
+    patron_pagina = re.compile(rf'{re.escape(prefijo)}_(\d+)\.html$')
+    for nombre in os.listdir(directorio):
+        m = patron_pagina.match(nombre)
+        if m and int(m.group(1)) > total:
+            os.remove(os.path.join(directorio, nombre))
+    
+    # Índice: una entrada por página con el rango que cubre
+    filas = []
+    for n, pagina in enumerate(paginas, 1):
+        detalle = f'{len(pagina)} productos'
+        if pagina and orden == 'marca':
+            primera = clave_orden_tarjeta(pagina[0])[0].upper()
+            ultima = clave_orden_tarjeta(pagina[-1])[0].upper()
+            detalle += f': {primera}' if primera == ultima else f': {primera} – {ultima}'
+        filas.append(f'  <li><a href="{prefijo}_{n}.html">Página {n}</a> <span>({detalle})</span></li>')
+    ruta_indice = os.path.join(directorio, f'{prefijo}_indice.html')
+    with open(ruta_indice, 'w', encoding='utf-8') as f:
+        f.write('<nav class="catalog-index">\n<ul>\n' + '\n'.join(filas) + '\n</ul>\n</nav>\n')
+    escritos.append(ruta_indice)
+    return escritos
+
+# ---------------- MEDICIÓN DE GENERACIONES MASIVAS ----------------
+# Informe de la última generación, junto a la salida: .informe_paginas.json / .informe_tarjetas.json
+NOMBRE_INFORME = '.informe_{tipo}.json'
+
+class MedicionLote:
+    """Tiempos por etapa y latencia por producto de una generación masiva.
+
+    Las etapas se miden con `with medicion.etapa('render'):` o sumar(); cada
+    producto terminado se registra con producto(segundos) en un histograma.
+    Si se pasa al_avanzar(texto), se llama como máximo cada `intervalo`
+    segundos con el avance, el rendimiento (productos/s) y la ETA.
+    """
+
+    # Límites superiores (ms) de las cubetas del histograma de latencia; la última es "más"
+    LIMITES_LATENCIA_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+    def __init__(self, tipo, total, al_avanzar=None, intervalo=0.25):
+        self.tipo = tipo
+        self.total = total
+        self.al_avanzar = al_avanzar
+        self.intervalo = intervalo
+        self.fecha = datetime.now().isoformat(timespec='seconds')
+        self.inicio = time.perf_counter()
+        self.etapas = OrderedDict()  # etapa -> [segundos, veces]
+        self.cubetas = [0] * (len(self.LIMITES_LATENCIA_MS) + 1)
+        self.procesados = 0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+        self._ultimo_aviso = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar(nombre, time.perf_counter() - inicio)
+
+    def sumar(self, nombre, segundos, veces=1):
+        with self._lock:
+            acumulado = self.etapas.setdefault(nombre, [0.0, 0])
+            acumulado[0] += segundos
+            acumulado[1] += veces
+
+    def producto(self, segundos=None, cantidad=1):
+        """Registra productos terminados; con `segundos` suma su latencia al histograma."""
+        with self._lock:
+            self.procesados += cantidad
+            if segundos is not None:
+                self.cubetas[bisect.bisect_left(self.LIMITES_LATENCIA_MS, segundos * 1000)] += cantidad
+                self.latencia_total += segundos * cantidad
+                self.latencia_max = max(self.latencia_max, segundos)
+        ahora = time.perf_counter()
+        if self.al_avanzar and (ahora - self._ultimo_aviso >= self.intervalo or self.procesados >= self.total):
+            self._ultimo_aviso = ahora
+            self.al_avanzar(self.texto_avance())
+
+    def transcurrido(self):
+        return time.perf_counter() - self.inicio
+
+    def rendimiento(self):
+        transcurrido = self.transcurrido()
+        return self.procesados / transcurrido if transcurrido > 0 else 0.0
+
+    def eta(self):
+        """Segundos estimados para terminar, o None si todavía no hay rendimiento."""
+        rendimiento = self.rendimiento()
+        if not rendimiento:
+            return None
+        return max(0.0, (self.total - self.procesados) / rendimiento)
+
+    def texto_avance(self):
+        eta = self.eta()
+        texto_eta = '--:--' if eta is None else f"{int(eta) // 60:02d}:{int(eta) % 60:02d}"
+        return f"{self.procesados}/{self.total} · {self.rendimiento():.1f}/s · ETA {texto_eta}"
+
+    def informe(self, **resumen):
+        """Informe de la ejecución como dict (se guarda en JSON con guardar_informe)."""
+        duracion = self.transcurrido()
+        with self._lock:
+            etapas = {nombre: {'segundos': round(segundos, 6), 'veces': veces,
+                               'porcentaje': round(100 * segundos / duracion, 1) if duracion else 0.0}
+                      for nombre, (segundos, veces) in self.etapas.items()}
+            etiquetas = [f"<={limite}ms" for limite in self.LIMITES_LATENCIA_MS] + [f">{self.LIMITES_LATENCIA_MS[-1]}ms"]
+            medidos = sum(self.cubetas)
+            return {
+                'tipo': self.tipo,
+                'fecha': self.fecha,
+                'duracion_s': round(duracion, 6),
+                'total': self.total,
+                'procesados': self.procesados,
+                'productos_por_s': round(self.procesados / duracion, 1) if duracion else 0.0,
+                'resumen': resumen,
+                'etapas': etapas,
+                'latencia_ms': {
+                    'media': round(1000 * self.latencia_total / medidos, 3) if medidos else None,
+                    'max': round(1000 * self.latencia_max, 3),
+                    'histograma': dict(zip(etiquetas, self.cubetas)),
+                },
+            }
+
+def guardar_informe(directorio, medicion, **resumen):
+    """Escribe el informe JSON de la medición en el directorio de salida; devuelve la ruta o None."""
+    ruta = os.path.join(directorio, NOMBRE_INFORME.format(tipo=medicion.tipo))
+    try:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(medicion.informe(**resumen), f, ensure_ascii=False, indent=2)
+        return ruta
+    except OSError as e:
+        log.warning("No se pudo guardar el informe de generación: %s", e)
+        return None
+
+# ---------------- REGENERACIÓN INCREMENTAL ----------------
+# Manifiesto guardado en el directorio de salida: {clave de la fila: {'huella': ..., 'archivo': ...}}
+NOMBRE_MANIFIESTO = '.manifiesto_paginas.json'
+
+def hash_contenido(texto):
+    """Devuelve el hash SHA-256 (hex) de un texto."""
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+def huella_producto(producto_data, hash_plantilla):
+    """Huella de todo lo que determina la página: campos de la fila, plantilla e imágenes reordenadas."""
+    imagenes = reordenar_imagenes_para_tarjeta([
+        producto_data.get('imagen1', '') or '',
+        producto_data.get('imagen2', '') or '',
+        producto_data.get('imagen3', '') or ''
+    ])
+    # Los campos *_num se derivan del texto de los precios, que ya forma parte de la huella
+    campos = sorted((k, v) for k, v in producto_data.items() if not k.endswith('_num'))
+    contenido = json.dumps([hash_plantilla, campos, imagenes], ensure_ascii=False)
+    return hash_contenido(contenido)
+
+def cargar_manifiesto(directorio):
+    """Carga el manifiesto de páginas generadas; devuelve {} si no existe o está dañado."""
+    try:
+        with open(os.path.join(directorio, NOMBRE_MANIFIESTO), 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+        return manifiesto if isinstance(manifiesto, dict) else {}
+    except Exception:
+        return {}
+
+def guardar_manifiesto(directorio, manifiesto, en_uso=()):
+    """Guarda el manifiesto de forma atómica (archivo temporal + os.replace).
+
+    Las páginas que el manifiesto anterior registraba y ya no usa ninguna entrada
+    del nuevo ni ninguna fila del inventario actual (`en_uso`, nombres de archivo)
+    se borran para no dejar archivos huérfanos. Los nombres se comparan sin
+    distinguir mayúsculas, como en Windows y macOS.
+    """
+    anteriores = {entrada.get('archivo') for entrada in cargar_manifiesto(directorio).values()
+                  if isinstance(entrada, dict)}
+    path = os.path.join(directorio, NOMBRE_MANIFIESTO)
+    temporal = path + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False)
+    os.replace(temporal, path)
+    vigentes = {entrada.get('archivo') for entrada in manifiesto.values() if isinstance(entrada, dict)}
+    vigentes = {archivo.casefold() for archivo in vigentes.union(en_uso) if archivo}
+    for archivo in anteriores:
+        if archivo and archivo.casefold() not in vigentes:
+            try:
+                os.remove(os.path.join(directorio, os.path.basename(archivo)))
+            except OSError:
+                pass
+
+def claves_paginas(skus):
+    """(clave del manifiesto, archivo de la página) de cada fila, en el orden del inventario.
+
+    La clave es el SKU, o 'SKU#n' para su n-ésima aparición, así cada fila tiene
+    su propia entrada aunque el SKU se repita ('' si la fila no tiene SKU). El
+    archivo es archivo_pagina(SKU, n), o con la posición de la fila si no hay SKU.
+    Si dos SKU distintos dan el mismo nombre seguro ('A/B' y 'A:B', nombres
+    recortados, mayúsculas), el de la fila posterior lleva además un hash de su
+    clave. Nada depende de qué filas se seleccionen ni en qué orden se generen.
+    """
+    apariciones = {}
+    usados = set()
+    claves = []
+    for posicion, sku in enumerate(skus, 1):
+        if sku:
+            n = apariciones[sku] = apariciones.get(sku, 0) + 1
+            clave = sku if n == 1 else f"{sku}#{n}"
+            archivo = archivo_pagina(sku, n)
+        else:
+            clave = ''
+            archivo = archivo_pagina('', posicion)
+        if archivo.casefold() in usados:
+            base = f"{archivo[:-len('.html')]}_{hash_contenido(clave or str(posicion))[:8]}"
+            archivo = f"{base}.html"
+            extra = 2
+            while archivo.casefold() in usados:
+                archivo = f"{base}_{extra}.html"
+                extra += 1
+            log.warning("La página de %r se guarda como %s: su nombre coincide con el de otra fila", sku, archivo)
+        usados.add(archivo.casefold())
+        claves.append((clave, archivo))
+    return claves
+
+def archivo_pagina(nombre_producto, sufijo):
+    """Nombre del archivo HTML de la página de un producto."""
+    return f"{GeneradorCatalogoApp._crear_nombre_archivo_seguro(nombre_producto, sufijo)}.html"
+
+def pagina_sin_cambios(manifiesto, directorio, clave, huella, archivo):
+    """True si la página de la fila ya se generó con la misma huella en el mismo archivo y este sigue existiendo."""
+    entrada = manifiesto.get(clave) if clave else None
+    if not entrada or entrada.get('huella') != huella or entrada.get('archivo') != archivo:
+        return False
+    return os.path.exists(os.path.join(directorio, archivo))
+
+def _generar_lote_paginas(plantilla_content, lote, directorio_salida):
+    """Genera y guarda un lote de páginas; se ejecuta en un proceso del pool.
+
+    lote es una lista de (archivo, item_id, producto_data). Devuelve una lista de
+    (item_id, sku, error, (s_render, s_escritura)) donde error es None si la
+    página se generó bien.
+    """
+    resultados = []
+    for archivo, item_id, producto_data in lote:
+        inicio = time.perf_counter()
+        render = 0.0
+        try:
+            html_content = GeneradorCatalogoApp._procesar_plantilla_masiva(plantilla_content, producto_data)
+            render = time.perf_counter() - inicio
+            ruta_archivo = os.path.join(directorio_salida, archivo)
+            with open(ruta_archivo, 'w', encoding='utf-8') as f:
+                f.write(html_content)
+            resultados.append((item_id, producto_data['sku'], None,
+                               (render, time.perf_counter() - inicio - render)))
+        except Exception as e:
+            resultados.append((item_id, producto_data.get('sku', ''), str(e),
+                               (render, time.perf_counter() - inicio - render)))
+    return resultados
 
 def reordenar_imagenes_para_tarjeta(imagenes):
     """
@@ -3113,7 +5110,180 @@ def reordenar_imagenes_para_tarjeta(imagenes):
     
     return imagenes_ordenadas[:3]
 
+# ---------------- MODO SIN INTERFAZ (CLI) ----------------
+def main(argv=None):
+    """Genera páginas y tarjetas sin interfaz gráfica (entry point generador-paginas)."""
+    parser = argparse.ArgumentParser(
+        prog='generador-paginas',
+        description='Genera páginas de producto y tarjetas de catálogo sin interfaz gráfica.'
+    )
+    parser.add_argument('datos', help='archivo CSV o XLSX de productos')
+    parser.add_argument('-o', '--salida', required=True, help='directorio de salida')
+    parser.add_argument('-p', '--plantilla-pagina', help='plantilla HTML de página de producto')
+    parser.add_argument('-t', '--plantilla-tarjeta', help='plantilla HTML de tarjeta de catálogo')
+    parser.add_argument('-l', '--logos', help='archivo de logos de marcas (marca: url)')
+    parser.add_argument('-k', '--links', help='archivo de links de redirección (Producto-SKU: url)')
+    parser.add_argument('--sku', action='append', help='generar solo este SKU (se puede repetir)')
+    parser.add_argument('--individual', action='store_true',
+                        help='generar las páginas como en la pestaña "Página Individual" (mismos nombres de archivo)')
+    parser.add_argument('--procesos', type=int, default=1,
+                        help='procesos en paralelo para las páginas (por defecto 1)')
+    parser.add_argument('--completo', action='store_true',
+                        help='regenerar todas las páginas aunque no hayan cambiado')
+    parser.add_argument('--tam-pagina', type=int,
+                        help='repartir las tarjetas en páginas de este tamaño (catalogo_N.html) en lugar de tarjetas.html')
+    parser.add_argument('--orden', choices=ORDENES_CATALOGO, default='marca',
+                        help='orden de las tarjetas en el catálogo paginado (por defecto marca)')
+    parser.add_argument('--catalogo', help='catálogo HTML que sirve de envoltura para las páginas')
+    parser.add_argument('--log-nivel', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+                        help='nivel del registro (por defecto GENERADOR_LOG_NIVEL o WARNING)')
+    parser.add_argument('--log-archivo', help='archivo de registro rotativo (por defecto GENERADOR_LOG_ARCHIVO)')
+    args = parser.parse_args(argv)
+    configurar_registro(args.log_nivel, args.log_archivo)
+
+    if not args.plantilla_pagina and not args.plantilla_tarjeta:
+        parser.error('indica --plantilla-pagina, --plantilla-tarjeta o ambas')
+    for ruta in (args.datos, args.plantilla_pagina, args.plantilla_tarjeta, args.logos, args.links, args.catalogo):
+        if ruta and not os.path.exists(ruta):
+            parser.error(f"no existe el archivo '{ruta}'")
+    os.makedirs(args.salida, exist_ok=True)
+
+    # Registros con los mismos valores que muestra la tabla (NaN -> '')
+    df = leer_inventario(args.datos)
+    registros = df.to_dict('records')
+    # Clave del manifiesto y archivo de cada fila, según su lugar en todo el inventario
+    claves = claves_paginas(r.get('SKU', '') for r in registros)
+    archivos = {archivo for _, archivo in claves}
+    if args.sku:
+        skus = set(args.sku)
+        seleccion = [(r, c) for r, c in zip(registros, claves)
+                     if r.get('SKU') in skus or r.get('Valor(es) del atributo 1') in skus]
+        registros = [r for r, _ in seleccion]
+        claves = [c for _, c in seleccion]
+    print(f"Productos a procesar: {len(registros)}")
+
+    fallidos_totales = 0
+
+    if args.plantilla_pagina:
+        inicio = time.perf_counter()
+        medicion = MedicionLote('paginas', len(registros))
+        sin_cambios = 0
+        if args.individual:
+            resultados = []
+            for registro, (_, archivo) in zip(registros, claves):
+                sku = registro.get('SKU', '')
+                inicio_producto = time.perf_counter()
+                render = 0.0
+                try:
+                    imagenes = [registro.get('IMAGEN 1', ''), registro.get('IMAGEN 2', ''), registro.get('IMAGEN 3', '')]
+                    html = generar_pagina_individual_desde_plantilla(registro, imagenes, args.plantilla_pagina)
+                    render = time.perf_counter() - inicio_producto
+                    # Mismo nombre seguro que la generación masiva: el SKU no puede salir del directorio
+                    with open(os.path.join(args.salida, archivo), 'w', encoding='utf-8') as f:
+                        f.write(html)
+                    error = None
+                except Exception as e:
+                    error = str(e)
+                resultados.append((sku, sku, error, (render, time.perf_counter() - inicio_producto - render)))
+        else:
+            with open(args.plantilla_pagina, 'r', encoding='utf-8') as f:
+                plantilla_content = f.read()
+
+            # Solo se regeneran los productos cuya huella cambió desde la última ejecución
+            manifiesto = cargar_manifiesto(args.salida)
+            hash_plantilla = hash_contenido(plantilla_content)
+            tareas = []
+            entradas_manifiesto = {}
+            for i, (registro, (clave, archivo)) in enumerate(zip(registros, claves), 1):
+                with medicion.etapa('huella'):
+                    producto_data = producto_data_desde_registro(registro)
+                    huella = huella_producto(producto_data, hash_plantilla)
+                    omitir = not args.completo and pagina_sin_cambios(manifiesto, args.salida, clave, huella, archivo)
+                if omitir:
+                    sin_cambios += 1
+                    medicion.producto()
+                    continue
+                entradas_manifiesto[str(i)] = (clave, {'huella': huella, 'archivo': archivo})
+                tareas.append((archivo, str(i), producto_data))
+            print(f"Páginas sin cambios (omitidas): {sin_cambios}")
+            if args.procesos > 1 and len(tareas) > 1:
+                tamano_lote = max(1, min(50, len(tareas) // (args.procesos * 4)))
+                lotes = [tareas[i:i + tamano_lote] for i in range(0, len(tareas), tamano_lote)]
+                resultados = []
+                with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+                    for resultado_lote in pool.map(_generar_lote_paginas, [plantilla_content] * len(lotes),
+                                                   lotes, [args.salida] * len(lotes)):
+                        resultados.extend(resultado_lote)
+            else:
+                resultados = _generar_lote_paginas(plantilla_content, tareas, args.salida)
+
+            for item_id, _, error, _ in resultados:
+                clave, entrada = entradas_manifiesto[item_id]
+                if error is None and clave:
+                    manifiesto[clave] = entrada
+            with medicion.etapa('manifiesto'):
+                guardar_manifiesto(args.salida, manifiesto, archivos)
+
+        # Con varios procesos, render y escritura suman el tiempo de todos ellos
+        for _, _, _, (render, escritura) in resultados:
+            medicion.sumar('render', render)
+            medicion.sumar('escritura', escritura)
+            medicion.producto(render + escritura)
+        duracion = time.perf_counter() - inicio
+        fallidos = [r for r in resultados if r[2] is not None]
+        for _, sku, error, _ in fallidos:
+            print(f"Error generando página {sku}: {error}", file=sys.stderr)
+        generados = len(resultados) - len(fallidos)
+        fallidos_totales += len(fallidos)
+        ruta_informe = guardar_informe(args.salida, medicion, generados=generados, sin_cambios=sin_cambios,
+                                       fallidos=len(fallidos), procesos=args.procesos)
+        print(f"Páginas: {generados} generadas, {len(fallidos)} fallidas en {duracion:.2f} s "
+              f"({generados / duracion if duracion else 0:.1f} páginas/s)"
+              + (f"; informe en {ruta_informe}" if ruta_informe else ""))
+
+    if args.plantilla_tarjeta:
+        inicio = time.perf_counter()
+        medicion = MedicionLote('tarjetas', len(registros))
+        with medicion.etapa('plantilla'):
+            with open(args.plantilla_tarjeta, 'r', encoding='utf-8') as f:
+                plantilla_tarjeta = f.read()
+            logos_dict = ResolutorMarcas(leer_archivo_logos(args.logos) if args.logos else None)
+            links_redireccion = leer_archivo_links(args.links) if args.links else {}
+
+        tarjetas = []
+        lote = pd.DataFrame(registros, columns=df.columns)
+        with medicion.etapa('render'):
+            generadas = generar_tarjetas_lote(lote, plantilla_tarjeta, logos_dict, links_redireccion, medicion=medicion)
+        for _, tarjeta_html in generadas:
+            if tarjeta_html:
+                tarjetas.append(tarjeta_html)
+            else:
+                fallidos_totales += 1
+
+        with medicion.etapa('escritura'):
+            if args.tam_pagina:
+                envoltura = None
+                if args.catalogo:
+                    with open(args.catalogo, 'r', encoding='utf-8') as f:
+                        envoltura = f.read()
+                escritos = generar_catalogo_paginado(tarjetas, args.salida, envoltura=envoltura,
+                                                     tam_pagina=args.tam_pagina, orden=args.orden)
+                ruta_tarjetas = escritos[-1]
+            else:
+                ruta_tarjetas = os.path.join(args.salida, 'tarjetas.html')
+                with open(ruta_tarjetas, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(tarjetas))
+        duracion = time.perf_counter() - inicio
+        ruta_informe = guardar_informe(args.salida, medicion, generadas=len(tarjetas),
+                                       fallidas=len(registros) - len(tarjetas))
+        print(f"Tarjetas: {len(tarjetas)} generadas en {duracion:.2f} s "
+              f"({len(tarjetas) / duracion if duracion else 0:.1f} tarjetas/s) -> {ruta_tarjetas}"
+              + (f"; informe en {ruta_informe}" if ruta_informe else ""))
+
+    return 1 if fallidos_totales else 0
+
 if __name__ == "__main__":
+    configurar_registro()
     root = tk.Tk()
     app = GeneradorCatalogoApp(root)
     root.mainloop()
\ No newline at end of file
@@ -26,6 +26,8 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/opticaskairoz/sistema-generacion-paginas",
     packages=find_packages(),
+    # El programa es un único módulo en la raíz; el comando generador-paginas lo importa
+    py_modules=["programa_2"],
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
@@ -56,6 +58,9 @@ setup(
             "sphinx>=5.0.0",
             "sphinx-rtd-theme>=1.0.0",
         ],
+        "cache": [
+            "pyarrow>=10.0.0",
+        ],
     },
     entry_points={
         "console_scripts": [
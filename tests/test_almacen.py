@@ -0,0 +1,97 @@
+"""Almacén SQLite: productos por posición, estados, tarjetas y links."""
+
+import threading
+
+import pytest
+
+import programa_2 as p2
+
+COLUMNAS = ['SKU', 'Valor(es) del atributo 2', 'Precio normal']
+
+
+def registros(*filas):
+    return [dict(zip(COLUMNAS, fila)) for fila in filas]
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = p2.AlmacenProductos(str(tmp_path / 'catalogo.db'))
+    yield almacen
+    almacen.cerrar()
+
+
+def test_carga_por_posicion_con_sku_repetido(almacen):
+    bloques = [(COLUMNAS, registros(('A1', 'TOUS', '$1.00'), ('B1', 'Ray-Ban', '$2.00'))),
+               (COLUMNAS, registros(('A1', 'TOUS', '$3.00'), ('', 'TOUS', '$4.00')))]
+    assert almacen.cargar_productos(iter(bloques)) == 4
+    assert almacen.total_productos() == 4
+    assert almacen.columnas() == COLUMNAS
+    # Las dos filas de A1 se conservan, cada una con sus datos
+    assert almacen.posiciones_sku('A1') == [0, 2]
+    assert almacen.producto_en(2) == {'SKU': 'A1', 'Valor(es) del atributo 2': 'TOUS', 'Precio normal': '$3.00'}
+    assert almacen.producto_en(4) is None
+    assert almacen.skus() == ['A1', 'B1', 'A1', '']
+    assert sorted(almacen.marcas()) == ['Ray-Ban', 'TOUS']
+    assert [r and r['Precio normal'] for r in almacen.productos_en([3, 9, 0])] == ['$4.00', None, '$1.00']
+
+
+def test_nueva_carga_actualiza_y_borra_lo_que_sobra(almacen):
+    almacen.cargar_productos([(COLUMNAS, registros(('A1', 'TOUS', '$1.00'), ('B1', 'TOUS', '$2.00'),
+                                                    ('C1', 'CLOE', '$3.00')))])
+    assert almacen.cargar_productos([(COLUMNAS[:2], registros(('B1', 'ADIDAS')))]) == 1
+    assert almacen.skus() == ['B1']
+    assert almacen.marcas() == ['ADIDAS']
+    assert almacen.columnas() == COLUMNAS[:2]
+    assert almacen.posiciones_sku('C1') == []
+
+
+def test_carga_cancelada_conserva_la_anterior(almacen):
+    almacen.cargar_productos([(COLUMNAS, registros(('A1', 'TOUS', '$1.00')))])
+    cancelado = threading.Event()
+
+    def bloques():
+        yield COLUMNAS, registros(('X1', 'CLOE', '$9.00'), ('X2', 'CLOE', '$9.00'))
+        cancelado.set()
+        yield COLUMNAS, registros(('X3', 'CLOE', '$9.00'))
+
+    assert almacen.cargar_productos(bloques(), cancelado) is None
+    assert almacen.skus() == ['A1']
+
+
+def test_la_carga_no_bloquea_el_almacen(almacen):
+    # Mientras se leen los bloques, los estados se siguen escribiendo desde otra conexión
+    def bloques():
+        yield COLUMNAS, registros(('A1', 'TOUS', '$1.00'))
+        almacen.actualizar_estados({'A1': 'verde'})
+        assert almacen.estados() == {'A1': 'verde'}
+        yield COLUMNAS, registros(('B1', 'TOUS', '$2.00'))
+
+    assert almacen.cargar_productos(bloques()) == 2
+    assert almacen.skus() == ['A1', 'B1']
+
+
+def test_estados_tarjetas_y_links(almacen):
+    almacen.guardar_estados({'A1': 'verde', 'B1': 'rojo'})
+    almacen.actualizar_estados({'A1': 'morado', 'B1': None, 'C1': 'verde'})
+    assert almacen.estados() == {'A1': 'morado', 'C1': 'verde'}
+
+    almacen.guardar_tarjetas({'B1': '<b/>', 'A1': '<a/>'})
+    assert list(almacen.tarjetas()) == ['B1', 'A1'] and almacen.total_tarjetas() == 2
+    almacen.limpiar_tarjetas()
+    assert almacen.tarjetas() == {}
+
+    almacen.guardar_links({'A1': 'https://x/a1'})
+    assert almacen.links() == {'A1': 'https://x/a1'}
+
+
+def test_el_almacen_persiste_entre_aperturas(tmp_path):
+    path = str(tmp_path / 'catalogo.db')
+    almacen = p2.AlmacenProductos(path)
+    almacen.cargar_productos([(COLUMNAS, registros(('A1', 'TOUS', '$1.00')))])
+    almacen.actualizar_estados({'A1': 'verde'})
+    almacen.cerrar()
+
+    almacen = p2.AlmacenProductos(path)
+    assert almacen.producto_en(0)['SKU'] == 'A1'
+    assert almacen.estados() == {'A1': 'verde'}
+    almacen.cerrar()
@@ -0,0 +1,150 @@
+"""Inserción de tarjetas en el catálogo por streaming, índice de tarjetas por SKU, upsert y catálogo paginado."""
+
+import os
+
+import pytest
+
+import programa_2 as p2
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+with open(os.path.join(RAIZ, 'plantilla_tarjeta.html'), 'r', encoding='utf-8') as f:
+    PLANTILLA_TARJETA = f.read()
+
+
+def tarjeta(sku, marca='TOUS', precio='$1,000.00', precio_descuento='', descuento=''):
+    fila = {'Valor(es) del atributo 1': sku, 'Valor(es) del atributo 2': marca}
+    return p2.generar_tarjeta_catalogo(fila, ['a.webp', 'b.webp', 'c.webp'], '', '#' + sku,
+                                       precio, precio_descuento, descuento, PLANTILLA_TARJETA)
+
+
+def catalogo(*tarjetas):
+    return ('<html><body>\n<main class="product-grid">\n'
+            + ''.join(t + '\n' for t in tarjetas)
+            + '</main>\n</body></html>\n')
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    ruta = tmp_path / 'catalogo.html'
+    ruta.write_text(catalogo(tarjeta('A1'), tarjeta('B1')), encoding='utf-8')
+    return str(ruta)
+
+
+@pytest.mark.parametrize('tam_bloque', [7, 64, p2._TAM_BLOQUE_CATALOGO])
+def test_insertar_antes_de_main(archivo, tam_bloque):
+    original = open(archivo, encoding='utf-8').read()
+    nuevas = [tarjeta('C1'), tarjeta('D1')]
+    insertadas = p2.insertar_tarjetas_en_archivo(archivo, nuevas, tam_bloque=tam_bloque)
+    assert insertadas == 2
+    contenido = open(archivo, encoding='utf-8').read()
+    assert contenido == original.replace('</main>', nuevas[0] + '\n' + nuevas[1] + '\n</main>')
+    assert open(archivo + '.backup', encoding='utf-8').read() == original
+    assert not os.path.exists(archivo + '.tmp')
+
+
+@pytest.mark.parametrize('contenido, esperado', [
+    ('<html><body>\n</body></html>', '<html><body>\nX\n</body></html>'),
+    ('<div>sin cierre</div>', '<div>sin cierre</div>\nX\n'),
+])
+def test_insertar_sin_main(tmp_path, contenido, esperado):
+    ruta = tmp_path / 'catalogo.html'
+    ruta.write_text(contenido, encoding='utf-8')
+    assert p2.insertar_tarjetas_en_archivo(str(ruta), iter(['X']), respaldo=False, tam_bloque=5) == 1
+    assert ruta.read_text(encoding='utf-8') == esperado
+    assert not os.path.exists(str(ruta) + '.backup')
+
+
+def test_insertar_en_catalogo_vacio(tmp_path):
+    ruta = tmp_path / 'vacio.html'
+    ruta.write_text('  \n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        p2.insertar_tarjetas_en_archivo(str(ruta), [tarjeta('A1')])
+    assert ruta.read_text(encoding='utf-8') == '  \n'
+
+
+def test_indice_por_sku():
+    a, b = tarjeta('A1'), tarjeta('B1', marca='ADIDAS')
+    indice = p2.IndiceTarjetas(catalogo(a, b, a))
+    assert indice.skus() == ['A1', 'B1']
+    assert 'B1' in indice and 'C1' not in indice
+    assert indice.tarjeta('B1') == b.strip()
+    assert len(indice.posiciones['A1']) == 2
+
+
+def test_aplicar_reemplaza_elimina_y_anade():
+    indice = p2.IndiceTarjetas(catalogo(tarjeta('A1'), tarjeta('B1'), tarjeta('A1')))
+    nueva_a = tarjeta('A1', precio='$9,999.00')
+    contenido, resumen = indice.aplicar({'A1': nueva_a, 'B1': None, 'C1': tarjeta('C1')})
+    # El reemplazo también elimina el duplicado de A1
+    assert resumen == {'reemplazadas': 1, 'eliminadas': 2, 'añadidas': 1}
+    resultado = p2.IndiceTarjetas(contenido)
+    assert resultado.skus() == ['A1', 'C1']
+    assert resultado.tarjeta('A1') == nueva_a.strip()
+    assert contenido.rstrip().endswith('</main>\n</body></html>')
+
+
+def test_aplicar_sin_cambios_devuelve_el_mismo_contenido():
+    contenido = catalogo(tarjeta('A1'))
+    indice = p2.IndiceTarjetas(contenido)
+    assert indice.aplicar({})[0] == contenido
+    assert indice.aplicar({'Z9': None}) == (contenido, {'reemplazadas': 0, 'eliminadas': 0, 'añadidas': 0})
+
+
+def test_tarjeta_generada_lleva_su_sku():
+    assert '<!-- Tarjeta de Producto: RB2398 -->' in tarjeta('RB2398')
+    assert p2.IndiceTarjetas(catalogo(tarjeta('RB2398'))).skus() == ['RB2398']
+
+
+def test_actualizar_en_archivo(archivo):
+    resumen = p2.actualizar_tarjetas_en_archivo(archivo, {'A1': tarjeta('A1', precio='$5.00'), 'C1': tarjeta('C1')})
+    assert resumen == {'reemplazadas': 1, 'eliminadas': 0, 'añadidas': 1}
+    indice = p2.indice_catalogo(archivo)
+    assert indice.skus() == ['A1', 'B1', 'C1']
+    assert '$5.00' in indice.tarjeta('A1')
+    assert os.path.exists(archivo + '.backup')
+
+
+def test_actualizar_sin_cambios_no_reescribe(archivo):
+    os.utime(archivo, ns=(1, 1))
+    resumen = p2.actualizar_tarjetas_en_archivo(archivo, {'B1': tarjeta('B1')}, respaldo=False)
+    assert resumen['reemplazadas'] == 1
+    assert os.stat(archivo).st_mtime_ns == 1
+
+
+def test_upsert_repetido_produce_el_mismo_archivo(archivo):
+    cambios = {'A1': tarjeta('A1', precio='$5.00'), 'C1': tarjeta('C1')}
+    p2.actualizar_tarjetas_en_archivo(archivo, cambios, respaldo=False)
+    primera = open(archivo, encoding='utf-8').read()
+    resumen = p2.actualizar_tarjetas_en_archivo(archivo, cambios, respaldo=False)
+    assert resumen == {'reemplazadas': 2, 'eliminadas': 0, 'añadidas': 0}
+    assert open(archivo, encoding='utf-8').read() == primera
+
+
+def test_catalogo_paginado(tmp_path):
+    tarjetas = [tarjeta(f'P{n}', marca=marca) for n, marca in enumerate(['TOUS', 'ADIDAS', 'RAYBAN', 'CLOE', 'REEBOK'])]
+    directorio = str(tmp_path / 'paginas')
+    escritos = p2.generar_catalogo_paginado(tarjetas, directorio, tam_pagina=2)
+    assert [os.path.basename(r) for r in escritos] == [
+        'catalogo_1.html', 'catalogo_2.html', 'catalogo_3.html', 'catalogo_indice.html']
+    primera = open(escritos[0], encoding='utf-8').read()
+    # Orden por marca: ADIDAS y CLOE en la primera página, con enlace a la siguiente
+    assert p2.IndiceTarjetas(primera).skus() == ['P1', 'P3']
+    assert 'href="catalogo_2.html"' in primera and 'page-prev' not in primera
+    indice = open(escritos[-1], encoding='utf-8').read()
+    assert '(2 productos: ADIDAS – CLOE)' in indice
+
+    # Una ejecución con menos páginas borra las sobrantes
+    p2.generar_catalogo_paginado(tarjetas, directorio, tam_pagina=5)
+    assert sorted(os.listdir(directorio)) == ['catalogo_1.html', 'catalogo_indice.html']
+
+
+def test_catalogo_paginado_por_precio_con_envoltura(tmp_path):
+    envoltura = '<style>.x{}</style>\n' + catalogo(tarjeta('VIEJA'))
+    tarjetas = [tarjeta('CARA', precio='$3,000.00'), tarjeta('BARATA', precio='$500.00'),
+                tarjeta('OFERTA', precio='$2,000.00', precio_descuento='$1,000.00', descuento='50%')]
+    escritos = p2.generar_catalogo_paginado(tarjetas, str(tmp_path), envoltura=envoltura, tam_pagina=10, orden='precio')
+    pagina = open(escritos[0], encoding='utf-8').read()
+    assert pagina.startswith('<style>.x{}</style>')
+    assert p2.IndiceTarjetas(pagina).skus() == ['BARATA', 'OFERTA', 'CARA']
+    with pytest.raises(ValueError):
+        p2.generar_catalogo_paginado(tarjetas, str(tmp_path), orden='color')
@@ -0,0 +1,48 @@
+"""Comando generador-paginas (main) sin interfaz gráfica."""
+
+import csv
+import os
+
+import pytest
+
+import programa_2 as p2
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLANTILLA_PAGINA = os.path.join(RAIZ, 'pagina_producto_RB2398.html')
+
+
+def inventario(tmp_path, skus):
+    with open(os.path.join(RAIZ, 'Datos_2.csv'), 'r', encoding='utf-8') as f:
+        filas = list(csv.DictReader(f))[:len(skus)]
+    for fila, sku in zip(filas, skus):
+        fila['SKU'] = sku
+    ruta = tmp_path / 'datos.csv'
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=list(filas[0]))
+        escritor.writeheader()
+        escritor.writerows(filas)
+    return str(ruta)
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    """La cache del inventario de la CLI se escribe en el directorio de la prueba."""
+    monkeypatch.setenv('GENERADOR_CACHE_DIR', str(tmp_path / 'cache'))
+
+
+def paginas(directorio):
+    return sorted(n for n in os.listdir(directorio) if n.endswith('.html'))
+
+
+def test_individual_con_nombres_seguros(tmp_path):
+    datos = inventario(tmp_path, ['../../fuera', 'A|B:C', '', 'RB2398', 'RB2398'])
+    salida = tmp_path / 'salida'
+    assert p2.main([datos, '-o', str(salida), '-p', PLANTILLA_PAGINA, '--individual']) == 0
+    # El SKU no escapa del directorio de salida y los nombres son los de la generación masiva
+    assert paginas(salida) == ['.._.._fuera_1.html', 'A_B_C_1.html', 'RB2398_1.html', 'RB2398_2.html',
+                               'producto_3.html']
+    assert not os.path.exists(tmp_path / 'fuera_1.html')
+
+    masiva = tmp_path / 'masiva'
+    assert p2.main([datos, '-o', str(masiva), '-p', PLANTILLA_PAGINA]) == 0
+    assert paginas(masiva) == paginas(salida)
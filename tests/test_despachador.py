@@ -0,0 +1,109 @@
+"""DespachadorUI con una raíz falsa: los ticks se ejecutan a mano en lugar de con root.after."""
+
+import logging
+import threading
+
+import programa_2 as p2
+
+
+class RaizFalsa:
+    def __init__(self):
+        self.programados = []
+
+    def after(self, ms, funcion, *args):
+        self.programados.append((funcion, args))
+
+    def tick(self):
+        funcion, args = self.programados.pop(0)
+        funcion(*args)
+
+
+class VariableFalsa:
+    def __init__(self):
+        self.valores = []
+
+    def set(self, valor):
+        self.valores.append(valor)
+
+
+def despachador(presupuesto_ms=30):
+    raiz = RaizFalsa()
+    desp = p2.DespachadorUI(raiz, presupuesto_ms=presupuesto_ms)
+    desp.iniciar()
+    return raiz, desp
+
+
+def test_ultimo_estado_por_clave_en_orden_de_publicacion():
+    raiz, desp = despachador()
+    aplicados = []
+    desp.estado('a', aplicados.append, ('a', 0))
+    desp.estado('b', aplicados.append, ('b', 0))
+    desp.estado('a', aplicados.append, ('a', 1))
+    desp.llamar(aplicados.append, 'fin')
+    raiz.tick()
+    # 'a' se volvió a publicar después de 'b': pasa detrás
+    assert aplicados == [('b', 0), ('a', 1), 'fin']
+    assert len(raiz.programados) == 1
+
+
+def test_sin_presupuesto_aplica_un_estado_por_tick():
+    raiz, desp = despachador(presupuesto_ms=0)
+    aplicados = []
+    desp.estado('a', aplicados.append, 'a')
+    desp.estado('b', aplicados.append, 'b')
+    desp.llamar(aplicados.append, 'fin')
+    raiz.tick()
+    assert aplicados == ['a']
+    # Un estado nuevo espera detrás de los que siguen en la cola
+    desp.estado('c', aplicados.append, 'c')
+    raiz.tick()
+    raiz.tick()
+    assert aplicados == ['a', 'b', 'c', 'fin']
+
+
+def test_solo_el_ultimo_texto_del_tick():
+    raiz, desp = despachador()
+    variable = VariableFalsa()
+    for n in range(5):
+        desp.texto(variable, f'{n}/5')
+    raiz.tick()
+    raiz.tick()
+    assert variable.valores == ['4/5']
+
+
+def test_errores_se_registran_sin_detener_el_tick(caplog):
+    raiz, desp = despachador()
+    aplicados = []
+    desp.estado('a', lambda: 1 / 0)
+    desp.llamar(aplicados.append, 'fin')
+    with caplog.at_level(logging.ERROR, logger=p2.log.name):
+        raiz.tick()
+    assert aplicados == ['fin']
+    assert 'Error aplicando una actualización' in caplog.text
+    assert len(raiz.programados) == 1
+
+
+def test_detener():
+    raiz, desp = despachador()
+    aplicados = []
+    desp.detener()
+    desp.llamar(aplicados.append, 'x')
+    raiz.tick()
+    assert aplicados == [] and raiz.programados == []
+
+
+def test_publicacion_desde_hilos():
+    raiz, desp = despachador()
+    aplicados = {}
+
+    def trabajar(hilo):
+        for n in range(200):
+            desp.estado((hilo, n % 10), aplicados.__setitem__, (hilo, n % 10), n)
+
+    hilos = [threading.Thread(target=trabajar, args=(h,)) for h in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    raiz.tick()
+    assert aplicados == {(h, k): 190 + k for h in range(4) for k in range(10)}
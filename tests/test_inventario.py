@@ -0,0 +1,55 @@
+"""Lectura del inventario y su cache en Feather."""
+
+import os
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import programa_2 as p2
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    directorio = tmp_path / 'cache'
+    monkeypatch.setenv('GENERADOR_CACHE_DIR', str(directorio))
+    return directorio / p2.DIRECTORIO_CACHE_INVENTARIO
+
+
+def libro(tmp_path):
+    ruta = tmp_path / 'datos.xlsx'
+    hoja = Workbook()
+    hoja.active.append(['SKU', 'Inventario', 'Precio normal'])
+    hoja.active.append(['A1', 1, '$1.00'])
+    hoja.active.append([None, None, None])
+    hoja.active.append(['B1', 2.5, None])
+    hoja.save(ruta)
+    return str(ruta)
+
+
+def test_interfaz_y_linea_de_comandos_comparten_la_cache(tmp_path, cache):
+    path = libro(tmp_path)
+    # La interfaz lee por bloques y escribe la cache; la línea de comandos la reutiliza tal cual
+    por_bloques = pd.concat(list(p2.leer_inventario_por_bloques(path, tam_bloque=1)), ignore_index=True)
+    por_bloques = por_bloques.to_dict('records')
+    assert por_bloques == [{'SKU': 'A1', 'Inventario': '1', 'Precio normal': '$1.00'},
+                           {'SKU': 'B1', 'Inventario': '2.5', 'Precio normal': ''}]
+    assert p2.leer_inventario(path).to_dict('records') == por_bloques
+    archivos = os.listdir(cache)
+    assert len(archivos) == 1 and f'-v{p2.VERSION_CACHE_INVENTARIO}-' in archivos[0]
+
+    # Sin cache la línea de comandos lee igual que la interfaz
+    os.remove(cache / archivos[0])
+    assert p2.leer_inventario(path).to_dict('records') == por_bloques
+
+
+def test_cache_de_otra_version_se_ignora_y_se_reemplaza(tmp_path, cache):
+    path = str(tmp_path / 'datos.csv')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('SKU,Inventario\nA1,1\n')
+    ruta, _ = p2._ruta_cache_inventario(path, str(cache))
+    os.makedirs(cache)
+    vieja = cache / os.path.basename(ruta).replace(f'-v{p2.VERSION_CACHE_INVENTARIO}-', '-')
+    p2.feather.write_feather(pd.DataFrame({'SKU': ['X'], 'Inventario': ['1.0']}), str(vieja))
+    assert p2.leer_inventario(path).to_dict('records') == [{'SKU': 'A1', 'Inventario': '1'}]
+    assert os.listdir(cache) == [os.path.basename(ruta)]
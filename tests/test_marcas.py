@@ -0,0 +1,56 @@
+"""Resolución de logos de marca: normalización, similitud y archivo de logos."""
+
+import os
+
+import pytest
+
+import programa_2 as p2
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_normalizar_marca():
+    assert p2.normalizar_marca('  Ray-Ban ') == 'rayban'
+    assert p2.normalizar_marca('AÉROPOSTALE') == 'aeropostale'
+    assert p2.normalizar_marca("Levi's & Co.") == 'levisco'
+
+
+def test_archivo_de_logos_del_repositorio():
+    logos = p2.leer_archivo_logos(os.path.join(RAIZ, 'links_logos.txt'))
+    resolutor = p2.ResolutorMarcas(logos)
+    assert len(resolutor) == len(logos)
+    assert resolutor.resolver('RAY BAN').endswith('/Ray-Ban.webp')
+    assert resolutor.resolver('Aéropostale').endswith('/Aeropostale-scaled.webp')
+    # El archivo trae "harley devidson"; la marca bien escrita se asocia por similitud
+    assert resolutor.resolver('Harley Davidson').endswith('/harleydavidson.webp')
+
+
+def test_archivo_de_logos_texto_y_csv(tmp_path):
+    texto = tmp_path / 'logos.txt'
+    texto.write_text('Ray Ban: https://x/rb.webp\nTOUS=/logos/tous.webp\n\n', encoding='utf-8')
+    assert p2.leer_archivo_logos(str(texto)) == {'rayban': 'https://x/rb.webp', 'tous': '/logos/tous.webp'}
+    csv = tmp_path / 'logos.csv'
+    csv.write_text('marca,logo\nRay-Ban,https://x/rb.webp\n', encoding='utf-8')
+    assert p2.leer_archivo_logos(str(csv)) == {'rayban': 'https://x/rb.webp'}
+
+
+def test_sin_coincidencia_y_memoria_de_resueltas():
+    resolutor = p2.ResolutorMarcas({'tous': 'https://x/tous.webp'})
+    assert resolutor.resolver('Marca Inventada') == ''
+    assert resolutor.resolver('') == '' and resolutor.resolver(None) == ''
+    assert resolutor.precalcular(['TOUS', 'Tous', 'otra']) == {
+        'TOUS': 'https://x/tous.webp', 'Tous': 'https://x/tous.webp', 'otra': ''}
+
+    # Añadir logos descarta lo resuelto, también los "sin logo"
+    resolutor.update({'Marca Inventada': 'https://x/inventada.webp', 'vacia': ''})
+    assert resolutor.resolver('Marca Inventada') == 'https://x/inventada.webp'
+    assert len(resolutor) == 2
+
+
+def test_buscar_logo_marca_necesita_resolutor():
+    logos = {'ray ban': 'https://x/rb.webp'}
+    resolutor = p2.ResolutorMarcas(logos)
+    assert p2.buscar_logo_marca('Ray-Ban', resolutor) == 'https://x/rb.webp'
+    assert p2.buscar_logo_marca('', resolutor) == ''
+    with pytest.raises(TypeError):
+        p2.buscar_logo_marca('Ray-Ban', logos)
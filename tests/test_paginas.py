@@ -0,0 +1,152 @@
+"""Plantilla de página compilada, generación de páginas y manifiesto de la regeneración incremental."""
+
+import json
+import os
+
+import programa_2 as p2
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+with open(os.path.join(RAIZ, 'pagina_producto_RB2398.html'), 'r', encoding='utf-8') as f:
+    PLANTILLA_PAGINA = f.read()
+
+REGISTRO = {
+    'SKU': 'RB2398', 'Valor(es) del atributo 1': 'RB2398', 'Valor(es) del atributo 2': 'RAYBAN',
+    'Precio normal': '$4,000.00', 'precio con descuento': '$3,000.00', 'Porcentajede descuento': '25%',
+    'IMAGEN 1': 'https://ejemplo.com/RB2398-1.webp', 'IMAGEN 2': 'https://ejemplo.com/RB2398-main.webp',
+    'IMAGEN 3': 'https://ejemplo.com/RB2398-3.webp',
+}
+
+PRODUCTO = {
+    'sku': 'RB2398', 'marca': 'RAYBAN', 'precio_normal': '$4,000.00', 'precio_descuento': '$3,000.00',
+    'porcentaje_descuento': '25%', 'imagen1': 'https://ejemplo.com/RB2398-1.webp',
+    'imagen2': 'https://ejemplo.com/RB2398-main.webp', 'imagen3': 'https://ejemplo.com/RB2398-3.webp',
+}
+
+
+def test_plantilla_compilada_conserva_lo_que_no_tiene_valor():
+    compilada = p2.compilar_plantilla_pagina(PLANTILLA_PAGINA)
+    assert {'img1', 'product_brand', 'new_price', 'espec:SKU'} <= compilada.nombres
+    assert compilada.render({}) == PLANTILLA_PAGINA
+    assert compilada.render({'product_brand': None}) == PLANTILLA_PAGINA
+    # Se compila una sola vez por plantilla
+    assert p2.compilar_plantilla_pagina(PLANTILLA_PAGINA) is compilada
+
+
+def test_plantilla_compilada_reemplaza_slots():
+    plantilla = ('<h1 id="product-brand" class="x">MARCA</h1>\n'
+                 '<span class="text-5xl font-extrabold text-black">$1.00</span>\n')
+    compilada = p2.compilar_plantilla_pagina(plantilla)
+    assert compilada.nombres == {'product_brand', 'new_price'}
+    html = compilada.render({'product_brand': '<h1>TOUS</h1>', 'new_price': '<span>$2.00</span>'})
+    assert html == '<h1>TOUS</h1>\n<span>$2.00</span>\n'
+
+
+def test_pagina_masiva():
+    html = p2.GeneradorCatalogoApp._procesar_plantilla_masiva(PLANTILLA_PAGINA, PRODUCTO)
+    assert 'RAYBAN' in html and '$3,000.00' in html and '25%' in html
+    # La imagen "main" pasa al primer lugar
+    assert html.index('RB2398-main.webp') < html.index('RB2398-1.webp')
+
+
+def test_pagina_individual_sin_descuento():
+    registro = dict(REGISTRO, **{'precio con descuento': '', 'Porcentajede descuento': 'nan'})
+    imagenes = [registro['IMAGEN 1'], registro['IMAGEN 2'], registro['IMAGEN 3']]
+    html = p2.generar_pagina_individual_desde_plantilla(registro, imagenes, os.path.join(RAIZ, 'pagina_producto_RB2398.html'))
+    assert '<span class="text-5xl font-extrabold text-black">$4,000.00</span>' in html
+    assert 'line-through' not in html.split('id="product-model"')[1].split('</section>')[0]
+
+
+def test_precios_de_cada_fila():
+    producto = p2.producto_data_desde_registro(REGISTRO)
+    assert producto['precio_normal_num'] == 4000.0 and producto['porcentaje_descuento_num'] == 25.0
+    html = p2.GeneradorCatalogoApp._procesar_plantilla_masiva(PLANTILLA_PAGINA, producto)
+    assert '$3,000.00' in html and '25%' in html
+
+    # Otra fila con el mismo SKU usa sus propios precios
+    otra = p2.producto_data_desde_registro(dict(REGISTRO, **{'precio con descuento': '$3,600.00',
+                                                              'Porcentajede descuento': '10%'}))
+    assert otra['precio_descuento_num'] == 3600.0
+    html = p2.GeneradorCatalogoApp._procesar_plantilla_masiva(PLANTILLA_PAGINA, otra)
+    assert '$3,600.00' in html and '10%' in html and '$3,000.00' not in html
+
+
+def test_descuento_no_numerico_se_conserva():
+    producto = p2.producto_data_desde_registro(dict(REGISTRO, **{'Porcentajede descuento': 'Oferta'}))
+    assert producto['porcentaje_descuento_num'] is None
+    html = p2.GeneradorCatalogoApp._procesar_plantilla_masiva(PLANTILLA_PAGINA, producto)
+    # El descuento sigue visible con el texto del inventario; los precios se formatean
+    assert 'Oferta' in html and '$3,000.00' in html
+    assert '<span class="text-2xl text-gray-400 line-through mr-2">$4,000.00</span>' in html
+
+
+def test_huella_producto():
+    huella = p2.huella_producto(PRODUCTO, 'plantilla-1')
+    assert p2.huella_producto(dict(PRODUCTO), 'plantilla-1') == huella
+    assert p2.huella_producto(PRODUCTO, 'plantilla-2') != huella
+    assert p2.huella_producto(dict(PRODUCTO, marca='TOUS'), 'plantilla-1') != huella
+    # Los *_num se derivan del texto: no cambian la huella por sí solos
+    assert p2.huella_producto(dict(PRODUCTO, precio_normal_num=1.0), 'plantilla-1') == huella
+
+
+def test_claves_paginas_por_fila():
+    claves = p2.claves_paginas(['A', 'B', 'A', '', 'A'])
+    assert claves == [('A', 'A_1.html'), ('B', 'B_1.html'), ('A#2', 'A_2.html'), ('', 'producto_4.html'),
+                      ('A#3', 'A_3.html')]
+    assert p2.archivo_pagina('RB 2398', 2) == 'RB_2398_2.html'
+
+
+def test_claves_paginas_sin_archivos_repetidos():
+    # 'A/B' y 'A:B' dan el mismo nombre seguro; 'ab' y 'AB' chocan en sistemas sin mayúsculas
+    claves = p2.claves_paginas(['A/B', 'A:B', 'ab', 'AB', 'A/B'])
+    archivos = [archivo for _, archivo in claves]
+    assert archivos[0] == 'A_B_1.html' and archivos[2] == 'ab_1.html'
+    assert len({archivo.casefold() for archivo in archivos}) == 5
+    assert archivos[1].startswith('A_B_1_') and archivos[3].startswith('AB_1_')
+    # El nombre no depende de qué filas se generen
+    assert p2.claves_paginas(['A/B', 'A:B', 'ab', 'AB', 'A/B']) == claves
+
+
+def test_manifiesto(tmp_path):
+    directorio = str(tmp_path)
+    assert p2.cargar_manifiesto(directorio) == {}
+    (tmp_path / 'A_1.html').write_text('a', encoding='utf-8')
+    (tmp_path / 'A_viejo.html').write_text('viejo', encoding='utf-8')
+    manifiesto = {'A': {'huella': 'h1', 'archivo': 'A_viejo.html'}}
+    p2.guardar_manifiesto(directorio, manifiesto)
+    assert p2.cargar_manifiesto(directorio) == manifiesto
+    assert p2.pagina_sin_cambios(manifiesto, directorio, 'A', 'h1', 'A_viejo.html')
+    assert not p2.pagina_sin_cambios(manifiesto, directorio, 'A', 'h2', 'A_viejo.html')
+    assert not p2.pagina_sin_cambios(manifiesto, directorio, 'A', 'h1', 'A_1.html')
+    assert not p2.pagina_sin_cambios(manifiesto, directorio, '', 'h1', 'A_viejo.html')
+
+    # La fila cambió de archivo: el anterior se borra al guardar
+    manifiesto['A'] = {'huella': 'h2', 'archivo': 'A_1.html'}
+    p2.guardar_manifiesto(directorio, manifiesto)
+    assert sorted(os.listdir(directorio)) == ['.manifiesto_paginas.json', 'A_1.html']
+    assert p2.pagina_sin_cambios(manifiesto, directorio, 'A', 'h2', 'A_1.html')
+
+    # Sin el archivo la página se regenera aunque la huella coincida
+    os.remove(tmp_path / 'A_1.html')
+    assert not p2.pagina_sin_cambios(manifiesto, directorio, 'A', 'h2', 'A_1.html')
+
+
+def test_manifiesto_no_borra_archivos_en_uso(tmp_path):
+    directorio = str(tmp_path)
+    for nombre in ('A_1.html', 'B_1.html', 'C_1.html'):
+        (tmp_path / nombre).write_text(nombre, encoding='utf-8')
+    p2.guardar_manifiesto(directorio, {'A': {'huella': 'h', 'archivo': 'A_1.html'},
+                                       'B': {'huella': 'h', 'archivo': 'B_1.html'},
+                                       'C': {'huella': 'h', 'archivo': 'C_1.html'}})
+    # A deja su archivo pero otra clave lo usa (con otras mayúsculas); C no se generó
+    # en esta tanda pero su fila sigue en el inventario
+    p2.guardar_manifiesto(directorio, {'A': {'huella': 'h', 'archivo': 'A_2.html'},
+                                       'X': {'huella': 'h', 'archivo': 'b_1.html'}},
+                          en_uso={'A_2.html', 'C_1.html'})
+    assert sorted(os.listdir(directorio)) == ['.manifiesto_paginas.json', 'B_1.html', 'C_1.html']
+
+
+def test_manifiesto_danado(tmp_path):
+    (tmp_path / p2.NOMBRE_MANIFIESTO).write_text('{no es json', encoding='utf-8')
+    assert p2.cargar_manifiesto(str(tmp_path)) == {}
+    (tmp_path / p2.NOMBRE_MANIFIESTO).write_text(json.dumps([1, 2]), encoding='utf-8')
+    assert p2.cargar_manifiesto(str(tmp_path)) == {}
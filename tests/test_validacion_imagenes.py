@@ -0,0 +1,204 @@
+"""ValidadorImagenes y CacheValidacionURL contra un servidor HTTP local."""
+
+import threading
+import time
+import types
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import programa_2 as p2
+
+
+class ManejadorStub(BaseHTTPRequestHandler):
+    """Rutas del servidor de pruebas:
+
+    /img/*        200 image/webp con ETag; responde 304 si llega If-None-Match
+    /sin-head/*   HEAD -> 405, GET -> 200 image/webp
+    /falla-N/*    las primeras N peticiones de cada ruta -> 503, después 200
+    /limite/*     429 siempre
+    /lento/*      200 image/webp tras 0.1 s (mide peticiones simultáneas)
+    /texto        200 text/html
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep-alive: permite comprobar la reutilización
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, tipo='image/webp', cabeceras=None):
+        cuerpo = b'' if self.command == 'HEAD' or status == 304 else b'x' * 16
+        with self.server.lock:
+            self.server.estados[status] += 1
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        if cuerpo:
+            self.wfile.write(cuerpo)
+
+    def _atender(self):
+        servidor = self.server
+        with servidor.lock:
+            servidor.peticiones[(self.command, self.path)] += 1
+            servidor.por_ruta[self.path] += 1
+            servidor.conexiones.add(self.client_address)
+            veces = servidor.por_ruta[self.path]
+        ruta = self.path
+        if ruta.startswith('/img/'):
+            if self.headers.get('If-None-Match') == '"v1"':
+                self._responder(304)
+            else:
+                self._responder(200, cabeceras={'ETag': '"v1"'})
+        elif ruta.startswith('/sin-head/'):
+            self._responder(405 if self.command == 'HEAD' else 200)
+        elif ruta.startswith('/falla-'):
+            fallos = int(ruta.split('/')[1].split('-')[1])
+            self._responder(503 if veces <= fallos else 200)
+        elif ruta.startswith('/limite/'):
+            self._responder(429)
+        elif ruta.startswith('/lento/'):
+            with servidor.lock:
+                servidor.activas += 1
+                servidor.max_activas = max(servidor.max_activas, servidor.activas)
+            time.sleep(0.1)
+            with servidor.lock:
+                servidor.activas -= 1
+            self._responder(200)
+        else:
+            self._responder(200, tipo='text/html')
+
+    do_HEAD = _atender
+    do_GET = _atender
+
+
+@pytest.fixture
+def servidor():
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), ManejadorStub)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.peticiones = Counter()  # (método, ruta) -> peticiones
+    srv.por_ruta = Counter()
+    srv.estados = Counter()     # código HTTP -> respuestas
+    srv.conexiones = set()
+    srv.activas = 0
+    srv.max_activas = 0
+    hilo = threading.Thread(target=srv.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    hilo.start()
+    srv.url = f'http://127.0.0.1:{srv.server_address[1]}'
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return p2.CacheValidacionURL(str(tmp_path / 'urls.db'))
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Registra las esperas entre reintentos sin dormir (solo dentro de programa_2)."""
+    registro = []
+    falso = types.SimpleNamespace(time=time.time, perf_counter=time.perf_counter, sleep=registro.append)
+    monkeypatch.setattr(p2, 'time', falso)
+    return registro
+
+
+@pytest.fixture
+def sesion_nueva(monkeypatch):
+    """Sesión compartida recién creada, para contar sus conexiones desde cero."""
+    monkeypatch.setattr(p2, '_SESION_HTTP', None)
+
+
+def test_imagen_valida_y_contenido_no_imagen(servidor, cache):
+    validador = p2.ValidadorImagenes(cache=cache, sesion=p2.requests.Session())
+    resultados = validador.validar([f'{servidor.url}/img/a.webp', f'{servidor.url}/texto', '', 'nan', 'sin-esquema'])
+    assert resultados == {f'{servidor.url}/img/a.webp': True, f'{servidor.url}/texto': False, 'sin-esquema': False}
+
+
+def test_conexiones_reutilizadas(servidor, cache, sesion_nueva):
+    validador = p2.ValidadorImagenes(concurrencia=1, cache=cache)
+    urls = [f'{servidor.url}/img/{i}.webp' for i in range(10)]
+    assert all(validador.validar(urls).values())
+    assert sum(n for (metodo, _), n in servidor.peticiones.items() if metodo == 'HEAD') == 10
+    # Una sola conexión keep-alive del pool para las diez peticiones
+    assert len(servidor.conexiones) == 1
+    assert p2.ValidadorImagenes(cache=cache).sesion is validador.sesion
+
+
+def test_limite_de_peticiones_por_servidor(servidor, cache):
+    validador = p2.ValidadorImagenes(concurrencia=8, por_host=2, cache=cache)
+    urls = [f'{servidor.url}/lento/{i}.webp' for i in range(8)]
+    assert all(validador.validar(urls).values())
+    assert servidor.max_activas == 2
+
+
+def test_reintentos_con_espera_exponencial(servidor, cache, esperas):
+    validador = p2.ValidadorImagenes(reintentos=3, espera=0.5, cache=cache, sesion=p2.requests.Session())
+    assert validador.validar_url(f'{servidor.url}/falla-2/a.webp') is True
+    assert servidor.peticiones[('HEAD', '/falla-2/a.webp')] == 3
+    assert esperas == [0.5, 1.0]
+
+
+def test_la_espera_del_reintento_libera_el_cupo_del_servidor(servidor, cache, monkeypatch):
+    validador = p2.ValidadorImagenes(por_host=1, reintentos=1, espera=0.5, cache=cache, sesion=p2.requests.Session())
+    semaforo = validador._semaforo(p2.urlparse(servidor.url).netloc)
+    libre = []
+
+    def dormir(segundos):
+        # Otra validación del mismo servidor podría entrar durante la espera
+        libre.append(semaforo.acquire(blocking=False))
+        if libre[-1]:
+            semaforo.release()
+
+    monkeypatch.setattr(p2, 'time', types.SimpleNamespace(time=time.time, perf_counter=time.perf_counter, sleep=dormir))
+    assert validador.validar_url(f'{servidor.url}/falla-1/a.webp') is True
+    assert libre == [True]
+
+
+def test_reintentos_agotados_en_429(servidor, cache, esperas):
+    validador = p2.ValidadorImagenes(reintentos=2, espera=0.1, cache=cache, sesion=p2.requests.Session())
+    assert validador.validar_url(f'{servidor.url}/limite/a.webp') is False
+    assert servidor.peticiones[('HEAD', '/limite/a.webp')] == 3
+    assert esperas == [0.1, 0.2]
+    # Un 429 no es un resultado: no se guarda en la cache
+    assert cache.obtener(f'{servidor.url}/limite/a.webp') is None
+
+
+def test_get_si_el_servidor_no_admite_head(servidor, cache):
+    validador = p2.ValidadorImagenes(cache=cache, sesion=p2.requests.Session())
+    assert validador.validar_url(f'{servidor.url}/sin-head/a.webp') is True
+    assert servidor.peticiones[('HEAD', '/sin-head/a.webp')] == 1
+    assert servidor.peticiones[('GET', '/sin-head/a.webp')] == 1
+
+
+def test_cache_vigente_no_repite_la_peticion(servidor, cache):
+    validador = p2.ValidadorImagenes(cache=cache, sesion=p2.requests.Session())
+    url = f'{servidor.url}/img/a.webp'
+    assert validador.validar_url(url) and validador.validar_url(url)
+    assert servidor.peticiones[('HEAD', '/img/a.webp')] == 1
+
+
+def test_revalidacion_con_304(servidor, tmp_path):
+    # TTL 0: la entrada caduca enseguida y se revalida con If-None-Match
+    path = str(tmp_path / 'urls.db')
+    cache = p2.CacheValidacionURL(path, ttl_valida=0)
+    validador = p2.ValidadorImagenes(cache=cache, sesion=p2.requests.Session())
+    url = f'{servidor.url}/img/a.webp'
+    assert validador.validar([url]) == {url: True}
+    primera = cache.obtener(url)
+    assert primera['etag'] == '"v1"'
+
+    assert validador.validar([url]) == {url: True}
+    segunda = cache.obtener(url)
+    assert segunda['status'] == 200 and segunda['etag'] == '"v1"'
+    assert segunda['revisado'] >= primera['revisado']
+    assert servidor.peticiones[('HEAD', '/img/a.webp')] == 2
+    assert servidor.estados[304] == 1
+
+    # Lo revalidado se guarda en disco y lo lee otra instancia
+    assert p2.CacheValidacionURL(path).obtener(url)['revisado'] == segunda['revisado']